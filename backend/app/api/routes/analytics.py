@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import get_async_session
+from app.db.models import User
+from app.api.routes.auth import get_current_user_from_token
+from app.schemas.analytics import AnalyticsSummaryResponse
+from app.services.analytics import analytics_summary
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/summary", response_model=AnalyticsSummaryResponse)
+async def summary(
+    days: int = Query(30, ge=1, le=366, description="Days of daily figures to include, counting today"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Explorer dashboard metrics: documents per type, actions per day,
+    per-organization volumes and the average time from ISSUED to first
+    PAID.
+
+    Served from rollup tables the outbox dispatcher keeps up to date, so
+    the cost does not grow with the ledger; figures trail new entries by
+    about OUTBOX_DISPATCH_INTERVAL_SECONDS.
+    """
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    return await session.run_sync(analytics_summary, since)
@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Cookie, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
 import logging
 
-from app.db.session import get_session
+from app.db.session import get_async_session
 from app.db.models import User
 from app.schemas.auth import LoginRequest, TokenResponse, SignupRequest, MessageResponse, UserResponse
-from app.services.auth import authenticate_user, create_user
+from app.services.auth import (
+    authenticate_user,
+    create_user,
+    get_cached_token_subject,
+    cache_token_subject,
+    get_user_cached,
+)
 from app.core.security import create_access_token, create_refresh_token
 from app.core.config import settings
+from app.core.password_pool import PasswordPoolBusy, pool_stats
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger(__name__)
@@ -17,42 +24,50 @@ logger = logging.getLogger(__name__)
 # Standard Bearer token handling
 security = HTTPBearer()
 
-def get_current_user_from_token(
+async def get_current_user_from_token(
     credentials: HTTPAuthorizationCredentials = Depends(security), 
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ) -> User:
     """
     Dependency to extract and validate user from Authorization header.
     
-    Used by protected endpoints.
+    Used by protected endpoints. Decoded tokens and user records are
+    cached for AUTH_CACHE_TTL_SECONDS, so repeat requests skip both the
+    JWT decode and the database lookup.
     
     **Expected header format:**
     Authorization: Bearer <access_token>
     """
     token = credentials.credentials
     
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token: missing user ID")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError as e:
-        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
-    
-    user = session.exec(select(User).where(User.id == int(user_id))).first()
+    # Tokens and users seen recently are served from the auth cache
+    user_id = get_cached_token_subject(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+            user_id = payload.get("sub")
+            if not user_id:
+                raise HTTPException(status_code=401, detail="Invalid token: missing user ID")
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        cache_token_subject(token, user_id, payload.get("exp"))
+    
+    user = await get_user_cached(session, int(user_id))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
     
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     data: LoginRequest,
     response: Response,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Login endpoint - Authenticates existing user and returns access token.
@@ -65,10 +80,14 @@ def login(
     **Errors:**
     - 401 User not found: Email not registered
     - 401 Invalid password: Wrong password for existing user
+    - 503 Password hashing queue full: Retry shortly
     """
     logger.info(f"Login attempt for email: {data.email}")
     
-    auth_result = authenticate_user(session, data.email, data.password)
+    try:
+        auth_result = await authenticate_user(session, data.email, data.password)
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     
     if not auth_result["success"]:
         if auth_result["reason"] == "user_not_found":
@@ -96,7 +115,7 @@ def login(
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh(refresh_token: str = Cookie(None)):
+async def refresh(refresh_token: str = Cookie(None)):
     """
     Refresh access token using stored refresh token.
     
@@ -133,9 +152,9 @@ def refresh(refresh_token: str = Cookie(None)):
 
 
 @router.post("/signup", response_model=MessageResponse)
-def signup(
+async def signup(
     data: SignupRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     User registration endpoint - Creates new user account.
@@ -151,20 +170,23 @@ def signup(
     - 400 User already exists: Email already registered
     - 400 Invalid password: Password too long (>72 bytes)
     - 400 Invalid role: Must be buyer, seller, auditor, or bank
+    - 503 Password hashing queue full: Retry shortly
     """
     logger.info(f"Signup attempt for email: {data.email}")
     try:
-        user = create_user(session, data)
+        user = await create_user(session, data)
         logger.info(f"User created successfully: {data.email}")
     except ValueError as e:
         logger.warning(f"Signup failed for email: {data.email}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     
     return {"message": "Account created successfully. Please login with your credentials."}
 
 
 @router.get("/user", response_model=UserResponse)
-def get_user(user: User = Depends(get_current_user_from_token)):
+async def get_user(user: User = Depends(get_current_user_from_token)):
     """
     Get current authenticated user details.
     
@@ -182,3 +204,15 @@ def get_user(user: User = Depends(get_current_user_from_token)):
     """
     logger.info(f"Fetching user details for: {user.email}")
     return user
+
+
+@router.get("/hashing/stats")
+async def get_hashing_stats(user: User = Depends(get_current_user_from_token)):
+    """
+    Load of the password hashing process pool.
+
+    **Returns:**
+    - workers, in_flight, queue_depth (waiting for a worker), peak_in_flight,
+      completed, rejected (turned away with 503), max_pending
+    """
+    return pool_stats()
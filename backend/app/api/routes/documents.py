@@ -1,98 +1,231 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlmodel import Session, select
-from typing import List
-import shutil
-from pathlib import Path
-import hashlib
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import List, Optional
 import json
+import time
 
-from app.db.session import get_session
+from app.core.config import settings
+from app.db.session import get_async_session
 from app.db.models import User, Document, LedgerEntry, Organization
 from app.api.routes.auth import get_current_user_from_token
-from app.schemas.documents import DocumentResponse, DocumentDetailResponse, ActionRequest, LedgerEntryResponse
+from app.schemas.documents import (
+    DocumentResponse,
+    DocumentDetailResponse,
+    ActionRequest,
+    LedgerEntryResponse,
+    BulkActionRequest,
+    BulkActionResponse,
+    IngestResponse,
+)
+from app.services.documents import (
+    list_documents_page,
+    get_document_with_ledger,
+    append_ledger_entry,
+    apply_actions,
+    compare_and_swap_document,
+    ConcurrentUpdateError,
+    spool_upload,
+    UploadTooLargeError,
+)
+from app.services.storage import get_blob_store, add_blob_reference, release_blob_reference
+from app.services.ingest import (
+    IngestError,
+    IngestFile,
+    TooManyFilesError,
+    discard_spooled,
+    insert_documents,
+    spool_archive,
+    store_files,
+)
+from app.services.policy import get_policy
+from app.services.events import ledger_event, publish_events
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-UPLOAD_DIR = Path("files")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
 @router.post("/upload", response_model=DocumentDetailResponse)
-def upload_document(
+async def upload_document(
     file: UploadFile = File(...),
     doc_number: str = Form(...),
     seller_id: int = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     """
     Buyer uploads a Purchase Order (PO) to initiate trade.
+
+    **Errors:**
+    - 403 Only buyers can initiate trade with PO upload
+    - 413 File exceeds MAX_UPLOAD_BYTES
     """
-    # 1. Save file
+    # 1. Only Buyer can start flow with PO - checked before anything is written
+    if current_user.role != "buyer":
+         raise HTTPException(status_code=403, detail="Only buyers can initiate trade with PO upload")
+
+    # 2. Stream file to disk, hashing as it is written, then store it by
+    # content hash (identical files are kept once)
     safe_filename = f"{doc_number}_{file.filename}"
-    file_path = UPLOAD_DIR / safe_filename
+    store = get_blob_store()
+
+    try:
+        spooled_path, file_hash, file_size = await run_in_threadpool(
+            spool_upload, file.file, store.staging_dir, settings.MAX_UPLOAD_BYTES
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # The reference is counted before the content is stored and released if
+    # the document is not created, so a failed upload leaves no orphan blob
+    await session.run_sync(add_blob_reference, file_hash, file_size)
+    await session.commit()
+    try:
+        await run_in_threadpool(store.put_file, file_hash, spooled_path)
+
+        # 3. Create Document
+        document = Document(
+            doc_number=doc_number,
+            file_url=safe_filename,
+            hash=file_hash,
+            doc_type="PO",
+            owner_id=current_user.id
+        )
+        session.add(document)
+        await session.flush()
+
+        # 4. Create Ledger Entry (ISSUED)
+        # Metadata includes seller_id so seller knows it's for them
+        metadata = json.dumps({"seller_id": seller_id})
+
+        # Document and its ISSUED entry are committed together
+        entry = await session.run_sync(append_ledger_entry, document, current_user.id, "ISSUED", metadata)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        await session.run_sync(release_blob_reference, store, file_hash)
+        raise
+    await publish_events([ledger_event(entry, document, current_user.role)])
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    # 2. Calculate hash
-    with open(file_path, "rb") as f:
-        file_hash = hashlib.sha256(f.read()).hexdigest()
-        
-    # 3. Create Document
-    # Only Buyer can start flow with PO? User request implies "As as buyer... upload PO"
-    # But let's allow upload, policy check logic can be added if needed.
+    # Reload with relationships for the detail response
+    return await session.run_sync(get_document_with_ledger, document.id, populate_existing=True)
+
+@router.post("/ingest", response_model=IngestResponse)
+async def ingest_documents(
+    seller_id: int = Form(...),
+    files: List[UploadFile] = File(default=[], description="PO files; the doc number is each file name's stem"),
+    archive: Optional[UploadFile] = File(None, description="Zip archive of PO files"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Buyer onboards many Purchase Orders at once, as individual files and/or
+    a zip archive.
+
+    Every file becomes a PO document with an ISSUED ledger entry, written
+    in batches of INGEST_BATCH_SIZE documents per transaction.
+
+    **Errors:**
+    - 403 Only buyers can initiate trade with PO upload
+    - 400 No files, or the archive is not a valid zip
+    - 413 More than INGEST_MAX_FILES files, or a file exceeds MAX_UPLOAD_BYTES
+    """
     if current_user.role != "buyer":
-         raise HTTPException(status_code=403, detail="Only buyers can initiate trade with PO upload")
+        raise HTTPException(status_code=403, detail="Only buyers can initiate trade with PO upload")
+    if len(files) > settings.INGEST_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.INGEST_MAX_FILES} files per request")
 
-    print(f"DEBUG: Creating Document: doc_number={doc_number}, file_url={safe_filename}, hash={file_hash}, owner_id={current_user.id}")
-    document = Document(
-        doc_number=doc_number,
-        file_url=safe_filename,
-        hash=file_hash,
-        doc_type="PO",
-        owner_id=current_user.id
+    owner_id = current_user.id
+    started = time.perf_counter()
+    store = get_blob_store()
+    spooled = []
+    try:
+        for file in files:
+            path, digest, size = await run_in_threadpool(
+                spool_upload, file.file, store.staging_dir, settings.MAX_UPLOAD_BYTES
+            )
+            spooled.append(IngestFile(path, digest, size, file.filename))
+        if archive is not None:
+            spooled += await run_in_threadpool(
+                spool_archive, archive.file, store.staging_dir, settings.MAX_UPLOAD_BYTES,
+                settings.INGEST_MAX_FILES - len(spooled),
+            )
+    except (UploadTooLargeError, TooManyFilesError) as e:
+        discard_spooled(spooled)
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestError as e:
+        discard_spooled(spooled)
+        raise HTTPException(status_code=400, detail=str(e))
+    if not spooled:
+        raise HTTPException(status_code=400, detail="No files to ingest")
+
+    await run_in_threadpool(store_files, store, spooled)
+    created = await session.run_sync(
+        insert_documents, spooled, owner_id, seller_id, settings.INGEST_BATCH_SIZE
     )
-    session.add(document)
-    session.commit()
-    session.refresh(document)
-    print(f"DEBUG: Document Created: id={document.id}")
-    
-    # 4. Create Ledger Entry (ISSUED)
-    # Metadata includes seller_id so seller knows it's for them
-    metadata = json.dumps({"seller_id": seller_id})
-    print(f"DEBUG: Creating LedgerEntry: doc_id={document.id}, actor_id={current_user.id}, metadata={metadata}")
-    
-    entry = LedgerEntry(
-        doc_id=document.id,
-        actor_id=current_user.id,
-        action="ISSUED",
-        entry_metadata=metadata
+
+    elapsed = time.perf_counter() - started
+    return IngestResponse(
+        ingested=len(created),
+        seconds=round(elapsed, 3),
+        documents_per_second=round(len(created) / elapsed, 1) if elapsed else 0.0,
+        documents=created,
     )
-    session.add(entry)
-    session.commit()
-    
-    # Refresh to get relationships
-    session.refresh(document)
-    return document
 
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
-    session: Session = Depends(get_session),
+async def list_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Maximum documents per page"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    doc_type: Optional[str] = Query(None, description="Filter by document type (PO, LOC, BOL, INVOICE)"),
+    owner_id: Optional[int] = Query(None, description="Filter by owner user ID"),
+    last_action: Optional[str] = Query(None, description="Filter by the document's latest ledger action"),
+    doc_number: Optional[str] = Query(None, description="Filter by document number prefix"),
+    created_from: Optional[datetime] = Query(None, description="Only documents created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only documents created before this time"),
+    mine: bool = Query(False, description="Only documents the user is involved in (named seller, or has acted on)"),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     """
-    List all documents relevant to the user.
-    Simplicity: Show all documents for now, or filter by involvement.
-    Real world: Filter where user is owner OR user is referenced in ledger/metadata.
+    List documents relevant to the user, newest first.
+
+    Buyers always see only their own documents. Other roles see every
+    document, or with `mine=true` only those they are involved in: sellers
+    named at upload and anyone who has performed an action on the document
+    (served from the participant index).
+
+    **Pagination:**
+    - Results are paged by (created_at, id); at most `limit` documents per call
+    - When more documents exist, the `X-Next-Cursor` response header holds
+      the cursor for the next page
     """
     # Filter documents based on role
-    query = select(Document)
     if current_user.role == "buyer":
         # Buyers only see their own documents
-        query = query.where(Document.owner_id == current_user.id)
-        
-    documents = session.exec(query).all()
-    
+        if owner_id is not None and owner_id != current_user.id:
+            return []
+        owner_id = current_user.id
+
+    try:
+        documents, next_cursor = await session.run_sync(
+            list_documents_page,
+            limit=limit,
+            cursor=cursor,
+            owner_id=owner_id,
+            doc_type=doc_type,
+            last_action=last_action,
+            doc_number_prefix=doc_number,
+            created_from=created_from,
+            created_to=created_to,
+            participant_id=current_user.id if mine and current_user.role != "buyer" else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
     response_list = []
     for doc in documents:
         # Create Pydantic model from DB object
@@ -104,15 +237,13 @@ def list_documents(
     return response_list
 
 @router.get("/{id}", response_model=DocumentDetailResponse)
-def get_document(
+async def get_document(
     id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
-    print(f"DEBUG: Fetching document with ID: {id}")
-    document = session.get(Document, id)
+    document = await session.run_sync(get_document_with_ledger, id)
     if not document:
-        print(f"DEBUG: Document {id} NOT FOUND in DB.")
         raise HTTPException(status_code=404, detail=f"Document {id} not found")
         
     # Create Pydantic response
@@ -128,106 +259,117 @@ def get_document(
             
     doc_resp.owner_name = document.owner.name if document.owner else "Unknown"
 
-    # Sort entries by time
-    doc_resp.ledger_entries.sort(key=lambda x: x.created_at)
-    
     return doc_resp
 
 @router.post("/action", response_model=LedgerEntryResponse)
-def perform_action(
+async def perform_action(
     req: ActionRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     """
     Handle state transitions based on Role and Document Type.
+
+    Allowed actions and the resulting document type come from the policy
+    table (app/services/policy.py).
+
+    **Errors:**
+    - 404 Document not found
+    - 403 Action not allowed for this role and document type
+    - 409 Document is not at `expected_version`, or kept changing under
+      concurrent actions for ACTION_MAX_RETRIES retries
     """
-    doc = session.get(Document, req.doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-        
-    role = current_user.role
-    doc_type = doc.doc_type
+    # Read up front: a rollback below expires every instance in the session
+    role, actor_id = current_user.role, current_user.id
     action = req.action
-    
-    # Policy Check
-    allowed = False
-    
-    # buyer PO AMEND
-    if role == "buyer" and doc_type == "PO" and action == "AMEND":
-        allowed = True
 
-    # buyer BOL RECEIVED
-    elif role == "buyer" and doc_type == "BOL" and action == "RECEIVED":
-        allowed = True
-        
-    # seller BOL SHIPPED
-    elif role == "seller" and doc_type == "BOL" and action == "SHIPPED":
-        allowed = True
-        
-    # seller PO ISSUE_BOL
-    elif role == "seller" and doc_type == "PO" and action == "ISSUE_BOL":
-        allowed = True
-    # seller LOC ISSUE_BOL (If flow was PO -> LOC)
-    elif role == "seller" and doc_type == "LOC" and action == "ISSUE_BOL":
-        allowed = True
-    
-    # seller BOL ISSUE_INVOICE
-    elif role == "seller" and doc_type == "BOL" and action == "ISSUE_INVOICE":
-        allowed = True
-        
-    # auditor PO VERIFY
-    elif role == "auditor" and doc_type == "PO" and action == "VERIFY":
-        allowed = True
-        
-    # auditor LOC VERIFY
-    elif role == "auditor" and doc_type == "LOC" and action == "VERIFY":
-        allowed = True
-        
-    # bank INVOICE PAID
-    elif role == "bank" and doc_type == "INVOICE" and action == "PAID":
-        allowed = True
-        
-    # bank PO ISSUE_LOC
-    elif role == "bank" and doc_type == "PO" and action == "ISSUE_LOC":
-        allowed = True
-
-    # Corrections for ambiguous requirements
-    # bank LOC ISSUE_LOC (If they re-issue or amend?)
-    elif role == "bank" and doc_type == "LOC" and action == "ISSUE_LOC":
-        allowed = True
-    
-    if not allowed:
-        raise HTTPException(status_code=403, detail=f"Action '{action}' not allowed for role '{role}' on document '{doc_type}'")
-        
-    # Create Ledger Entry
-    entry = LedgerEntry(
-        doc_id=doc.id,
-        actor_id=current_user.id,
-        action=action,
-        entry_metadata=req.metadata
-    )
-    session.add(entry)
-    
-    # State Transitions (Simulating lifecycle linear flow)
-    print(f"DEBUG: Processing action {action} on doc_type {doc.doc_type}")
-    
-    if action == "ISSUE_LOC" and doc.doc_type == "PO":
-        print(f"DEBUG: Transitioning Doc {doc.id} from PO to LOC")
-        doc.doc_type = "LOC"
-        session.add(doc)
-        
-    elif action == "ISSUE_BOL" and (doc.doc_type == "PO" or doc.doc_type == "LOC"):
-        print(f"DEBUG: Transitioning Doc {doc.id} from {doc.doc_type} to BOL")
-        doc.doc_type = "BOL"
-        session.add(doc)
-        
-    elif action == "ISSUE_INVOICE" and doc.doc_type == "BOL":
-        print(f"DEBUG: Transitioning Doc {doc.id} from BOL to INVOICE")
-        doc.doc_type = "INVOICE"
-        session.add(doc)
+    for attempt in range(settings.ACTION_MAX_RETRIES + 1):
+        doc = await session.get(Document, req.doc_id, populate_existing=True)
+        if not doc:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if req.expected_version is not None and doc.version != req.expected_version:
+            raise HTTPException(status_code=409, detail=f"Document is at version {doc.version}, not {req.expected_version}")
 
-    session.commit()
-    session.refresh(entry)
+        doc_type = doc.doc_type
+
+        # Policy Check
+        decision = get_policy().decide(role, doc_type, action)
+        if not decision.allowed:
+            if attempt:
+                # Allowed against the state first read; a concurrent action moved it on
+                raise HTTPException(status_code=409, detail="Document was changed by a concurrent action")
+            raise HTTPException(status_code=403, detail=f"Action '{action}' not allowed for role '{role}' on document '{doc_type}'")
+
+        # Compare-and-swap on the version read above; the transition comes
+        # from the same policy rule
+        swapped = await session.run_sync(
+            compare_and_swap_document, doc.id, doc.version, doc_type=decision.next_doc_type
+        )
+        if swapped:
+            break
+        await session.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Document was changed by a concurrent action")
+
+    # Create Ledger Entry (also advances the document's materialized state)
+    entry = await session.run_sync(append_ledger_entry, doc, actor_id, action, req.metadata)
+
+    await session.commit()
+    await session.refresh(entry)
+    await publish_events([ledger_event(entry, doc, role, decision.next_doc_type)])
     
     return entry
+
+
+@router.post("/actions/bulk", response_model=BulkActionResponse)
+async def perform_bulk_actions(
+    req: BulkActionRequest,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Apply many actions in one request and one transaction (e.g. a bank
+    settling a run of invoices).
+
+    Each item is checked like POST /documents/action and gets its own
+    status_code; items that fail do not stop the others. Actions on the
+    same document are applied in request order.
+
+    **Errors:**
+    - 413 More than BULK_ACTION_MAX_ITEMS actions
+    - 409 Documents kept changing under concurrent actions for
+      ACTION_MAX_RETRIES retries
+    """
+    if len(req.actions) > settings.BULK_ACTION_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_ACTION_MAX_ITEMS} actions per request")
+
+    role, actor_id = current_user.role, current_user.id
+    for _ in range(settings.ACTION_MAX_RETRIES + 1):
+        try:
+            results = await session.run_sync(apply_actions, actor_id, role, req.actions)
+            break
+        except ConcurrentUpdateError:
+            await session.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Documents were changed by concurrent actions")
+
+    await session.commit()
+
+    applied = [result for result in results if result["entry"] is not None]
+    if applied:
+        touched = await session.exec(select(Document).where(Document.id.in_({r["doc_id"] for r in applied})))
+        documents = {doc.id: doc for doc in touched}
+        await publish_events([
+            ledger_event(result["entry"], documents[result["doc_id"]], role, result["doc_type"])
+            for result in applied
+        ])
+
+    succeeded = sum(1 for result in results if result["status_code"] == 200)
+    return BulkActionResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[
+            dict(result, entry=LedgerEntryResponse.model_validate(result["entry"]) if result["entry"] else None)
+            for result in results
+        ],
+    )
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_async_session
+from app.db.models import User
+from app.api.routes.auth import get_current_user_from_token
+from app.services.events import event_filter, get_event_broker, sse_stream
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("/ledger")
+async def stream_ledger_events(
+    doc_id: Optional[int] = Query(None, description="Only entries for this document"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Server-Sent Events stream of ledger entries as they are committed.
+
+    Each `ledger_entry` event carries the entry, its document's number,
+    type (after the entry) and owner, and the actor's role. Buyers only
+    receive entries on their own documents, as in GET /documents/.
+
+    A comment line is sent every EVENT_KEEPALIVE_SECONDS while idle. If the
+    client falls too far behind, an `overflow` event ends the stream;
+    reconnect and re-fetch to catch up.
+    """
+    accepts = event_filter(current_user.id, current_user.role, doc_id)
+    # The stream is long-lived; don't hold a database connection for it
+    await session.close()
+
+    broker = get_event_broker()
+    subscription = broker.subscribe(accepts)
+
+    async def stream():
+        try:
+            async for chunk in sse_stream(subscription, settings.EVENT_KEEPALIVE_SECONDS):
+                yield chunk
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
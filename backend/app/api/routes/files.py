@@ -1,20 +1,187 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
+from typing import Optional, Tuple
+import mimetypes
+import re
+
+from app.core.config import settings
+from app.db.models import Document
+from app.db.session import get_async_session
+from app.services.storage import BlobStore, get_blob_store
 
 router = APIRouter(prefix="/files", tags=["files"])
 
-UPLOAD_DIR = Path("files")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Files uploaded before content-addressed storage live here by name
+LEGACY_UPLOAD_DIR = Path(settings.FILES_DIR)
+
+# Content at a hash URL can never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# A filename can be re-pointed at newer content, so caches must revalidate
+# (cheap: a matching ETag answers 304 without a body)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+STREAM_CHUNK_SIZE = 64 * 1024
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires)"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _parse_single_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse `bytes=start-end` into an inclusive (start, end) pair.
+
+    Returns None for headers we do not handle (multiple ranges, other
+    units), in which case the full content is sent.
+
+    Raises:
+        HTTPException: 416 if the range lies outside the content
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _stream(store: BlobStore, digest: str, start: int, length: int):
+    body = store.open(digest)
+    try:
+        if start:
+            if body.seekable():
+                body.seek(start)
+            else:
+                while start:
+                    start -= len(body.read(min(start, STREAM_CHUNK_SIZE)))
+        while length > 0:
+            chunk = body.read(min(length, STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        body.close()
+
+
+def _blob_response(request: Request, digest: str, filename: str, cache_control: str) -> Response:
+    """
+    Serve stored content with a strong ETag (the SHA-256), conditional GET
+    and single byte-range support.
+    """
+    store = get_blob_store()
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Blobs are named by hash, so the type comes from the original name
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    disposition = f'inline; filename="{filename}"'
+
+    local_path = store.local_path(digest)
+    if local_path:
+        # FileResponse handles Range and If-Range against the ETag above
+        return FileResponse(
+            local_path,
+            media_type=media_type,
+            headers=headers,
+            filename=filename,
+            content_disposition_type="inline",
+        )
+
+    size = store.size(digest)
+    headers["Content-Disposition"] = disposition
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_single_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_stream(store, digest, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _stream(store, digest, start, end - start + 1),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.get("/blob/{digest}")
+async def get_file_by_hash(
+    digest: str,
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Serve a file by its SHA-256 (a document's `hash`).
+
+    Content at this URL never changes, so it is cacheable forever.
+    """
+    if not SHA256_HEX.match(digest) or not get_blob_store().exists(digest):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    document = (await session.exec(
+        select(Document).where(Document.hash == digest).limit(1)
+    )).first()
+    filename = document.file_url if document else digest
+    return _blob_response(request, digest, filename, IMMUTABLE_CACHE_CONTROL)
+
 
 @router.get("/{filename}")
-def get_file(filename: str):
+async def get_file(
+    filename: str,
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
     """
     Serve uploaded file by filename.
+
+    The filename is the document's `file_url`; content is read from the
+    blob store by the document's hash. When several documents share a
+    filename, the most recent one is served.
+
+    **Caching:**
+    - `ETag` is the document's SHA-256; send it back in `If-None-Match`
+      to get 304 Not Modified
+    - `Range: bytes=start-end` returns 206 Partial Content
+    - For a URL that can be cached indefinitely use /files/blob/{hash}
     """
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
+    document = (await session.exec(
+        select(Document)
+        .where(Document.file_url == filename)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+    )).first()
+
+    if document and get_blob_store().exists(document.hash):
+        return _blob_response(request, document.hash, filename, REVALIDATE_CACHE_CONTROL)
+
+    file_path = LEGACY_UPLOAD_DIR / filename
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
     
     return FileResponse(file_path)
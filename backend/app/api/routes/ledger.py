@@ -0,0 +1,152 @@
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import get_async_session
+from app.core.config import settings
+from app.db.models import User, LedgerEntry
+from app.api.routes.auth import get_current_user_from_token
+from app.schemas.documents import LedgerEntryResponse
+from app.services.ledger import (
+    verify_ledger,
+    anchor_pending_entries,
+    first_document_entry,
+    get_inclusion_proof,
+)
+from app.services.ledger_metadata import find_ledger_entries
+
+router = APIRouter(prefix="/ledger", tags=["ledger"])
+
+
+def _require_auditor(user: User) -> None:
+    if user.role != "auditor":
+        raise HTTPException(status_code=403, detail="Only auditors can verify the ledger")
+
+
+@router.post("/verify")
+async def verify(
+    full: bool = Query(False, description="Re-verify from the first entry instead of the last checkpoint"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Verify the ledger hash chain (auditors only).
+
+    Only entries appended since the previous verification are checked,
+    unless `full=true`.
+
+    **Errors:**
+    - 403 Only auditors can verify the ledger
+    """
+    _require_auditor(current_user)
+
+    return await session.run_sync(verify_ledger, full=full)
+
+
+@router.post("/anchors")
+async def create_anchors(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Anchor entries appended since the last anchor now, instead of waiting
+    for the periodic task (auditors only).
+
+    **Errors:**
+    - 403 Only auditors can verify the ledger
+    """
+    _require_auditor(current_user)
+
+    return await session.run_sync(anchor_pending_entries, max_leaves=settings.LEDGER_ANCHOR_MAX_LEAVES)
+
+
+@router.get("/entries", response_model=List[LedgerEntryResponse])
+async def search_entries(
+    action: Optional[str] = None,
+    seller_id: Optional[int] = None,
+    counterparty: Optional[str] = None,
+    currency: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Ledger entries filtered on their structured metadata, newest first
+    (auditors only). Filters are evaluated in SQL against indexed columns.
+
+    **Errors:**
+    - 403 Only auditors can verify the ledger
+    """
+    _require_auditor(current_user)
+
+    entries = await session.run_sync(
+        find_ledger_entries,
+        action=action,
+        limit=limit,
+        seller_id=seller_id,
+        counterparty=counterparty,
+        currency=currency,
+        min_amount=min_amount,
+        max_amount=max_amount,
+    )
+    results = []
+    for entry in entries:
+        result = LedgerEntryResponse.model_validate(entry)
+        result.actor_name = entry.actor.name if entry.actor else None
+        results.append(result)
+    return results
+
+
+async def _proof_response(session: AsyncSession, entry) -> dict:
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Ledger entry not found")
+    proof = await session.run_sync(get_inclusion_proof, entry)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Ledger entry has not been anchored yet")
+    return proof
+
+
+@router.get("/proof/entries/{entry_id}")
+async def entry_proof(
+    entry_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Merkle inclusion proof for a ledger entry (auditors only).
+
+    Recompute the root from `leaf_hash` and the `proof` steps (sibling on
+    the given side, `sha256(0x01 || left || right)`) and compare it with
+    `anchor.merkle_root`.
+
+    **Errors:**
+    - 403 Only auditors can verify the ledger
+    - 404 Entry not found, or not anchored yet
+    """
+    _require_auditor(current_user)
+
+    return await _proof_response(session, await session.get(LedgerEntry, entry_id))
+
+
+@router.get("/proof/documents/{document_hash}")
+async def document_proof(
+    document_hash: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Merkle inclusion proof for the first ledger entry of the document with
+    this file hash (auditors only). The leaf covers the file hash, so the
+    proof also shows the file was registered in the ledger.
+
+    **Errors:**
+    - 403 Only auditors can verify the ledger
+    - 404 No ledger entry for this document, or not anchored yet
+    """
+    _require_auditor(current_user)
+
+    return await _proof_response(session, await session.run_sync(first_document_entry, document_hash))
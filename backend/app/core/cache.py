@@ -0,0 +1,73 @@
+"""
+Small key/value cache with a pluggable backend.
+
+The default backend is an in-process TTL + LRU map. Deployments running
+several worker processes can supply a shared backend (e.g. Redis) by
+implementing CacheBackend and installing it where the cache is used (see
+app.services.auth.set_auth_cache_backend). Callers store plain
+JSON-compatible data so values can cross process boundaries.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for at most `ttl` seconds"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every key"""
+
+
+class TTLCache(CacheBackend):
+    """Thread-safe in-process cache evicting expired, then least recently used, entries"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -10,6 +10,60 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = one per CPU core
+    PASSWORD_HASH_MAX_PENDING: int = 256
+
+    # Uploads and file storage
+    MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    FILES_DIR: str = "files"
+    STORAGE_BACKEND: str = "local"  # local | object
+    OBJECT_STORE_BUCKET: str = "documents"
+    INGEST_MAX_FILES: int = 1000  # per bulk ingest request
+    INGEST_BATCH_SIZE: int = 500  # documents per transaction
+
+    # Background integrity scrub of stored files, 0 interval disables it
+    SCRUB_INTERVAL_SECONDS: int = 0
+    SCRUB_WORKERS: int = 2
+    SCRUB_BATCH_SIZE: int = 100
+    SCRUB_MAX_BYTES_PER_SECOND: int = 50 * 1024 * 1024  # 0 = unthrottled
+
+    # Document action policy rules (JSON); empty uses app/core/policy.json
+    POLICY_FILE: str = ""
+    # Re-reads after losing a concurrent update before answering 409
+    ACTION_MAX_RETRIES: int = 3
+    BULK_ACTION_MAX_ITEMS: int = 1000
+
+    # Auth cache (decoded tokens and user records), 0 TTL disables it
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Ledger Merkle anchoring, 0 interval disables the background task
+    LEDGER_ANCHOR_INTERVAL_SECONDS: int = 60
+    LEDGER_ANCHOR_MAX_LEAVES: int = 1024
+
+    # Ledger event stream (GET /events/ledger)
+    EVENT_KEEPALIVE_SECONDS: int = 15
+    EVENT_SUBSCRIBER_QUEUE_SIZE: int = 256  # a subscriber further behind is disconnected
+
+    # Transactional outbox dispatcher, 0 interval disables the background task
+    OUTBOX_DISPATCH_INTERVAL_SECONDS: int = 1
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 5  # doubled after every failed attempt
+    OUTBOX_RETENTION_SECONDS: int = 7 * 24 * 3600  # delivered rows are purged after this
+
+    # Database engine / connection pool
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    SQLITE_WAL: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
     class Config:
         env_file = Path(__file__).resolve().parents[2] / ".env"
 
@@ -0,0 +1,103 @@
+"""
+Process pool for password hashing and verification.
+
+bcrypt is deliberately CPU-expensive. Running it on the event loop stalls
+every other request, and the default threadpool only spreads it across
+threads that contend for the same interpreter. This module runs it in a
+dedicated, size-bounded process pool so login bursts scale across cores.
+
+Backpressure: at most PASSWORD_HASH_MAX_PENDING operations may be in
+flight (running or queued). Beyond that, callers get PasswordPoolBusy
+immediately instead of piling up unbounded work.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many hashing operations are already pending"""
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_stats = {
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+}
+
+
+def _pool_size() -> int:
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=_pool_size())
+        return _executor
+
+
+def _acquire_slot() -> None:
+    with _lock:
+        if _stats["in_flight"] >= settings.PASSWORD_HASH_MAX_PENDING:
+            _stats["rejected"] += 1
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise PasswordPoolBusy("Password hashing queue is full")
+        _stats["in_flight"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+
+def _release_slot() -> None:
+    with _lock:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+
+
+async def run_in_password_pool(fn, *args):
+    """
+    Run a picklable, module-level function in the pool.
+
+    Raises:
+        PasswordPoolBusy: If PASSWORD_HASH_MAX_PENDING operations are pending
+    """
+    _acquire_slot()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _release_slot()
+
+
+def pool_stats() -> dict:
+    """
+    Snapshot of pool load.
+
+    queue_depth counts operations waiting for a free worker.
+    """
+    workers = _pool_size()
+    with _lock:
+        stats = dict(_stats)
+    stats["workers"] = workers
+    stats["max_pending"] = settings.PASSWORD_HASH_MAX_PENDING
+    stats["queue_depth"] = max(0, stats["in_flight"] - workers)
+    return stats
+
+
+def shutdown_pool() -> None:
+    """Stop worker processes (called on application shutdown)"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,98 @@
+"""
+Offline bulk importer for historical purchase orders.
+
+Every file in a directory (or zip archive) becomes a PO owned by the given
+buyer, with an ISSUED ledger entry, exactly as POST /documents/ingest would
+create it. Files are copied into the blob store and hashed in the same pass,
+in a process pool. Rows are inserted in batched transactions.
+
+    python -m app.db.ingest ./history --owner-email buyer@example.com --seller-id 2
+    python -m app.db.ingest history.zip --owner-email buyer@example.com --seller-id 2 --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sqlmodel import SQLModel, Session, select
+
+from app.core.config import settings
+from app.db.migrations import run_migrations
+from app.db.models import User
+from app.db.session import engine
+from app.services.ingest import (
+    archive_members,
+    discard_spooled,
+    insert_documents,
+    spool_archive_member,
+    spool_file,
+    store_files,
+)
+from app.services.storage import get_blob_store
+
+
+def spool_source(source: Path, staging_dir: Path, workers: int) -> list:
+    """Copy and hash every file under `source` in a process pool"""
+    if source.is_dir():
+        tasks = [(spool_file, str(path)) for path in sorted(source.rglob("*")) if path.is_file()]
+    else:
+        tasks = [(spool_archive_member, str(source), name) for name in archive_members(source)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(fn, *args, str(staging_dir), settings.MAX_UPLOAD_BYTES)
+            for fn, *args in tasks
+        ]
+        spooled = []
+        try:
+            for future in futures:
+                spooled.append(future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            discard_spooled(spooled)
+            raise
+    return spooled
+
+
+def ingest(source: Path, owner_email: str, seller_id: int, workers: int, batch_size: int) -> dict:
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+
+    with Session(engine) as session:
+        owner = session.exec(select(User).where(User.email == owner_email)).first()
+        if owner is None or owner.role != "buyer":
+            raise SystemExit(f"No buyer with email {owner_email}")
+        owner_id = owner.id
+
+        started = time.perf_counter()
+        store = get_blob_store()
+        spooled = spool_source(source, store.staging_dir, workers)
+        hashed = time.perf_counter()
+        store_files(store, spooled)
+        created = insert_documents(session, spooled, owner_id, seller_id, batch_size)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "ingested": len(created),
+        "hash_seconds": round(hashed - started, 3),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(len(created) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a directory or zip of PO files")
+    parser.add_argument("source", type=Path, help="Directory or .zip archive")
+    parser.add_argument("--owner-email", required=True, help="Buyer who owns the imported documents")
+    parser.add_argument("--seller-id", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    result = ingest(args.source, args.owner_email, args.seller_id, args.workers, args.batch_size)
+    print(
+        f"Ingested {result['ingested']} documents in {result['seconds']}s "
+        f"({result['documents_per_second']} documents/s, hashing {result['hash_seconds']}s)"
+    )
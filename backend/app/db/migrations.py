@@ -0,0 +1,295 @@
+"""
+Versioned schema migrations.
+
+`SQLModel.metadata.create_all` only creates missing tables; it never adds
+indexes or columns to tables that already exist. Each migration below
+brings an existing database up to what the models in app/db/models.py
+declare, and the applied version is recorded in the `schema_version`
+table so every migration runs exactly once per database.
+
+Migrations must be safe to run against a database freshly created by
+`create_all` (which already has the objects), so they use IF NOT EXISTS
+or inspect the schema before changing it.
+
+Run manually with:
+    python -m app.db.migrations
+"""
+import json
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, List, NamedTuple, Sequence
+
+from sqlalchemy import DateTime, Integer, String, column, inspect, table, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_index(connection: Connection, name: str, table: str, columns: Sequence[str]) -> None:
+    """Create an index unless one with the same name already exists"""
+    connection.execute(text(
+        f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})'
+    ))
+
+
+def _add_column(connection: Connection, table: str, column: str, ddl: str) -> None:
+    """Add a column unless the table already has it"""
+    existing = {col["name"] for col in inspect(connection).get_columns(table)}
+    if column not in existing:
+        connection.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+
+
+def _0001_ledger_access_indexes(connection: Connection) -> None:
+    # LedgerEntry: per-document history, per-actor activity, time ranges
+    _create_index(connection, "ix_ledgerentry_doc_id_created_at", "ledgerentry", ["doc_id", "created_at"])
+    _create_index(connection, "ix_ledgerentry_actor_id_created_at", "ledgerentry", ["actor_id", "created_at"])
+    _create_index(connection, "ix_ledgerentry_created_at", "ledgerentry", ["created_at"])
+    # Document: keyset listing, optionally narrowed by owner or type
+    _create_index(connection, "ix_document_created_at_id", "document", ["created_at", "id"])
+    _create_index(connection, "ix_document_owner_id_created_at", "document", ["owner_id", "created_at"])
+    _create_index(connection, "ix_document_doc_type_created_at", "document", ["doc_type", "created_at"])
+
+
+def _0002_document_current_state(connection: Connection) -> None:
+    _add_column(connection, "document", "last_action", "VARCHAR")
+    _add_column(connection, "document", "last_entry_id", "INTEGER")
+    _add_column(connection, "document", "entry_count", "INTEGER NOT NULL DEFAULT 0")
+    _create_index(connection, "ix_document_last_action_created_at", "document", ["last_action", "created_at"])
+
+    # Backfill from existing history; ids are monotonic, so the highest id
+    # is the latest entry even when timestamps collide.
+    connection.execute(text(
+        "UPDATE document SET "
+        "entry_count = (SELECT COUNT(*) FROM ledgerentry WHERE ledgerentry.doc_id = document.id), "
+        "last_entry_id = (SELECT MAX(id) FROM ledgerentry WHERE ledgerentry.doc_id = document.id)"
+    ))
+    connection.execute(text(
+        "UPDATE document SET last_action = "
+        "(SELECT action FROM ledgerentry WHERE ledgerentry.id = document.last_entry_id)"
+    ))
+
+
+def _0003_document_file_url_index(connection: Connection) -> None:
+    # /files/{filename} resolves a document by its file_url
+    _create_index(connection, "ix_document_file_url", "document", ["file_url"])
+
+
+def _0004_document_hash_index(connection: Connection) -> None:
+    # /files/blob/{hash} and integrity checks look documents up by content hash
+    _create_index(connection, "ix_document_hash", "document", ["hash"])
+
+
+def _0005_ledger_hash_chain(connection: Connection) -> None:
+    from app.services.ledger import GENESIS_HASH, compute_entry_hash
+
+    for spec in ("seq INTEGER", "prev_hash VARCHAR", "chain_prev_hash VARCHAR", "entry_hash VARCHAR"):
+        name, ddl = spec.split(" ", 1)
+        _add_column(connection, "ledgerentry", name, ddl)
+
+    # Chain existing history in insertion order. The table is spelled out
+    # as it is at this version: later migrations add columns the model has.
+    ledger = table(
+        "ledgerentry",
+        column("id", Integer),
+        column("doc_id", Integer),
+        column("actor_id", Integer),
+        column("action", String),
+        column("entry_metadata", String),
+        column("created_at", DateTime),
+        column("seq", Integer),
+        column("prev_hash", String),
+        column("chain_prev_hash", String),
+        column("entry_hash", String),
+    )
+    head_hash, head_seq, document_heads = GENESIS_HASH, 0, {}
+    rows = connection.execute(
+        ledger.select().where(ledger.c.seq.is_(None)).order_by(ledger.c.id)
+    ).all()
+    for row in rows:
+        head_seq += 1
+        entry = SimpleNamespace(**row._mapping)
+        entry.seq = head_seq
+        entry.chain_prev_hash = head_hash
+        entry.prev_hash = document_heads.get(entry.doc_id, GENESIS_HASH)
+        entry.entry_hash = compute_entry_hash(entry)
+        connection.execute(
+            ledger.update().where(ledger.c.id == entry.id).values(
+                seq=entry.seq,
+                prev_hash=entry.prev_hash,
+                chain_prev_hash=entry.chain_prev_hash,
+                entry_hash=entry.entry_hash,
+            )
+        )
+        head_hash = document_heads[entry.doc_id] = entry.entry_hash
+
+    if rows:
+        connection.execute(text("DELETE FROM ledgerhead"))
+        connection.execute(
+            text("INSERT INTO ledgerhead (id, seq, last_hash) VALUES (1, :seq, :hash)"),
+            {"seq": head_seq, "hash": head_hash},
+        )
+
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_ledgerentry_seq ON ledgerentry (seq)"))
+    _create_index(connection, "ix_ledgerentry_doc_id_seq", "ledgerentry", ["doc_id", "seq"])
+
+
+def _0006_blob_integrity_columns(connection: Connection) -> None:
+    _add_column(connection, "storedblob", "verified_at", "TIMESTAMP")
+    _add_column(connection, "storedblob", "integrity_status", "VARCHAR")
+    _add_column(connection, "storedblob", "observed_hash", "VARCHAR")
+    _create_index(connection, "ix_storedblob_integrity_status", "storedblob", ["integrity_status"])
+
+
+def _0007_document_version(connection: Connection) -> None:
+    _add_column(connection, "document", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _0008_document_participants(connection: Connection) -> None:
+    # The table itself comes from create_all; index everyone already
+    # involved: owners, actors and sellers named in upload metadata
+    columns = "(doc_id, user_id, organization_id, role, doc_created_at)"
+    involved = (
+        "SELECT document.id AS doc_id, document.owner_id AS user_id FROM document "
+        "UNION SELECT doc_id, actor_id FROM ledgerentry"
+    )
+    connection.execute(text(
+        f"INSERT INTO documentparticipant {columns} "
+        "SELECT document.id, u.id, u.organization_id, u.role, document.created_at "
+        f"FROM ({involved}) AS involved "
+        "JOIN document ON document.id = involved.doc_id "
+        'JOIN "user" AS u ON u.id = involved.user_id '
+        "WHERE true ON CONFLICT (user_id, doc_id) DO NOTHING"
+    ))
+
+    sellers = []
+    for doc_id, metadata in connection.execute(text(
+        "SELECT doc_id, entry_metadata FROM ledgerentry WHERE entry_metadata IS NOT NULL"
+    )):
+        try:
+            seller_id = json.loads(metadata).get("seller_id")
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(seller_id, int):
+            sellers.append({"doc_id": doc_id, "user_id": seller_id})
+    if sellers:
+        connection.execute(text(
+            f"INSERT INTO documentparticipant {columns} "
+            "SELECT document.id, u.id, u.organization_id, u.role, document.created_at "
+            'FROM document JOIN "user" AS u ON u.id = :user_id '
+            "WHERE document.id = :doc_id ON CONFLICT (user_id, doc_id) DO NOTHING"
+        ), sellers)
+
+
+def _0009_ledger_metadata_columns(connection: Connection) -> None:
+    from app.services.ledger_metadata import metadata_columns
+
+    _add_column(connection, "ledgerentry", "seller_id", "INTEGER")
+    _add_column(connection, "ledgerentry", "amount", "NUMERIC(18, 2)")
+    _add_column(connection, "ledgerentry", "currency", "VARCHAR")
+    _add_column(connection, "ledgerentry", "counterparty", "VARCHAR")
+    _create_index(connection, "ix_ledgerentry_seller_id_created_at", "ledgerentry", ["seller_id", "created_at"])
+    _create_index(connection, "ix_ledgerentry_counterparty_created_at", "ledgerentry", ["counterparty", "created_at"])
+    _create_index(connection, "ix_ledgerentry_currency_amount", "ledgerentry", ["currency", "amount"])
+
+    # Backfill from the JSON text; unparseable or invalid keys stay NULL
+    updates = []
+    for entry_id, metadata in connection.execute(text(
+        "SELECT id, entry_metadata FROM ledgerentry WHERE entry_metadata IS NOT NULL"
+    )):
+        columns = metadata_columns(metadata)
+        if any(value is not None for value in columns.values()):
+            if columns["amount"] is not None:
+                columns["amount"] = str(columns["amount"])
+            updates.append({"entry_id": entry_id, **columns})
+    if updates:
+        connection.execute(text(
+            "UPDATE ledgerentry SET seller_id = :seller_id, amount = :amount, "
+            "currency = :currency, counterparty = :counterparty WHERE id = :entry_id"
+        ), updates)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "ledger and document access-path indexes", _0001_ledger_access_indexes),
+    Migration(2, "materialized document state columns", _0002_document_current_state),
+    Migration(3, "document file_url index", _0003_document_file_url_index),
+    Migration(4, "document hash index", _0004_document_hash_index),
+    Migration(5, "ledger hash chain", _0005_ledger_hash_chain),
+    Migration(6, "blob integrity scrub columns", _0006_blob_integrity_columns),
+    Migration(7, "document version for optimistic concurrency", _0007_document_version),
+    Migration(8, "document participant index", _0008_document_participants),
+    Migration(9, "structured ledger metadata columns", _0009_ledger_metadata_columns),
+]
+
+
+def _ensure_version_table(connection: Connection) -> None:
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def get_schema_version(engine: Engine) -> int:
+    """Return the highest applied migration version (0 if none)"""
+    with engine.begin() as connection:
+        _ensure_version_table(connection)
+        version = connection.execute(
+            text(f"SELECT MAX(version) FROM {SCHEMA_VERSION_TABLE}")
+        ).scalar()
+    return version or 0
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply every migration newer than the database's recorded version.
+
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failure leaves the database at the last
+    fully applied version.
+
+    Returns:
+        Versions applied by this call
+    """
+    current = get_schema_version(engine)
+    applied = []
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                text(
+                    f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.utcnow(),
+                },
+            )
+        applied.append(migration.version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from sqlmodel import SQLModel
+    from app.db import models  # noqa: F401 - registers tables on SQLModel.metadata
+    from app.db.session import engine
+
+    SQLModel.metadata.create_all(engine)
+    versions = run_migrations(engine)
+    print(f"Applied migrations: {versions}" if versions else "Schema is up to date")
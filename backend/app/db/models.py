@@ -1,5 +1,7 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -34,22 +36,57 @@ class User(SQLModel, table=True):
 
 
 class Document(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset listing, optionally narrowed by owner or type
+        Index("ix_document_created_at_id", "created_at", "id"),
+        Index("ix_document_owner_id_created_at", "owner_id", "created_at"),
+        Index("ix_document_doc_type_created_at", "doc_type", "created_at"),
+        Index("ix_document_last_action_created_at", "last_action", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     doc_number: str = Field(index=True)
-    file_url: str
-    hash: str
+    file_url: str = Field(index=True)
+    hash: str = Field(index=True)  # SHA-256 of the file, also its key in the blob store
 
     doc_type: str  # PO, BOL, LOC, INVOICE
 
     owner_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Current ledger state, maintained in the same transaction as each
+    # LedgerEntry insert (see services.documents.append_ledger_entry)
+    last_action: Optional[str] = Field(default=None)
+    last_entry_id: Optional[int] = Field(default=None)
+    entry_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+    # Bumped by every action; actions update the row only if it still holds
+    # the version they read (see services.documents.compare_and_swap_document)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+
     owner: Optional[User] = Relationship(back_populates="documents")
-    ledger_entries: List["LedgerEntry"] = Relationship(back_populates="document")
+    ledger_entries: List["LedgerEntry"] = Relationship(
+        back_populates="document",
+        sa_relationship_kwargs={"order_by": "[LedgerEntry.created_at, LedgerEntry.id]"},
+    )
 
 
 class LedgerEntry(SQLModel, table=True):
+    __table_args__ = (
+        # Document history is always read in time order
+        Index("ix_ledgerentry_doc_id_created_at", "doc_id", "created_at"),
+        Index("ix_ledgerentry_actor_id_created_at", "actor_id", "created_at"),
+        Index("ix_ledgerentry_created_at", "created_at"),
+        # Hash chain: global order, and per-document predecessor lookups
+        Index("ix_ledgerentry_seq", "seq", unique=True),
+        Index("ix_ledgerentry_doc_id_seq", "doc_id", "seq"),
+        # Structured metadata lookups (see services.ledger_metadata)
+        Index("ix_ledgerentry_seller_id_created_at", "seller_id", "created_at"),
+        Index("ix_ledgerentry_counterparty_created_at", "counterparty", "created_at"),
+        Index("ix_ledgerentry_currency_amount", "currency", "amount"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     doc_id: int = Field(foreign_key="document.id")
@@ -59,7 +96,168 @@ class LedgerEntry(SQLModel, table=True):
 
     entry_metadata: Optional[str] = Field(default=None)  # JSON stored as string
 
+    # Typed copies of well-known metadata keys, filled in on write
+    seller_id: Optional[int] = Field(default=None)
+    amount: Optional[Decimal] = Field(default=None, max_digits=18, decimal_places=2)
+    currency: Optional[str] = Field(default=None)
+    counterparty: Optional[str] = Field(default=None)
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Hash chain (see services.ledger): position in the global chain, the
+    # hashes of the previous entry for this document and globally, and the
+    # hash over this entry's content plus both links
+    seq: Optional[int] = Field(default=None)
+    prev_hash: Optional[str] = Field(default=None)
+    chain_prev_hash: Optional[str] = Field(default=None)
+    entry_hash: Optional[str] = Field(default=None)
+
     document: Optional[Document] = Relationship(back_populates="ledger_entries")
     actor: Optional[User] = Relationship(back_populates="ledger_entries")
+
+
+class DocumentParticipant(SQLModel, table=True):
+    """
+    Users involved in a document: its owner, the seller named at upload
+    and everyone who has acted on it. Maintained with every ledger entry
+    (see services.documents.record_participants).
+    """
+
+    __table_args__ = (
+        Index("ix_documentparticipant_user_id_doc_id", "user_id", "doc_id", unique=True),
+        # "My documents" pages in the same (created_at, id) order as the
+        # document listing, straight from this index
+        Index("ix_documentparticipant_user_id_doc_created_at", "user_id", "doc_created_at", "doc_id"),
+        Index("ix_documentparticipant_organization_id_doc_created_at", "organization_id", "doc_created_at", "doc_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    doc_id: int = Field(foreign_key="document.id")
+    user_id: int = Field(foreign_key="user.id")
+    organization_id: Optional[int] = Field(default=None, foreign_key="organization.id")
+    role: str  # the user's role when they became involved
+    doc_created_at: datetime  # copy of Document.created_at for keyset paging
+
+
+class StoredBlob(SQLModel, table=True):
+    """One row per distinct file content in the blob store"""
+
+    hash: str = Field(primary_key=True)  # SHA-256 hex digest
+    size: int
+    ref_count: int = Field(default=0)  # documents referencing this content
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Last integrity scrub (see services.scrubber): ok, mismatch or missing,
+    # and the digest actually read back when it did not match
+    verified_at: Optional[datetime] = Field(default=None)
+    integrity_status: Optional[str] = Field(default=None, index=True)
+    observed_hash: Optional[str] = Field(default=None)
+
+
+class ScrubState(SQLModel, table=True):
+    """Single row holding the integrity scrubber's position in its current pass"""
+
+    id: int = Field(default=1, primary_key=True)
+    cursor: str = Field(default="")  # last StoredBlob.hash checked
+    pass_started_at: Optional[datetime] = Field(default=None)
+    passes_completed: int = Field(default=0)
+
+
+class LedgerHead(SQLModel, table=True):
+    """Single row holding the tip of the global ledger hash chain"""
+
+    id: int = Field(default=1, primary_key=True)
+    seq: int = Field(default=0)
+    last_hash: str
+
+
+class LedgerCheckpoint(SQLModel, table=True):
+    """Single row recording how far the chain has been verified"""
+
+    id: int = Field(default=1, primary_key=True)
+    verified_seq: int = Field(default=0)
+    verified_hash: str
+    verified_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LedgerAnchor(SQLModel, table=True):
+    """Merkle root over a contiguous run of chained ledger entries"""
+
+    __table_args__ = (
+        # Unique start keeps two concurrent anchoring runs from both
+        # claiming the same entries
+        Index("ix_ledgeranchor_start_seq", "start_seq", unique=True),
+        Index("ix_ledgeranchor_end_seq", "end_seq"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    start_seq: int
+    end_seq: int
+    leaf_count: int
+    merkle_root: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    Side effect owed for a committed write, inserted in the same
+    transaction (see services.outbox). Rows stay `pending` until every
+    registered handler has run, then become `done`, or `failed` once
+    OUTBOX_MAX_ATTEMPTS is exhausted.
+    """
+
+    __table_args__ = (
+        # The dispatcher claims due pending rows in id order
+        Index("ix_outboxevent_status_available_at", "status", "available_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str  # e.g. ledger_entry
+    payload: str  # JSON
+    status: str = Field(default="pending")  # pending | done | failed
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    available_at: datetime = Field(default_factory=datetime.utcnow)  # next delivery attempt
+    dispatched_at: Optional[datetime] = Field(default=None)
+
+
+# Analytics rollups (see services.analytics), maintained from the outbox
+
+
+class AnalyticsState(SQLModel, table=True):
+    """Single row: entries up to this id are covered by the last full rebuild"""
+
+    id: int = Field(default=1, primary_key=True)
+    rebuilt_through_entry_id: int = Field(default=0)
+    rebuilt_at: Optional[datetime] = Field(default=None)
+
+
+class DocumentRollupState(SQLModel, table=True):
+    """What the rollups have counted for one document"""
+
+    doc_id: int = Field(primary_key=True)
+    doc_type: Optional[str] = Field(default=None)  # counted in DocTypeRollup
+    issued_at: Optional[datetime] = Field(default=None)
+    paid_at: Optional[datetime] = Field(default=None)  # first PAID only
+
+
+class DocTypeRollup(SQLModel, table=True):
+    doc_type: str = Field(primary_key=True)
+    documents: int = Field(default=0)
+
+
+class ActionDailyRollup(SQLModel, table=True):
+    day: date = Field(primary_key=True)
+    organization_id: int = Field(primary_key=True)  # actor's organization, 0 if none
+    action: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+class CycleTimeDailyRollup(SQLModel, table=True):
+    """Documents first PAID on `day` and the total ISSUED-to-PAID time"""
+
+    day: date = Field(primary_key=True)
+    completed: int = Field(default=0)
+    total_seconds: float = Field(default=0.0)
@@ -1,13 +1,93 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    echo=True, 
-    connect_args={"check_same_thread": False}
+# Async driver used for each sync database backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def build_engine_kwargs(database_url: str) -> dict:
+    """
+    Engine options for the configured database.
+
+    Pool sizing applies to every pooled backend; SQLite additionally needs
+    `check_same_thread` disabled (requests are served from a threadpool) and
+    a busy timeout so writers wait for the lock instead of failing.
+    In-memory SQLite uses a single-connection pool that takes no sizing.
+    """
+    url = make_url(database_url)
+    kwargs = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not in_memory:
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+
+    return kwargs
+
+
+def to_async_url(database_url: str) -> str:
+    """Rewrite a sync DATABASE_URL to the matching async driver"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def configure_sqlite(engine) -> None:
+    """Apply WAL journaling and busy timeout to every new SQLite connection"""
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        if settings.SQLITE_WAL:
+            # WAL lets readers proceed while a writer holds the lock
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+engine = create_engine(settings.DATABASE_URL, **build_engine_kwargs(settings.DATABASE_URL))
+configure_sqlite(engine)
+
+# Used by the request path; the sync engine above serves scripts, the seed
+# and migrations.
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL), **build_engine_kwargs(settings.DATABASE_URL)
 )
+configure_sqlite(async_engine.sync_engine)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    # expire_on_commit=False: expired attributes would need a lazy load,
+    # which async sessions cannot do implicitly
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -1,15 +1,42 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from sqlmodel import SQLModel
 
-from app.api.routes import auth, documents, files
-from app.db.session import engine
+from app.api.routes import analytics, auth, documents, events, files, ledger
+from app.db.session import engine, async_engine
+from app.db.migrations import run_migrations
+from app.core.config import settings
+from app.core.password_pool import shutdown_pool
+from app.services.ledger import anchor_periodically
+from app.services.analytics import update_rollups
+from app.services.outbox import LEDGER_ENTRY_TOPIC, dispatch_periodically, register_handler
+from app.services.scrubber import scrub_periodically
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    register_handler(LEDGER_ENTRY_TOPIC, update_rollups)
+    background = []
+    if settings.LEDGER_ANCHOR_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(anchor_periodically(
+            engine, settings.LEDGER_ANCHOR_INTERVAL_SECONDS, settings.LEDGER_ANCHOR_MAX_LEAVES
+        )))
+    if settings.SCRUB_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(scrub_periodically(engine, settings.SCRUB_INTERVAL_SECONDS)))
+    if settings.OUTBOX_DISPATCH_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(
+            dispatch_periodically(engine, settings.OUTBOX_DISPATCH_INTERVAL_SECONDS)
+        ))
     yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await async_engine.dispose()
+    shutdown_pool()
 
 app = FastAPI(title="Trade Finance Blockchain Explorer", lifespan=lifespan)
 
@@ -20,8 +47,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(auth.router)
 app.include_router(documents.router)
 app.include_router(files.router)
+app.include_router(ledger.router)
+app.include_router(events.router)
+app.include_router(analytics.router)
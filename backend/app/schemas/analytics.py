@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, List, Optional
+
+class ActionsPerDay(BaseModel):
+    day: date
+    action: str
+    count: int
+
+class OrganizationVolume(BaseModel):
+    organization_id: Optional[int] = None  # None: users without an organization
+    name: Optional[str] = None
+    documents_issued: int
+    actions: int
+
+class CycleTime(BaseModel):
+    completed: int
+    average_seconds: Optional[float] = None
+
+class AnalyticsSummaryResponse(BaseModel):
+    documents_by_type: Dict[str, int]
+    actions_per_day: List[ActionsPerDay]
+    organizations: List[OrganizationVolume]
+    issued_to_paid: CycleTime
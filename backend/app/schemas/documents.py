@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import List, Optional
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from app.services.ledger_metadata import normalize_metadata
 
 class DocumentResponse(BaseModel):
     id: int
@@ -10,6 +13,10 @@ class DocumentResponse(BaseModel):
     doc_type: str
     owner_id: int
     created_at: datetime
+
+    last_action: Optional[str] = None
+    entry_count: int = 0
+    version: int = 1
     
     owner_name: Optional[str] = None
     
@@ -23,6 +30,12 @@ class LedgerEntryResponse(BaseModel):
     action: str
     entry_metadata: Optional[str] = None
     created_at: datetime
+
+    # Structured copies of well-known metadata keys
+    seller_id: Optional[int] = None
+    amount: Optional[Decimal] = None
+    currency: Optional[str] = None
+    counterparty: Optional[str] = None
     
     actor_name: Optional[str] = None
 
@@ -35,4 +48,37 @@ class DocumentDetailResponse(DocumentResponse):
 class ActionRequest(BaseModel):
     doc_id: int
     action: str
-    metadata: Optional[str] = None  # JSON string if needed
+    metadata: Optional[str] = None  # JSON object, or its text; see LedgerMetadata for checked keys
+    expected_version: Optional[int] = None  # 409 unless the document is still at this version
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def validate_metadata(cls, value: Any) -> Optional[str]:
+        return normalize_metadata(value)
+
+class BulkActionRequest(BaseModel):
+    actions: List[ActionRequest] = Field(..., min_length=1)
+
+class BulkActionResult(BaseModel):
+    doc_id: int
+    action: str
+    status_code: int  # what POST /documents/action would have answered
+    detail: Optional[str] = None
+    entry: Optional[LedgerEntryResponse] = None
+    doc_type: Optional[str] = None  # document type after this item, if applied
+
+class BulkActionResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkActionResult]
+
+class IngestedDocument(BaseModel):
+    id: int
+    doc_number: str
+    hash: str
+
+class IngestResponse(BaseModel):
+    ingested: int
+    seconds: float
+    documents_per_second: float
+    documents: List[IngestedDocument]
@@ -0,0 +1,249 @@
+"""
+Pre-aggregated explorer metrics.
+
+Dashboard numbers are read from small rollup tables instead of scanning
+LedgerEntry on every request:
+
+- DocTypeRollup: documents per current doc_type
+- ActionDailyRollup: entries per (day, actor's organization, action);
+  actions per day and per-organization volumes are sums over it
+- CycleTimeDailyRollup: documents first PAID per day and their total
+  ISSUED-to-PAID time, for the average
+- DocumentRollupState: per document, what the rollups have counted so far
+  (its type, when it was issued and first paid), so each document is
+  counted once however its events arrive: retried events can be delivered
+  out of order, e.g. PAID before ISSUED
+
+Counters are written as upserts that add to the stored value, and every
+update first locks the AnalyticsState row, which serializes them with each
+other and with a rebuild.
+
+update_rollups is the outbox handler for ledger_entry events. It runs in
+the dispatcher's transaction, so every entry is counted exactly once.
+rebuild_rollups recomputes everything from the ledger. Run it once on a
+database that has entries from before the outbox, or to repair the rollups:
+    python -m app.services.analytics
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import List
+
+from sqlalchemy import case, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, func
+
+from app.db.models import (
+    ActionDailyRollup,
+    AnalyticsState,
+    CycleTimeDailyRollup,
+    Document,
+    DocTypeRollup,
+    DocumentRollupState,
+    LedgerEntry,
+    Organization,
+    User,
+)
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def _entry_rows():
+    return (
+        select(LedgerEntry.id, LedgerEntry.doc_id, LedgerEntry.action, LedgerEntry.created_at, User.organization_id)
+        .join(User, User.id == LedgerEntry.actor_id)
+        .order_by(LedgerEntry.id)
+    )
+
+
+def _insert(session: Session):
+    return pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def _lock_state(session: Session) -> AnalyticsState:
+    # Serializes incremental updates with each other and with a rebuild. The
+    # row is created on first use, so there is always one to lock.
+    session.execute(_insert(session)(AnalyticsState).values(id=1, rebuilt_through_entry_id=0).on_conflict_do_nothing())
+    return session.get(AnalyticsState, 1, with_for_update=True, populate_existing=True)
+
+
+def _add_counts(session: Session, model, keys: List[str], rows: List[dict]) -> None:
+    """Upsert rows, adding their non-key values to any stored ones"""
+    if not rows:
+        return
+    statement = _insert(session)(model).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            column: getattr(model, column) + statement.excluded[column]
+            for column in rows[0] if column not in keys
+        },
+    )
+    session.execute(statement)
+
+
+def _count_cycle(cycle_times: dict, state: DocumentRollupState, sign: int) -> None:
+    if state.issued_at is not None and state.paid_at is not None:
+        cycle = cycle_times[state.paid_at.date()]
+        cycle[0] += sign
+        cycle[1] += sign * (state.paid_at - state.issued_at).total_seconds()
+
+
+def _apply_entries(session: Session, rows) -> None:
+    """Fold entries into the rollups. Does not commit."""
+    doc_ids = {row.doc_id for row in rows}
+    states = {
+        state.doc_id: state
+        for state in session.exec(select(DocumentRollupState).where(DocumentRollupState.doc_id.in_(doc_ids)))
+    }
+    action_counts = defaultdict(int)
+    cycle_times = defaultdict(lambda: [0, 0.0])
+
+    for row in rows:
+        if row.doc_id not in states:
+            states[row.doc_id] = DocumentRollupState(doc_id=row.doc_id)
+        state = states[row.doc_id]
+        action_counts[(row.created_at.date(), row.organization_id or 0, row.action)] += 1
+        if row.action in ("ISSUED", "PAID"):
+            # Keep the earliest of each, whichever order they arrive in, and
+            # move the document's cycle time when either changes
+            field = "issued_at" if row.action == "ISSUED" else "paid_at"
+            counted = getattr(state, field)
+            if counted is None or row.created_at < counted:
+                _count_cycle(cycle_times, state, -1)
+                setattr(state, field, row.created_at)
+                _count_cycle(cycle_times, state, 1)
+
+    # Types are taken from the documents themselves, which converges even
+    # when a batch lags behind later transitions
+    current_types = dict(session.exec(select(Document.id, Document.doc_type).where(Document.id.in_(doc_ids))).all())
+    type_deltas = defaultdict(int)
+    for doc_id, state in states.items():
+        doc_type = current_types.get(doc_id)
+        if doc_type != state.doc_type:
+            for counted_type, delta in ((state.doc_type, -1), (doc_type, 1)):
+                if counted_type is not None:
+                    type_deltas[counted_type] += delta
+            state.doc_type = doc_type
+        session.add(state)
+
+    _add_counts(session, DocTypeRollup, ["doc_type"], [
+        {"doc_type": doc_type, "documents": delta} for doc_type, delta in type_deltas.items() if delta
+    ])
+    _add_counts(session, ActionDailyRollup, ["day", "organization_id", "action"], [
+        {"day": day, "organization_id": organization_id, "action": action, "count": count}
+        for (day, organization_id, action), count in action_counts.items()
+    ])
+    _add_counts(session, CycleTimeDailyRollup, ["day"], [
+        {"day": day, "completed": completed, "total_seconds": seconds}
+        for day, (completed, seconds) in cycle_times.items() if completed or seconds
+    ])
+
+
+def update_rollups(session: Session, payloads: List[dict]) -> None:
+    """Outbox handler for ledger_entry events. Does not commit."""
+    state = _lock_state(session)
+    entry_ids = [p["entry_id"] for p in payloads if p["entry_id"] > state.rebuilt_through_entry_id]
+    if entry_ids:
+        _apply_entries(session, session.exec(_entry_rows().where(LedgerEntry.id.in_(entry_ids))).all())
+
+
+def rebuild_rollups(session: Session, batch_size: int = REBUILD_BATCH_SIZE) -> dict:
+    """
+    Recompute every rollup from the whole ledger (a full scan) in one
+    transaction. Outbox events for entries covered by the rebuild are
+    skipped when they are dispatched.
+
+    Returns:
+        {"entries": int, "rebuilt_through_entry_id": int}
+    """
+    state = _lock_state(session)
+    through = session.exec(select(func.max(LedgerEntry.id))).one() or 0
+    for model in (DocumentRollupState, DocTypeRollup, ActionDailyRollup, CycleTimeDailyRollup):
+        session.execute(delete(model))
+
+    last_id, processed = 0, 0
+    while True:
+        rows = session.exec(
+            _entry_rows().where(LedgerEntry.id > last_id, LedgerEntry.id <= through).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        _apply_entries(session, rows)
+        session.flush()
+        last_id = rows[-1].id
+        processed += len(rows)
+
+    state.rebuilt_through_entry_id = through
+    state.rebuilt_at = datetime.utcnow()
+    session.add(state)
+    session.commit()
+    return {"entries": processed, "rebuilt_through_entry_id": through}
+
+
+def analytics_summary(session: Session, since: date) -> dict:
+    """
+    Explorer metrics from the rollups. Daily figures cover `since` onwards;
+    documents_by_type is the current state.
+
+    Returns:
+        {
+            "documents_by_type": {doc_type: int},
+            "actions_per_day": [{"day", "action", "count"}],
+            "organizations": [{"organization_id", "name", "documents_issued", "actions"}],
+            "issued_to_paid": {"completed": int, "average_seconds": float | None},
+        }
+    """
+    documents_by_type = {
+        row.doc_type: row.documents
+        for row in session.exec(select(DocTypeRollup).where(DocTypeRollup.documents > 0).order_by(DocTypeRollup.doc_type))
+    }
+
+    actions_per_day = [
+        {"day": day, "action": action, "count": count}
+        for day, action, count in session.exec(
+            select(ActionDailyRollup.day, ActionDailyRollup.action, func.sum(ActionDailyRollup.count))
+            .where(ActionDailyRollup.day >= since)
+            .group_by(ActionDailyRollup.day, ActionDailyRollup.action)
+            .order_by(ActionDailyRollup.day, ActionDailyRollup.action)
+        )
+    ]
+
+    issued = case((ActionDailyRollup.action == "ISSUED", ActionDailyRollup.count), else_=0)
+    organizations = [
+        {"organization_id": organization_id or None, "name": name, "documents_issued": documents_issued, "actions": actions}
+        for organization_id, name, documents_issued, actions in session.exec(
+            select(ActionDailyRollup.organization_id, Organization.name, func.sum(issued), func.sum(ActionDailyRollup.count))
+            .outerjoin(Organization, Organization.id == ActionDailyRollup.organization_id)
+            .where(ActionDailyRollup.day >= since)
+            .group_by(ActionDailyRollup.organization_id, Organization.name)
+            .order_by(func.sum(ActionDailyRollup.count).desc())
+        )
+    ]
+
+    completed, total_seconds = session.exec(
+        select(func.sum(CycleTimeDailyRollup.completed), func.sum(CycleTimeDailyRollup.total_seconds))
+        .where(CycleTimeDailyRollup.day >= since)
+    ).one()
+
+    return {
+        "documents_by_type": documents_by_type,
+        "actions_per_day": actions_per_day,
+        "organizations": organizations,
+        "issued_to_paid": {
+            "completed": completed or 0,
+            "average_seconds": total_seconds / completed if completed else None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    from sqlmodel import SQLModel
+
+    from app.db.migrations import run_migrations
+    from app.db.session import engine
+
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    with Session(engine) as session:
+        print(rebuild_rollups(session))
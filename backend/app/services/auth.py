@@ -1,5 +1,12 @@
-from sqlmodel import Session, select
-
+from sqlmodel import select
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import CacheBackend, TTLCache
+from app.core.config import settings
+from app.core.password_pool import run_in_password_pool
 from app.db.models import User, Organization
 import logging
 
@@ -7,8 +14,14 @@ logger = logging.getLogger(__name__)
 
 import bcrypt
 
+# Decoded access tokens and user records for the auth dependency
+_auth_cache: CacheBackend = TTLCache(max_entries=settings.AUTH_CACHE_MAX_ENTRIES)
+
+# Columns needed by request handlers; the password hash never enters the cache
+_CACHED_USER_FIELDS = ("id", "name", "email", "role", "is_active", "organization_id")
+
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash password using bcrypt.
     
@@ -17,6 +30,7 @@ def hash_password(password: str) -> str:
     
     Args:
         password: Plain text password from signup form
+        rounds: bcrypt work factor (defaults to settings.BCRYPT_ROUNDS)
         
     Returns:
         Hashed password string
@@ -24,7 +38,7 @@ def hash_password(password: str) -> str:
     # bcrypt.hashpw requires bytes for both password and salt
     # We return a string for storage compatibility
     cwd = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(cwd, salt)
     return hashed.decode('utf-8')
 
@@ -53,11 +67,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def authenticate_user(session: Session, email: str, password: str) -> dict:
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash uses a different work factor than configured.
+
+    bcrypt hashes look like `$2b$<cost>$<salt+digest>`.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the password process pool"""
+    return await run_in_password_pool(hash_password, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the password process pool"""
+    return await run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def authenticate_user(session: AsyncSession, email: str, password: str) -> dict:
     """
     Authenticate user by email and password.
     
     Returns detailed error reason for Swagger clarity.
+    bcrypt runs in the password process pool so it does not block the event
+    loop. Hashes made with an outdated work factor are upgraded on success.
     
     Args:
         session: Database session
@@ -72,18 +110,25 @@ def authenticate_user(session: Session, email: str, password: str) -> dict:
         }
     """
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
 
     if not user:
         return {"success": False, "user": None, "reason": "user_not_found"}
     
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return {"success": False, "user": None, "reason": "invalid_password"}
 
+    if needs_rehash(user.hashed_password):
+        # Only now do we hold the plain password needed to re-hash
+        user.hashed_password = await hash_password_async(password)
+        session.add(user)
+        await session.commit()  # invalidates the cached user via _on_user_change
+        logger.info(f"Re-hashed password for {email} at cost {settings.BCRYPT_ROUNDS}")
+
     return {"success": True, "user": user, "reason": None}
 
 
-def create_user(session, data):
+async def create_user(session: AsyncSession, data):
     """
     Create a new user with hashed password.
     
@@ -98,25 +143,25 @@ def create_user(session, data):
         ValueError: If user already exists or validation fails
     """
     # Check if user already exists
-    existing_user = session.exec(
+    existing_user = (await session.exec(
         select(User).where(User.email == data.email)
-    ).first()
+    )).first()
     if existing_user:
         raise ValueError("User already exists")
 
     # Get or create organization
-    organization = session.exec(
+    organization = (await session.exec(
         select(Organization).where(Organization.name == data.org)
-    ).first()
+    )).first()
 
     if not organization:
         organization = Organization(name=data.org)
         session.add(organization)
-        session.commit()
-        session.refresh(organization)
+        await session.commit()
+        await session.refresh(organization)
 
     # Hash password ONCE during signup
-    hashed_password = hash_password(data.password)
+    hashed_password = await hash_password_async(data.password)
 
     user = User(
         name=data.name,
@@ -127,7 +172,62 @@ def create_user(session, data):
     )
 
     session.add(user)
-    session.commit()
+    await session.commit()
 
     logger.info(f"User created: {data.email} with role {data.role}")
     return user
+
+
+def set_auth_cache_backend(backend: CacheBackend) -> None:
+    """Replace the in-process auth cache, e.g. with a shared cache"""
+    global _auth_cache
+    _auth_cache = backend
+
+
+def get_cached_token_subject(token: str) -> Optional[str]:
+    """Return the `sub` of a previously decoded, still valid access token"""
+    return _auth_cache.get(f"token:{token}")
+
+
+def cache_token_subject(token: str, subject: str, expires_at: Optional[int]) -> None:
+    """Remember a decoded token until the cache TTL or the token expiry, whichever is first"""
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if expires_at is not None:
+        ttl = min(ttl, expires_at - time.time())
+    _auth_cache.set(f"token:{token}", subject, ttl)
+
+
+async def get_user_cached(session: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Load a user by ID, served from the auth cache when possible.
+
+    Cache hits return a detached User built from cached columns (without
+    the password hash); it must not be added to a session.
+    """
+    data = _auth_cache.get(f"user:{user_id}")
+    if data is not None:
+        return User(**data)
+
+    user = (await session.exec(select(User).where(User.id == user_id))).first()
+    if user:
+        data = {field: getattr(user, field) for field in _CACHED_USER_FIELDS}
+        _auth_cache.set(f"user:{user_id}", data, settings.AUTH_CACHE_TTL_SECONDS)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's cached record; call after any change to the user"""
+    _auth_cache.delete(f"user:{user_id}")
+
+
+def clear_auth_cache() -> None:
+    """Drop every cached token and user"""
+    _auth_cache.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_change(mapper, connection, target):
+    # Covers every ORM write (updates, deactivation, deletes). With an
+    # in-process backend other workers keep their copy until the TTL expires.
+    invalidate_user(target.id)
@@ -1,8 +1,27 @@
+import base64
 import hashlib
-import json
-from typing import Optional, Dict, List
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Optional, Dict, List, Tuple
 from sqlmodel import Session, select
-from app.db.models import Document, LedgerEntry, User
+from sqlalchemy import and_, bindparam, insert, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload
+from app.db.models import Document, DocumentParticipant, LedgerEntry, User
+from app.services.ledger import chain_entry, chain_entries
+from app.services.ledger_metadata import new_ledger_entry, normalize_metadata
+from app.services.outbox import enqueue_ledger_entries
+from app.services.policy import get_policy
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
 
 
 def compute_file_hash(file_content: bytes) -> str:
@@ -10,6 +29,39 @@ def compute_file_hash(file_content: bytes) -> str:
     return hashlib.sha256(file_content).hexdigest()
 
 
+def spool_upload(source: BinaryIO, directory: Path, max_bytes: int) -> Tuple[Path, str, int]:
+    """
+    Stream an upload into a temporary file, hashing it on the way.
+
+    The content is read exactly once: each chunk updates the SHA-256 and
+    is written to disk. The caller hands the returned file to the blob
+    store, which moves it into place. Blocking - call from a worker thread.
+
+    Returns:
+        (temporary file path, SHA-256 hex digest, size in bytes)
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_bytes have been read;
+            the partial temporary file is removed
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds maximum upload size of {max_bytes} bytes")
+                digest.update(chunk)
+                tmp.write(chunk)
+        os.chmod(tmp_name, 0o644)  # mkstemp creates owner-only files
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return Path(tmp_name), digest.hexdigest(), size
+
+
 def create_document(
     session: Session,
     doc_number: str,
@@ -32,6 +84,219 @@ def create_document(
     return document
 
 
+def participant_pairs(entries: List[LedgerEntry]) -> List[Tuple[int, int]]:
+    """
+    (doc_id, user_id) for everyone a batch of entries involves: each actor,
+    plus the seller an upload names in its metadata.
+    """
+    pairs = []
+    for entry in entries:
+        pairs.append((entry.doc_id, entry.actor_id))
+        if entry.seller_id is not None:
+            pairs.append((entry.doc_id, entry.seller_id))
+    return pairs
+
+
+def record_participants(session: Session, pairs: List[Tuple[int, int]]) -> None:
+    """
+    Add (doc_id, user_id) pairs to the participant index, taking the role
+    and organization from the user row. Pairs already present, and users
+    that do not exist, are skipped. Does not commit.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return
+    documents, users = Document.__table__, User.__table__
+    source = (
+        select(documents.c.id, users.c.id, users.c.organization_id, users.c.role, documents.c.created_at)
+        .select_from(documents.join(users, users.c.id == bindparam("p_user_id")))
+        .where(documents.c.id == bindparam("p_doc_id"))
+    )
+    dialect_insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = (
+        dialect_insert(DocumentParticipant.__table__)
+        .from_select(["doc_id", "user_id", "organization_id", "role", "doc_created_at"], source)
+        .on_conflict_do_nothing(index_elements=["user_id", "doc_id"])
+    )
+    session.connection().execute(statement, [{"p_doc_id": doc_id, "p_user_id": user_id} for doc_id, user_id in pairs])
+
+
+def append_ledger_entry(
+    session: Session,
+    document: Document,
+    actor_id: int,
+    action: str,
+    entry_metadata: Optional[str] = None,
+) -> LedgerEntry:
+    """
+    Add a ledger entry, link it into the hash chain and update the
+    document's materialized state.
+
+    Does not commit: the entry, its outbox event, the chain head and the
+    document's last_action, last_entry_id and entry_count land in
+    whichever transaction the caller commits, so they can never disagree.
+    """
+    entry = new_ledger_entry(document.id, actor_id, action, entry_metadata)
+    chain_entry(session, entry)
+    session.add(entry)
+    session.flush()
+    record_participants(session, participant_pairs([entry]))
+    enqueue_ledger_entries(session, [entry])
+
+    document.last_action = action
+    document.last_entry_id = entry.id
+    # Incremented in SQL so concurrent writers cannot lose an update
+    document.entry_count = Document.entry_count + 1
+    session.add(document)
+    return entry
+
+
+def compare_and_swap_document(session: Session, doc_id: int, expected_version: int, **values) -> bool:
+    """
+    Update a document only if it is still at `expected_version`, bumping
+    the version. Does not commit.
+
+    Returns:
+        False if another transaction changed the document first
+    """
+    statement = (
+        update(Document)
+        .where(Document.id == doc_id, Document.version == expected_version)
+        .values(version=Document.version + 1, **values)
+    )
+    return session.execute(statement).rowcount == 1
+
+
+def insert_chained_entries(session: Session, entries: List[LedgerEntry]) -> Dict[int, LedgerEntry]:
+    """
+    Chain new entries and insert them with one executemany INSERT (the ORM
+    would insert row by row to collect ids), then read them back by chain
+    position and queue their outbox events. Does not commit.
+
+    Returns:
+        The persisted entries keyed by seq
+    """
+    chain_entries(session, entries)
+    session.execute(insert(LedgerEntry), [entry.model_dump(exclude={"id"}) for entry in entries])
+    record_participants(session, participant_pairs(entries))
+    stored = {
+        entry.seq: entry
+        for entry in session.exec(
+            select(LedgerEntry).where(LedgerEntry.seq >= entries[0].seq, LedgerEntry.seq <= entries[-1].seq)
+        )
+    }
+    enqueue_ledger_entries(session, [stored[entry.seq] for entry in entries])
+    return stored
+
+
+class ConcurrentUpdateError(Exception):
+    """A document changed between being read and being updated"""
+
+
+def apply_actions(session: Session, actor_id: int, role: str, requests: List) -> List[dict]:
+    """
+    Validate and apply a batch of actions (objects with doc_id, action,
+    metadata and expected_version, as in ActionRequest).
+
+    All referenced documents are loaded in one query and every item is
+    checked against the policy in request order, so several actions on the
+    same document see each other's transitions. Accepted items become
+    LedgerEntry rows chained and inserted in one batch; each touched
+    document is then compare-and-swapped once. Does not commit.
+
+    Returns:
+        One result per request, in order:
+        {"doc_id", "action", "status_code": 200 | 403 | 404 | 409,
+         "detail": str | None, "entry": LedgerEntry | None,
+         "doc_type": str | None}    # document type after an applied item
+
+    Raises:
+        ConcurrentUpdateError: a document changed since it was read; the
+            caller should roll back and retry the whole batch
+    """
+    doc_ids = {request.doc_id for request in requests}
+    documents = {
+        doc.id: doc
+        for doc in session.exec(
+            select(Document).where(Document.id.in_(doc_ids)).execution_options(populate_existing=True)
+        )
+    }
+    policy = get_policy()
+
+    results, entries = [], []
+    pending: Dict[int, dict] = {}  # doc_id -> {"doc_type", "entries"}
+    for request in requests:
+        result = {
+            "doc_id": request.doc_id, "action": request.action, "status_code": 200,
+            "detail": None, "entry": None, "doc_type": None,
+        }
+        results.append(result)
+
+        doc = documents.get(request.doc_id)
+        if doc is None:
+            result.update(status_code=404, detail="Document not found")
+            continue
+        if request.expected_version is not None and doc.version != request.expected_version:
+            result.update(status_code=409, detail=f"Document is at version {doc.version}, not {request.expected_version}")
+            continue
+
+        state = pending.setdefault(doc.id, {"doc_type": doc.doc_type, "entries": []})
+        decision = policy.decide(role, state["doc_type"], request.action)
+        if not decision.allowed:
+            result.update(
+                status_code=403,
+                detail=f"Action '{request.action}' not allowed for role '{role}' on document '{state['doc_type']}'",
+            )
+            continue
+
+        entry = new_ledger_entry(doc.id, actor_id, request.action, request.metadata)
+        state["doc_type"] = decision.next_doc_type
+        state["entries"].append(entry)
+        entries.append(entry)
+        result.update(entry=entry, doc_type=decision.next_doc_type)
+
+    if not entries:
+        return results
+
+    stored = insert_chained_entries(session, entries)
+    for result in results:
+        if result["entry"] is not None:
+            result["entry"] = stored[result["entry"].seq]
+
+    table = Document.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.version == bindparam("b_version"))
+        .values(
+            doc_type=bindparam("b_doc_type"),
+            last_action=bindparam("b_last_action"),
+            last_entry_id=bindparam("b_last_entry_id"),
+            entry_count=table.c.entry_count + bindparam("b_added"),
+            version=table.c.version + 1,
+        )
+    )
+    params = [
+        {
+            "b_id": doc_id,
+            "b_version": documents[doc_id].version,
+            "b_doc_type": state["doc_type"],
+            "b_last_action": state["entries"][-1].action,
+            "b_last_entry_id": stored[state["entries"][-1].seq].id,
+            "b_added": len(state["entries"]),
+        }
+        for doc_id, state in pending.items()
+        if state["entries"]
+    ]
+    connection = session.connection()
+    if connection.dialect.supports_sane_multi_rowcount:
+        updated = connection.execute(statement, params).rowcount
+    else:
+        updated = sum(connection.execute(statement, row).rowcount for row in params)
+    if updated != len(params):
+        raise ConcurrentUpdateError(f"{len(params) - updated} document(s) changed during the batch")
+    return results
+
+
 def create_ledger_entry(
     session: Session,
     doc_id: int,
@@ -40,73 +305,152 @@ def create_ledger_entry(
     metadata: Optional[Dict] = None,
 ) -> LedgerEntry:
     """Create a new ledger entry"""
-    metadata_str = json.dumps(metadata) if metadata else None
-    entry = LedgerEntry(
-        doc_id=doc_id,
-        actor_id=actor_id,
-        action=action,
-        entry_metadata=metadata_str,
-    )
-    session.add(entry)
+    metadata_str = normalize_metadata(metadata)
+    document = session.get(Document, doc_id)
+    entry = append_ledger_entry(session, document, actor_id, action, metadata_str)
     session.commit()
     session.refresh(entry)
     return entry
 
 
-def get_document_with_ledger(session: Session, doc_id: int) -> Optional[Document]:
-    """Get document with all its ledger entries"""
+def get_document_with_ledger(
+    session: Session, doc_id: int, populate_existing: bool = False
+) -> Optional[Document]:
+    """
+    Get document with owner, ledger entries and entry actors loaded.
+
+    Entries come back in (created_at, id) order from a single extra query,
+    regardless of how many entries the document has. Pass
+    populate_existing=True to overwrite a copy already in the session.
+    """
     statement = (
         select(Document)
+        .options(
+            joinedload(Document.owner),
+            selectinload(Document.ledger_entries).joinedload(LedgerEntry.actor),
+        )
         .where(Document.id == doc_id)
+        .execution_options(populate_existing=populate_existing)
     )
     return session.exec(statement).first()
 
 
 def get_user_documents(session: Session, user_id: int) -> List[Document]:
-    """Get all documents for a user"""
-    statement = select(Document).where(Document.owner_id == user_id)
+    """Get all documents for a user, with owners loaded in the same query"""
+    statement = (
+        select(Document)
+        .options(joinedload(Document.owner))
+        .where(Document.owner_id == user_id)
+    )
     return session.exec(statement).all()
 
 
-# Access control mapping: role -> document_type -> allowed_actions
-ACCESS_MAPPING = {
-    "buyer": {
-        "BOL": ["RECEIVED"],
-    },
-    "seller": {
-        "BOL": ["SHIPPED"],
-        "PO": ["ISSUE_BOL"],
-        "BOL": ["ISSUE_INVOICE"],
-    },
-    "auditor": {
-        "PO": ["VERIFY"],
-        "LOC": ["VERIFY"],
-    },
-    "bank": {
-        "INVOICE": ["PAID"],
-        "LOC": ["ISSUE_LOC"],
-    },
-}
+def encode_cursor(created_at: datetime, doc_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{doc_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
 
 
-def validate_action(user_role: str, doc_type: str, action: str) -> bool:
-    """Validate if user can perform this action on document"""
-    if user_role not in ACCESS_MAPPING:
-        return False
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, doc_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(doc_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_documents_page(
+    session: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    doc_type: Optional[str] = None,
+    last_action: Optional[str] = None,
+    doc_number_prefix: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    participant_id: Optional[int] = None,
+) -> Tuple[List[Document], Optional[str]]:
+    """
+    Get one page of documents, newest first, using keyset pagination.
+
+    Pages are ordered by (created_at, id) descending and continue strictly
+    after the cursor position, so the cost of a page does not depend on how
+    deep into the listing it is.
+
+    With participant_id, only documents that user is involved in are
+    listed; the page is read in order from the DocumentParticipant index
+    instead of scanning documents.
+
+    Returns:
+        (documents, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    statement = select(Document).options(joinedload(Document.owner))
+    sort_created_at, sort_id = Document.created_at, Document.id
+
+    if participant_id is not None:
+        statement = statement.join(DocumentParticipant, DocumentParticipant.doc_id == Document.id).where(
+            DocumentParticipant.user_id == participant_id
+        )
+        sort_created_at, sort_id = DocumentParticipant.doc_created_at, DocumentParticipant.doc_id
+    if owner_id is not None:
+        statement = statement.where(Document.owner_id == owner_id)
+    if doc_type:
+        statement = statement.where(Document.doc_type == doc_type)
+    if last_action:
+        statement = statement.where(Document.last_action == last_action)
+    if doc_number_prefix:
+        statement = statement.where(
+            Document.doc_number.startswith(doc_number_prefix, autoescape=True)
+        )
+    if created_from:
+        statement = statement.where(Document.created_at >= created_from)
+    if created_to:
+        statement = statement.where(Document.created_at < created_to)
 
-    role_perms = ACCESS_MAPPING[user_role]
-    if doc_type not in role_perms:
-        return False
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        statement = statement.where(
+            or_(
+                sort_created_at < cursor_created_at,
+                and_(
+                    sort_created_at == cursor_created_at,
+                    sort_id < cursor_id,
+                ),
+            )
+        )
 
-    return action in role_perms[doc_type]
+    # Fetch one extra row to know whether another page exists
+    statement = statement.order_by(
+        sort_created_at.desc(), sort_id.desc()
+    ).limit(limit + 1)
+    documents = list(session.exec(statement).all())
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return documents, next_cursor
+
+
+def validate_action(user_role: str, doc_type: str, action: str) -> bool:
+    """Validate if user can perform this action on document"""
+    return get_policy().decide(user_role, doc_type, action).allowed
 
 
 def get_last_ledger_state(session: Session, doc_id: int) -> Optional[str]:
-    """Get the last action performed on a document"""
-    statement = (
-        select(LedgerEntry)
-        .where(LedgerEntry.doc_id == doc_id)
-        .order_by(LedgerEntry.created_at.desc())
-    )
-    last_entry = session.exec(statement).first()
-    return last_entry.action if last_entry else None
+    """Get the last action performed on a document (a primary key read)"""
+    statement = select(Document.last_action).where(Document.id == doc_id)
+    return session.exec(statement).first()
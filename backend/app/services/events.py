@@ -0,0 +1,177 @@
+"""
+Ledger event stream.
+
+Each ledger entry is published as an event once its transaction commits,
+so clients can follow the ledger over GET /events/ledger (Server-Sent
+Events) instead of re-fetching the document endpoints.
+
+Brokers implement EventBroker:
+- InProcessBroker: fans events out to subscribers in this process. With
+  several workers, each only sees its own writes; install a broker backed
+  by shared pub/sub (Redis, Postgres LISTEN/NOTIFY) with set_event_broker.
+
+Every subscriber has a bounded queue. One that falls further behind than
+EVENT_SUBSCRIBER_QUEUE_SIZE events is dropped rather than slowing down
+publishers; its stream ends and the client reconnects and re-fetches.
+"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from app.core.config import settings
+from app.db.models import Document, LedgerEntry
+
+logger = logging.getLogger(__name__)
+
+EventFilter = Callable[[dict], bool]
+
+
+class SubscriberOverflowError(Exception):
+    """A subscriber's queue filled up and it was dropped"""
+
+
+def ledger_event(entry: LedgerEntry, document: Document, actor_role: str, doc_type: Optional[str] = None) -> dict:
+    """
+    Event payload for a committed entry. `doc_type` is the document's type
+    after the entry, if the entry changed it.
+    """
+    return {
+        "entry_id": entry.id,
+        "seq": entry.seq,
+        "doc_id": entry.doc_id,
+        "doc_number": document.doc_number,
+        "doc_type": doc_type or document.doc_type,
+        "owner_id": document.owner_id,
+        "action": entry.action,
+        "actor_id": entry.actor_id,
+        "actor_role": actor_role,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+def event_filter(user_id: int, role: str, doc_id: Optional[int] = None) -> EventFilter:
+    """
+    Events a user may receive: the same documents GET /documents/ shows
+    them (buyers only their own), optionally narrowed to one document.
+    """
+    def accepts(event: dict) -> bool:
+        if role == "buyer" and event["owner_id"] != user_id:
+            return False
+        return doc_id is None or event["doc_id"] == doc_id
+    return accepts
+
+
+class Subscription:
+    def __init__(self, accepts: EventFilter, max_queued: int):
+        self.accepts = accepts
+        self.overflowed = False
+        self._queue: asyncio.Queue = asyncio.Queue(max_queued)
+
+    def offer(self, event: dict) -> bool:
+        """Queue an event without blocking; False once the subscriber has overflowed"""
+        if self.overflowed:
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+        return not self.overflowed
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Next event, or None if none arrives within `timeout` seconds.
+
+        Raises:
+            SubscriberOverflowError: Events were dropped for this subscriber
+        """
+        if self.overflowed:
+            raise SubscriberOverflowError("Subscriber fell too far behind")
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker(ABC):
+    @abstractmethod
+    async def publish(self, events: Iterable[dict]) -> None:
+        """Deliver committed events to every matching subscriber"""
+
+    @abstractmethod
+    def subscribe(self, accepts: EventFilter) -> Subscription:
+        """Start receiving the events `accepts` returns True for"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering to a subscription"""
+
+
+class InProcessBroker(EventBroker):
+    def __init__(self, max_queued: Optional[int] = None):
+        self.max_queued = max_queued or settings.EVENT_SUBSCRIBER_QUEUE_SIZE
+        self._subscriptions = set()
+
+    async def publish(self, events: Iterable[dict]) -> None:
+        for event in events:
+            for subscription in list(self._subscriptions):
+                if subscription.accepts(event) and not subscription.offer(event):
+                    self._subscriptions.discard(subscription)
+
+    def subscribe(self, accepts: EventFilter) -> Subscription:
+        subscription = Subscription(accepts, self.max_queued)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+
+_event_broker: Optional[EventBroker] = None
+
+
+def get_event_broker() -> EventBroker:
+    global _event_broker
+    if _event_broker is None:
+        _event_broker = InProcessBroker()
+    return _event_broker
+
+
+def set_event_broker(broker: EventBroker) -> None:
+    """Install a different broker (e.g. one shared between workers)"""
+    global _event_broker
+    _event_broker = broker
+
+
+async def publish_events(events: Iterable[dict]) -> None:
+    """
+    Publish through the installed broker. Failures are logged, not raised:
+    the entries are already committed and the request has succeeded.
+    """
+    try:
+        await get_event_broker().publish(events)
+    except Exception:
+        logger.exception("Publishing ledger events failed")
+
+
+async def sse_stream(subscription: Subscription, keepalive_seconds: float) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a subscription: one `ledger_entry` event per
+    entry (id = chain position), and a comment line when idle so proxies
+    keep the connection open. Ends if the subscriber overflows.
+    """
+    yield ": connected\n\n"
+    while True:
+        try:
+            event = await subscription.get(keepalive_seconds)
+        except SubscriberOverflowError:
+            yield "event: overflow\ndata: {}\n\n"
+            return
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            yield f"id: {event['seq']}\nevent: ledger_entry\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,158 @@
+"""
+Bulk ingestion of purchase orders.
+
+Used by POST /documents/ingest and the offline importer (app/db/ingest.py).
+Ingestion runs in three steps:
+
+1. Spool: each file is streamed into the blob store's staging directory
+   and hashed in the same pass (spool_upload). The importer runs this
+   step in a process pool.
+2. Store: spooled files are handed to the blob store. Identical content
+   is kept once.
+3. Insert: Document rows and their ISSUED LedgerEntry rows are written in
+   batches. Each batch is one transaction, so a failure part way keeps
+   every earlier batch.
+"""
+import json
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple
+
+from sqlalchemy import bindparam, update
+from sqlmodel import Session
+
+from app.db.models import Document
+from app.services.documents import insert_chained_entries, spool_upload
+from app.services.ledger_metadata import new_ledger_entry
+from app.services.storage import BlobStore, add_blob_reference
+
+
+class IngestFile(NamedTuple):
+    path: Path  # spooled copy in the staging directory
+    digest: str
+    size: int
+    filename: str
+
+    @property
+    def doc_number(self) -> str:
+        return Path(self.filename).stem
+
+
+class IngestError(ValueError):
+    """Raised for archives that cannot be ingested"""
+
+
+class TooManyFilesError(IngestError):
+    """Raised when an archive holds more files than allowed"""
+
+
+def spool_file(source: str, staging_dir: str, max_bytes: int) -> IngestFile:
+    """Spool and hash one file from disk (runs in a worker process)"""
+    with open(source, "rb") as f:
+        path, digest, size = spool_upload(f, Path(staging_dir), max_bytes)
+    return IngestFile(path, digest, size, Path(source).name)
+
+
+def spool_archive_member(archive: str, name: str, staging_dir: str, max_bytes: int) -> IngestFile:
+    """Spool and hash one member of a zip file on disk (runs in a worker process)"""
+    with zipfile.ZipFile(archive) as zf, zf.open(name) as f:
+        path, digest, size = spool_upload(f, Path(staging_dir), max_bytes)
+    return IngestFile(path, digest, size, Path(name).name)
+
+
+def archive_members(archive) -> List[str]:
+    """Names of the regular files in a zip archive (a path or file object)"""
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            return [info.filename for info in zf.infolist() if not info.is_dir()]
+    except zipfile.BadZipFile as e:
+        raise IngestError(f"Not a valid zip archive: {e}") from None
+
+
+def spool_archive(source: BinaryIO, staging_dir: Path, max_bytes: int, max_files: int) -> List[IngestFile]:
+    """
+    Spool and hash every member of an uploaded zip archive. Blocking - call
+    from a worker thread.
+
+    Raises:
+        IngestError: Invalid archive
+        TooManyFilesError: More than max_files members
+        UploadTooLargeError: A member exceeds max_bytes
+    """
+    names = archive_members(source)
+    if len(names) > max_files:
+        raise TooManyFilesError(f"Archive holds {len(names)} files, at most {max_files} allowed")
+
+    spooled = []
+    try:
+        with zipfile.ZipFile(source) as zf:
+            for name in names:
+                with zf.open(name) as member:
+                    path, digest, size = spool_upload(member, staging_dir, max_bytes)
+                spooled.append(IngestFile(path, digest, size, Path(name).name))
+    except BaseException:
+        discard_spooled(spooled)
+        raise
+    return spooled
+
+
+def discard_spooled(files: List[IngestFile]) -> None:
+    for file in files:
+        file.path.unlink(missing_ok=True)
+
+
+def store_files(store: BlobStore, files: List[IngestFile]) -> None:
+    """Move spooled files into the blob store. Blocking - call from a worker thread."""
+    for file in files:
+        store.put_file(file.digest, file.path)
+
+
+def insert_documents(
+    session: Session,
+    files: List[IngestFile],
+    owner_id: int,
+    seller_id: int,
+    batch_size: int = 500,
+) -> List[dict]:
+    """
+    Create a PO Document with an ISSUED ledger entry for every stored
+    file, committing once per batch of `batch_size` documents.
+
+    Returns:
+        [{"id", "doc_number", "hash"}, ...] in input order
+    """
+    metadata = json.dumps({"seller_id": seller_id})
+    created = []
+    for start in range(0, len(files), batch_size):
+        batch = files[start:start + batch_size]
+        documents = [
+            Document(
+                doc_number=file.doc_number,
+                file_url=f"{file.doc_number}_{file.filename}",
+                hash=file.digest,
+                doc_type="PO",
+                owner_id=owner_id,
+                last_action="ISSUED",
+                entry_count=1,
+            )
+            for file in batch
+        ]
+        session.add_all(documents)
+        session.flush()
+
+        entries = [
+            new_ledger_entry(document.id, owner_id, "ISSUED", metadata)
+            for document in documents
+        ]
+        stored = insert_chained_entries(session, entries)
+        table = Document.__table__
+        session.connection().execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(last_entry_id=bindparam("b_entry_id")),
+            [{"b_id": entry.doc_id, "b_entry_id": stored[entry.seq].id} for entry in entries],
+        )
+        for file in batch:
+            add_blob_reference(session, file.digest, file.size)
+
+        created.extend({"id": d.id, "doc_number": d.doc_number, "hash": d.hash} for d in documents)
+        session.commit()
+    return created
@@ -0,0 +1,349 @@
+"""
+Hash chain over ledger entries.
+
+Every LedgerEntry is linked twice:
+- prev_hash: entry_hash of the previous entry for the same document
+- chain_prev_hash: entry_hash of the previous entry in the whole ledger
+  (global order is `seq`, handed out from the single LedgerHead row)
+
+entry_hash covers the entry's content and both links, so changing,
+removing or inserting any entry breaks every later link. Appends lock
+LedgerHead before reading it, which serializes chain extension across
+workers: a row lock on PostgreSQL, and on SQLite (which ignores FOR
+UPDATE) a write to the row, since SQLite only serializes transactions from
+their first write and a head read before that could go stale.
+
+verify_ledger walks the chain from the last checkpoint, so repeated runs
+only process entries added since.
+
+Chained entries are also batched into Merkle trees (LedgerAnchor rows
+store each root), so a single entry can be proven part of the ledger with
+a proof of O(log n) hashes instead of re-walking the chain.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func
+from starlette.concurrency import run_in_threadpool
+
+from app.db.models import Document, LedgerAnchor, LedgerCheckpoint, LedgerEntry, LedgerHead
+from app.services.merkle import leaf_hash, merkle_proof, merkle_root
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+
+
+def compute_entry_hash(entry) -> str:
+    """SHA-256 over an entry's canonical JSON content and chain links"""
+    payload = {
+        "seq": entry.seq,
+        "doc_id": entry.doc_id,
+        "actor_id": entry.actor_id,
+        "action": entry.action,
+        "entry_metadata": entry.entry_metadata,
+        "created_at": entry.created_at.isoformat(),
+        "prev_hash": entry.prev_hash,
+        "chain_prev_hash": entry.chain_prev_hash,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _previous_document_hash(session: Session, doc_id: int, before_seq: Optional[int] = None) -> str:
+    statement = (
+        select(LedgerEntry.entry_hash)
+        .where(LedgerEntry.doc_id == doc_id, LedgerEntry.seq.is_not(None))
+        .order_by(LedgerEntry.seq.desc())
+        .limit(1)
+    )
+    if before_seq is not None:
+        statement = statement.where(LedgerEntry.seq < before_seq)
+    return session.exec(statement).first() or GENESIS_HASH
+
+
+def _lock_head(session: Session) -> LedgerHead:
+    # Writing first takes SQLite's write lock and creates the row on first
+    # use, so FOR UPDATE always has a row to lock on PostgreSQL
+    insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    session.execute(insert(LedgerHead).values(id=1, seq=0, last_hash=GENESIS_HASH).on_conflict_do_nothing())
+    return session.get(LedgerHead, 1, with_for_update=True, populate_existing=True)
+
+
+def _link(entry: LedgerEntry, head: LedgerHead, doc_prev_hash: str) -> None:
+    entry.seq = head.seq + 1
+    entry.chain_prev_hash = head.last_hash
+    entry.prev_hash = doc_prev_hash
+    entry.entry_hash = compute_entry_hash(entry)
+    head.seq = entry.seq
+    head.last_hash = entry.entry_hash
+
+
+def chain_entry(session: Session, entry: LedgerEntry) -> None:
+    """
+    Link a new (not yet added) entry into both chains and advance the head.
+
+    Does not commit; the head update and the entry land in the caller's
+    transaction.
+    """
+    head = _lock_head(session)
+    _link(entry, head, _previous_document_hash(session, entry.doc_id))
+    session.add(head)
+
+
+def chain_entries(session: Session, entries: List[LedgerEntry]) -> None:
+    """
+    chain_entry for a batch: the head is locked once and the latest hash of
+    every document involved is read in one query. Entries are linked in
+    list order. Does not commit.
+    """
+    # Lock before reading document heads, as chain_entry does, so no entry
+    # can be chained for these documents in between
+    head = _lock_head(session)
+    doc_ids = {entry.doc_id for entry in entries}
+    latest_seqs = (
+        select(func.max(LedgerEntry.seq))
+        .where(LedgerEntry.doc_id.in_(doc_ids))
+        .group_by(LedgerEntry.doc_id)
+    )
+    document_heads = dict(session.exec(
+        select(LedgerEntry.doc_id, LedgerEntry.entry_hash).where(LedgerEntry.seq.in_(latest_seqs))
+    ).all())
+
+    for entry in entries:
+        _link(entry, head, document_heads.get(entry.doc_id, GENESIS_HASH))
+        document_heads[entry.doc_id] = entry.entry_hash
+    session.add(head)
+
+
+def _save_checkpoint(session: Session, seq: int, entry_hash: str) -> None:
+    checkpoint = session.get(LedgerCheckpoint, 1) or LedgerCheckpoint(id=1, verified_hash=GENESIS_HASH)
+    checkpoint.verified_seq = seq
+    checkpoint.verified_hash = entry_hash
+    checkpoint.verified_at = datetime.utcnow()
+    session.add(checkpoint)
+    session.commit()
+
+
+def verify_ledger(session: Session, full: bool = False, batch_size: int = 1000) -> dict:
+    """
+    Verify the hash chain, resuming from the last checkpoint.
+
+    The checkpointed entry itself is re-hashed first, so rewriting history
+    that was already verified is still caught at the boundary. On success
+    the checkpoint moves to the chain tip; on failure it moves to the last
+    good entry.
+
+    Args:
+        full: Ignore the checkpoint and verify from the genesis
+        batch_size: Entries loaded per query
+
+    Returns:
+        {
+            "ok": bool,
+            "verified": int,        # entries checked by this run
+            "verified_seq": int,    # chain position now verified up to
+            "unchained": int,       # entries with no chain position
+            "error": {"seq", "entry_id", "reason"} | None
+        }
+    """
+    checkpoint = None if full else session.get(LedgerCheckpoint, 1)
+    last_seq = checkpoint.verified_seq if checkpoint else 0
+    prev_hash = checkpoint.verified_hash if checkpoint else GENESIS_HASH
+    unchained = session.exec(
+        select(func.count()).select_from(LedgerEntry).where(LedgerEntry.seq.is_(None))
+    ).one()
+
+    def result(verified: int, error: Optional[dict] = None) -> dict:
+        return {
+            "ok": error is None,
+            "verified": verified,
+            "verified_seq": last_seq,
+            "unchained": unchained,
+            "error": error,
+        }
+
+    if last_seq:
+        anchor = session.exec(select(LedgerEntry).where(LedgerEntry.seq == last_seq)).first()
+        if anchor is None or anchor.entry_hash != prev_hash or compute_entry_hash(anchor) != prev_hash:
+            return result(0, {
+                "seq": last_seq,
+                "entry_id": anchor.id if anchor else None,
+                "reason": "checkpointed entry was modified or removed",
+            })
+
+    document_heads = {}
+    verified = 0
+    while True:
+        batch = session.exec(
+            select(LedgerEntry)
+            .where(LedgerEntry.seq > last_seq)
+            .order_by(LedgerEntry.seq)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+
+        for entry in batch:
+            reason = None
+            if entry.seq != last_seq + 1:
+                reason = "missing entry (sequence gap)"
+            elif entry.chain_prev_hash != prev_hash:
+                reason = "global chain link broken"
+            else:
+                doc_prev = document_heads.get(entry.doc_id)
+                if doc_prev is None:
+                    doc_prev = _previous_document_hash(session, entry.doc_id, before_seq=entry.seq)
+                if entry.prev_hash != doc_prev:
+                    reason = "document chain link broken"
+                elif compute_entry_hash(entry) != entry.entry_hash:
+                    reason = "entry content does not match its hash"
+
+            if reason:
+                _save_checkpoint(session, last_seq, prev_hash)
+                return result(verified, {"seq": entry.seq, "entry_id": entry.id, "reason": reason})
+
+            last_seq = entry.seq
+            prev_hash = entry.entry_hash
+            document_heads[entry.doc_id] = entry.entry_hash
+            verified += 1
+
+        # Keep memory flat on long ledgers
+        for entry in batch:
+            session.expunge(entry)
+
+    _save_checkpoint(session, last_seq, prev_hash)
+    return result(verified)
+
+
+def _anchor_dict(anchor: LedgerAnchor) -> dict:
+    return {
+        "id": anchor.id,
+        "start_seq": anchor.start_seq,
+        "end_seq": anchor.end_seq,
+        "leaf_count": anchor.leaf_count,
+        "merkle_root": anchor.merkle_root,
+        "created_at": anchor.created_at,
+    }
+
+
+def _anchor_leaves(session: Session, start_seq: int, end_seq: Optional[int] = None, limit: Optional[int] = None):
+    """(seq, leaf hash) for chained entries in seq order from start_seq"""
+    statement = (
+        select(LedgerEntry.seq, LedgerEntry.entry_hash, Document.hash)
+        .join(Document, Document.id == LedgerEntry.doc_id)
+        .where(LedgerEntry.seq >= start_seq)
+        .order_by(LedgerEntry.seq)
+    )
+    if end_seq is not None:
+        statement = statement.where(LedgerEntry.seq <= end_seq)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return [(seq, leaf_hash(entry_hash, doc_hash)) for seq, entry_hash, doc_hash in session.exec(statement)]
+
+
+def anchor_pending_entries(session: Session, max_leaves: int = 1024) -> List[dict]:
+    """
+    Batch entries chained since the last anchor into Merkle trees.
+
+    Each tree covers at most `max_leaves` entries; one anchor is committed
+    per tree. If another worker anchors the same entries first, the unique
+    start_seq makes this run stop without writing anything further.
+
+    Returns:
+        The anchors created, oldest first
+    """
+    created = []
+    while True:
+        anchored_to = session.exec(select(func.max(LedgerAnchor.end_seq))).one() or 0
+        leaves = _anchor_leaves(session, anchored_to + 1, limit=max_leaves)
+        if not leaves:
+            return created
+
+        anchor = LedgerAnchor(
+            start_seq=leaves[0][0],
+            end_seq=leaves[-1][0],
+            leaf_count=len(leaves),
+            merkle_root=merkle_root([leaf for _, leaf in leaves]),
+        )
+        session.add(anchor)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return created
+        created.append(_anchor_dict(anchor))
+
+
+def first_document_entry(session: Session, document_hash: str) -> Optional[LedgerEntry]:
+    """The earliest chained entry of the oldest document with this file hash"""
+    return session.exec(
+        select(LedgerEntry)
+        .join(Document, Document.id == LedgerEntry.doc_id)
+        .where(Document.hash == document_hash, LedgerEntry.seq.is_not(None))
+        .order_by(Document.created_at, Document.id, LedgerEntry.seq)
+        .limit(1)
+    ).first()
+
+
+def get_inclusion_proof(session: Session, entry: LedgerEntry) -> Optional[dict]:
+    """
+    Merkle inclusion proof for an entry against its anchor's root.
+
+    Only the anchor's own range is re-read, so the cost is bounded by the
+    anchor size rather than the ledger size.
+
+    Returns:
+        None if the entry has not been anchored yet, otherwise
+        {
+            "entry_id", "seq", "entry_hash", "document_hash",
+            "leaf_hash": str,
+            "proof": [{"hash", "position"}, ...],
+            "anchor": {"id", "start_seq", "end_seq", "leaf_count", "merkle_root", "created_at"}
+        }
+    """
+    if entry.seq is None:
+        return None
+    anchor = session.exec(
+        select(LedgerAnchor)
+        .where(LedgerAnchor.start_seq <= entry.seq, LedgerAnchor.end_seq >= entry.seq)
+    ).first()
+    if anchor is None:
+        return None
+
+    leaves = _anchor_leaves(session, anchor.start_seq, end_seq=anchor.end_seq)
+    seqs = [seq for seq, _ in leaves]
+    index = seqs.index(entry.seq)
+    document = session.get(Document, entry.doc_id)
+    return {
+        "entry_id": entry.id,
+        "seq": entry.seq,
+        "entry_hash": entry.entry_hash,
+        "document_hash": document.hash,
+        "leaf_hash": leaves[index][1],
+        "proof": merkle_proof([leaf for _, leaf in leaves], index),
+        "anchor": _anchor_dict(anchor),
+    }
+
+
+async def anchor_periodically(engine, interval_seconds: float, max_leaves: int) -> None:
+    """Anchor new entries every `interval_seconds` until cancelled"""
+    def _run():
+        with Session(engine) as session:
+            return anchor_pending_entries(session, max_leaves=max_leaves)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            anchors = await run_in_threadpool(_run)
+            if anchors:
+                logger.info("Anchored ledger entries up to seq %s", anchors[-1]["end_seq"])
+        except Exception:
+            logger.exception("Ledger anchoring failed")
@@ -0,0 +1,133 @@
+"""
+Structured ledger entry metadata.
+
+LedgerEntry.entry_metadata stays the canonical JSON text (the hash chain
+covers it), but the keys queries filter on are validated on write and
+copied into typed, indexed LedgerEntry columns:
+
+- seller_id: the seller a PO is issued to
+- amount / currency: value of an invoice, LoC or payment
+- counterparty: free-text name of the other party (bank, carrier, ...)
+
+Other keys are kept in the JSON text unchanged. find_ledger_entries turns
+predicates on these keys into SQL instead of parsing every row.
+"""
+import json
+from decimal import Decimal
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+
+from app.db.models import LedgerEntry
+
+STRUCTURED_KEYS = ("seller_id", "amount", "currency", "counterparty")
+
+
+class LedgerMetadata(BaseModel):
+    """Keys with a known meaning are type-checked; anything else passes through"""
+
+    model_config = ConfigDict(extra="allow")
+
+    seller_id: Optional[int] = Field(None, gt=0)
+    amount: Optional[Decimal] = Field(None, ge=0, max_digits=18, decimal_places=2)
+    currency: Optional[str] = Field(None, pattern=r"^[A-Z]{3}$")
+    counterparty: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
+def normalize_metadata(value: Union[str, dict, None]) -> Optional[str]:
+    """
+    Validate metadata given as a JSON object or its text and return the
+    JSON text to store.
+
+    Raises:
+        ValueError: Not a JSON object, or a known key has the wrong type
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError("metadata must be a JSON object") from None
+    if not isinstance(value, dict):
+        raise ValueError("metadata must be a JSON object")
+    LedgerMetadata.model_validate(value)
+    # Valid values are stored as given (e.g. amounts stay JSON numbers)
+    return json.dumps(value)
+
+
+def metadata_columns(entry_metadata: Optional[str]) -> dict:
+    """
+    Typed column values for stored metadata text. Lenient, for rows
+    written before validation: a key that is missing or invalid maps to
+    None without affecting the others.
+    """
+    columns = dict.fromkeys(STRUCTURED_KEYS)
+    if not entry_metadata:
+        return columns
+    try:
+        data = json.loads(entry_metadata)
+    except ValueError:
+        return columns
+    if not isinstance(data, dict):
+        return columns
+    for key in STRUCTURED_KEYS:
+        if data.get(key) is None:
+            continue
+        try:
+            columns[key] = getattr(LedgerMetadata.model_validate({key: data[key]}), key)
+        except ValidationError:
+            pass
+    return columns
+
+
+def new_ledger_entry(doc_id: int, actor_id: int, action: str, entry_metadata: Optional[str] = None) -> LedgerEntry:
+    """A LedgerEntry with its structured metadata columns filled in"""
+    return LedgerEntry(
+        doc_id=doc_id,
+        actor_id=actor_id,
+        action=action,
+        entry_metadata=entry_metadata,
+        **metadata_columns(entry_metadata),
+    )
+
+
+def metadata_filters(
+    seller_id: Optional[int] = None,
+    counterparty: Optional[str] = None,
+    currency: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+) -> list:
+    """WHERE clauses on the structured metadata columns; None means no filter"""
+    filters = []
+    if seller_id is not None:
+        filters.append(LedgerEntry.seller_id == seller_id)
+    if counterparty is not None:
+        filters.append(LedgerEntry.counterparty == counterparty)
+    if currency is not None:
+        filters.append(LedgerEntry.currency == currency)
+    if min_amount is not None:
+        filters.append(LedgerEntry.amount >= min_amount)
+    if max_amount is not None:
+        filters.append(LedgerEntry.amount <= max_amount)
+    return filters
+
+
+def find_ledger_entries(
+    session: Session,
+    action: Optional[str] = None,
+    limit: int = 100,
+    **metadata,
+) -> List[LedgerEntry]:
+    """
+    Ledger entries matching an action and metadata_filters keywords,
+    newest first, with actors loaded.
+    """
+    statement = select(LedgerEntry).options(joinedload(LedgerEntry.actor)).where(*metadata_filters(**metadata))
+    if action is not None:
+        statement = statement.where(LedgerEntry.action == action)
+    statement = statement.order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc()).limit(limit)
+    return list(session.exec(statement))
@@ -0,0 +1,72 @@
+"""
+Binary Merkle trees over ledger entry hashes.
+
+Leaves and interior nodes are hashed with different one-byte prefixes
+(as in RFC 6962) so a leaf can never be passed off as an interior node.
+A node without a sibling at the end of a level is carried up unchanged,
+so a tree over n leaves has ceil(log2(n)) levels and every proof has at
+most that many steps.
+"""
+import hashlib
+from typing import List
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(entry_hash: str, document_hash: str) -> str:
+    """Leaf for one ledger entry, binding it to its document's file hash"""
+    data = LEAF_PREFIX + bytes.fromhex(entry_hash) + bytes.fromhex(document_hash)
+    return hashlib.sha256(data).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def _next_level(level: List[str]) -> List[str]:
+    parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(leaves: List[str]) -> str:
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+
+def merkle_proof(leaves: List[str], index: int) -> List[dict]:
+    """
+    Sibling hashes from leaf `index` up to the root.
+
+    Returns:
+        [{"hash": str, "position": "left" | "right"}, ...] where position
+        says on which side the sibling sits when hashing the pair
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf index {index} outside tree of {len(leaves)} leaves")
+    proof = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"hash": level[sibling], "position": "left" if sibling < index else "right"})
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: List[dict], root: str) -> bool:
+    """Recompute the root from a leaf and its proof"""
+    current = leaf
+    for step in proof:
+        if step["position"] == "left":
+            current = node_hash(step["hash"], current)
+        else:
+            current = node_hash(current, step["hash"])
+    return current == root
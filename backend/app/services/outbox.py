@@ -0,0 +1,211 @@
+"""
+Transactional outbox for side effects of ledger writes.
+
+Every LedgerEntry is written together with an OutboxEvent row in the same
+transaction (enqueue_ledger_entries), so a side effect is recorded if and
+only if the entry commits. A background dispatcher then hands pending
+events to the handlers registered for their topic, off the request path:
+
+- Batching: up to OUTBOX_BATCH_SIZE due events per transaction; each
+  handler receives all of a topic's events in the batch as one list.
+- Retries: when a batch fails its events are retried one by one, so a
+  single bad event cannot hold back the rest. A failing event is retried
+  after OUTBOX_RETRY_BASE_SECONDS, doubling each time, and marked
+  `failed` after OUTBOX_MAX_ATTEMPTS.
+- At-least-once: an event is marked done in the transaction that ran its
+  handlers, after they all returned. A crash or error before that commit
+  delivers it again, to every handler, so handlers must be idempotent.
+  Database writes a handler makes through the session it is given commit
+  together with the mark, so those apply exactly once.
+
+Handlers are registered with register_handler(topic, fn) and called as
+fn(session, payloads).
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.models import LedgerEntry, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+LEDGER_ENTRY_TOPIC = "ledger_entry"
+
+Handler = Callable[[Session, List[dict]], None]
+
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def register_handler(topic: str, handler: Handler) -> None:
+    """Call `handler(session, payloads)` for every batch of `topic` events"""
+    handlers = _handlers.setdefault(topic, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+
+def unregister_handler(topic: str, handler: Handler) -> None:
+    if handler in _handlers.get(topic, []):
+        _handlers[topic].remove(handler)
+
+
+def get_handlers(topic: str) -> List[Handler]:
+    return list(_handlers.get(topic, []))
+
+
+def ledger_entry_payload(entry: LedgerEntry) -> dict:
+    return {
+        "entry_id": entry.id,
+        "seq": entry.seq,
+        "doc_id": entry.doc_id,
+        "actor_id": entry.actor_id,
+        "action": entry.action,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+def enqueue(session: Session, topic: str, payloads: List[dict]) -> None:
+    """Add outbox rows to the caller's transaction with one INSERT. Does not commit."""
+    if not payloads:
+        return
+    now = datetime.utcnow()
+    session.execute(insert(OutboxEvent), [
+        {"topic": topic, "payload": json.dumps(payload), "status": "pending", "attempts": 0,
+         "created_at": now, "available_at": now}
+        for payload in payloads
+    ])
+
+
+def enqueue_ledger_entries(session: Session, entries: List[LedgerEntry]) -> None:
+    """Outbox rows for flushed entries (ids assigned). Does not commit."""
+    enqueue(session, LEDGER_ENTRY_TOPIC, [ledger_entry_payload(entry) for entry in entries])
+
+
+def _deliver(session: Session, events: List[OutboxEvent]) -> None:
+    by_topic: Dict[str, List[dict]] = {}
+    for event in events:
+        by_topic.setdefault(event.topic, []).append(json.loads(event.payload))
+    for topic, payloads in by_topic.items():
+        for handler in get_handlers(topic):
+            handler(session, payloads)
+
+    dispatched_at = datetime.utcnow()
+    for event in events:
+        event.status = "done"
+        event.attempts += 1
+        event.dispatched_at = dispatched_at
+        session.add(event)
+    session.commit()
+
+
+def _record_failure(session: Session, event_id: int, error: Exception, max_attempts: int, retry_base_seconds: int) -> str:
+    event = session.get(OutboxEvent, event_id, populate_existing=True)
+    event.attempts += 1
+    event.last_error = f"{type(error).__name__}: {error}"[:1000]
+    if event.attempts >= max_attempts:
+        event.status = "failed"
+        logger.error("Outbox event %s failed permanently after %s attempts: %s", event_id, event.attempts, event.last_error)
+    else:
+        event.available_at = datetime.utcnow() + timedelta(seconds=retry_base_seconds * 2 ** (event.attempts - 1))
+    session.add(event)
+    session.commit()
+    return event.status
+
+
+def dispatch_outbox(
+    session: Session,
+    batch_size: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    retry_base_seconds: Optional[int] = None,
+) -> dict:
+    """
+    Deliver one batch of due pending events, oldest first.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED where the database
+    supports it, so several dispatchers can run side by side.
+
+    Returns:
+        {"claimed": int, "dispatched": int, "retried": int, "failed": int}
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+    if retry_base_seconds is None:
+        retry_base_seconds = settings.OUTBOX_RETRY_BASE_SECONDS
+
+    events = session.exec(
+        select(OutboxEvent)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= datetime.utcnow())
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    summary = {"claimed": len(events), "dispatched": 0, "retried": 0, "failed": 0}
+    if not events:
+        session.commit()
+        return summary
+
+    event_ids = [event.id for event in events]
+    try:
+        _deliver(session, events)
+        summary["dispatched"] = len(events)
+        return summary
+    except Exception:
+        session.rollback()
+
+    # Isolate the failing event(s)
+    for event_id in event_ids:
+        event = session.get(OutboxEvent, event_id, with_for_update={"skip_locked": True}, populate_existing=True)
+        if event is None or event.status != "pending":
+            session.commit()
+            continue
+        try:
+            _deliver(session, [event])
+            summary["dispatched"] += 1
+        except Exception as e:
+            session.rollback()
+            status = _record_failure(session, event_id, e, max_attempts, retry_base_seconds)
+            summary["failed" if status == "failed" else "retried"] += 1
+    return summary
+
+
+def purge_outbox(session: Session, retention_seconds: Optional[int] = None) -> int:
+    """Delete delivered rows older than the retention period; failed rows are kept"""
+    if retention_seconds is None:
+        retention_seconds = settings.OUTBOX_RETENTION_SECONDS
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    result = session.execute(
+        delete(OutboxEvent).where(OutboxEvent.status == "done", OutboxEvent.dispatched_at < cutoff)
+    )
+    session.commit()
+    return result.rowcount
+
+
+async def dispatch_periodically(engine, interval_seconds: float) -> None:
+    """Drain due outbox events every `interval_seconds` until cancelled"""
+    def _run():
+        totals = {"dispatched": 0, "retried": 0, "failed": 0}
+        with Session(engine) as session:
+            while True:
+                summary = dispatch_outbox(session)
+                for key in totals:
+                    totals[key] += summary[key]
+                # A short batch means nothing else is due yet
+                if summary["claimed"] < settings.OUTBOX_BATCH_SIZE:
+                    break
+            purge_outbox(session)
+        return totals
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            totals = await run_in_threadpool(_run)
+            if totals["retried"] or totals["failed"]:
+                logger.warning("Outbox dispatch: %s", totals)
+        except Exception:
+            logger.exception("Outbox dispatch failed")
@@ -0,0 +1,72 @@
+"""
+Document action policy.
+
+Which role may perform which action on which document type, and what the
+document becomes afterwards, is data: a list of rules loaded from JSON
+(app/core/policy.json by default, POLICY_FILE to override). The rules are
+compiled once into a dict keyed by (role, doc_type, action), so every
+decision is a single lookup.
+
+Rule format:
+    {"role": "bank", "doc_type": "PO", "action": "ISSUE_LOC", "next_doc_type": "LOC"}
+
+next_doc_type is optional; without it the document keeps its type.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from app.core.config import settings
+
+DEFAULT_POLICY_FILE = Path(__file__).resolve().parents[1] / "core" / "policy.json"
+
+
+class PolicyDecision(NamedTuple):
+    allowed: bool
+    next_doc_type: Optional[str]  # doc_type after the action, None if denied
+
+
+DENIED = PolicyDecision(False, None)
+
+
+class PolicyTable:
+    def __init__(self, rules: Iterable[dict]):
+        self._decisions: Dict[Tuple[str, str, str], PolicyDecision] = {}
+        for rule in rules:
+            try:
+                key = (rule["role"], rule["doc_type"], rule["action"])
+            except KeyError as e:
+                raise ValueError(f"Policy rule {rule} is missing {e}") from None
+            if key in self._decisions:
+                raise ValueError(f"Duplicate policy rule for {key}")
+            self._decisions[key] = PolicyDecision(True, rule.get("next_doc_type") or rule["doc_type"])
+
+    def decide(self, role: str, doc_type: str, action: str) -> PolicyDecision:
+        return self._decisions.get((role, doc_type, action), DENIED)
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+    def rules(self) -> Dict[Tuple[str, str, str], PolicyDecision]:
+        return dict(self._decisions)
+
+
+def load_policy(path: Union[str, Path, None] = None) -> PolicyTable:
+    with open(path or DEFAULT_POLICY_FILE) as f:
+        return PolicyTable(json.load(f)["rules"])
+
+
+_policy: Optional[PolicyTable] = None
+
+
+def get_policy() -> PolicyTable:
+    global _policy
+    if _policy is None:
+        _policy = load_policy(settings.POLICY_FILE or None)
+    return _policy
+
+
+def set_policy(policy: PolicyTable) -> None:
+    """Install a different policy (e.g. after reloading configuration)"""
+    global _policy
+    _policy = policy
@@ -0,0 +1,257 @@
+"""
+Content-addressed storage for uploaded document files.
+
+Files are stored once per distinct SHA-256 (the same value kept in
+Document.hash), so re-uploading an identical PDF costs no extra space and
+two uploads that share a filename can never overwrite each other.
+StoredBlob rows count how many documents reference each blob.
+
+An upload counts its reference before storing the content, and releases
+it if the document is not created (release_blob_reference). Content is
+only deleted while its row is locked at zero references, so a concurrent
+upload of the same file either keeps it or stores it again.
+
+Backends implement BlobStore:
+- LocalBlobStore: sharded directories on the local filesystem
+  (`<root>/ab/cd/abcd...`)
+- ObjectBlobStore: any S3-style client exposing put_object / get_object /
+  head_object / delete_object (e.g. a boto3 S3 client pointed at MinIO).
+  LocalObjectClient is a directory-backed stand-in with the same calls,
+  used when no real object store is configured.
+"""
+import os
+import shutil
+from datetime import datetime
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.models import StoredBlob
+
+
+def shard_key(digest: str) -> str:
+    """Two levels of fan-out keep directories small: ab/cd/abcd..."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class BlobStore(ABC):
+    # Uploads are spooled here before being handed to put_file
+    staging_dir: Path
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        """Whether content with this SHA-256 is stored"""
+
+    @abstractmethod
+    def put_file(self, digest: str, path: Path) -> bool:
+        """
+        Take ownership of a local file holding content `digest`.
+
+        The file is moved into the store, or discarded if the content is
+        already present.
+
+        Returns:
+            True if new content was stored, False if it was a duplicate
+        """
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        """Open stored content for reading"""
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        """Remove stored content if present"""
+
+    @abstractmethod
+    def size(self, digest: str) -> int:
+        """Size of stored content in bytes"""
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        """Filesystem path of the content, when the backend has one"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.staging_dir = self.root / "tmp"
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / shard_key(digest)
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def put_file(self, digest: str, path: Path) -> bool:
+        target = self._path(digest)
+        if target.exists():
+            os.unlink(path)
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+        return True
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self._path(digest), "rb")
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+    def size(self, digest: str) -> int:
+        return self._path(digest).stat().st_size
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        path = self._path(digest)
+        return path if path.exists() else None
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class LocalObjectClient:
+    """
+    Directory-backed stand-in for an S3 client.
+
+    Implements the subset of the boto3 S3 client API used by
+    ObjectBlobStore, storing each object as `<root>/<bucket>/<key>`.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, Bucket: str, Key: str) -> Path:
+        return self.root / Bucket / Key
+
+    def put_object(self, Bucket: str, Key: str, Body: BinaryIO) -> dict:
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        with open(tmp, "wb") as out:
+            shutil.copyfileobj(Body, out)
+        os.replace(tmp, path)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise ObjectNotFound(Key)
+        return {"Body": open(path, "rb"), "ContentLength": path.stat().st_size}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise ObjectNotFound(Key)
+        return {"ContentLength": path.stat().st_size}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self._path(Bucket, Key).unlink(missing_ok=True)
+        return {}
+
+
+class ObjectBlobStore(BlobStore):
+    def __init__(self, client, bucket: str, staging_dir: Path):
+        self.client = client
+        self.bucket = bucket
+        self.staging_dir = Path(staging_dir)
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, digest: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=shard_key(digest))
+            return True
+        except Exception:
+            return False
+
+    def put_file(self, digest: str, path: Path) -> bool:
+        try:
+            if self.exists(digest):
+                return False
+            with open(path, "rb") as body:
+                self.client.put_object(Bucket=self.bucket, Key=shard_key(digest), Body=body)
+            return True
+        finally:
+            os.unlink(path)
+
+    def open(self, digest: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=shard_key(digest))["Body"]
+
+    def delete(self, digest: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=shard_key(digest))
+
+    def size(self, digest: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=shard_key(digest))["ContentLength"]
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def build_blob_store() -> BlobStore:
+    """Create the store selected by settings.STORAGE_BACKEND"""
+    files_dir = Path(settings.FILES_DIR)
+    if settings.STORAGE_BACKEND == "local":
+        return LocalBlobStore(files_dir / "store")
+    if settings.STORAGE_BACKEND == "object":
+        client = LocalObjectClient(files_dir / "objects")
+        return ObjectBlobStore(client, settings.OBJECT_STORE_BUCKET, files_dir / "tmp")
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}'")
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = build_blob_store()
+    return _blob_store
+
+
+def set_blob_store(store: BlobStore) -> None:
+    """Install a different store (e.g. one backed by a real S3 client)"""
+    global _blob_store
+    _blob_store = store
+
+
+def add_blob_reference(session: Session, digest: str, size: int) -> None:
+    """
+    Count one more document referencing `digest`.
+
+    Runs as a single upsert so concurrent uploads of the same new content
+    cannot race on creating the row. Does not commit.
+    """
+    insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(StoredBlob).values(
+        hash=digest, size=size, ref_count=1, created_at=datetime.utcnow()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[StoredBlob.hash],
+        set_={"ref_count": StoredBlob.ref_count + 1},
+    )
+    session.execute(statement)
+
+
+def release_blob_reference(session: Session, store: BlobStore, digest: str) -> bool:
+    """
+    Undo add_blob_reference for an upload whose document was not created,
+    deleting the content once nothing references it. Commits.
+
+    The count is decremented before it is read, which locks the row (and
+    takes SQLite's write lock), so no upload can count itself in between
+    the check and the delete.
+
+    Returns:
+        True if the content was deleted
+    """
+    session.execute(update(StoredBlob).where(StoredBlob.hash == digest).values(ref_count=StoredBlob.ref_count - 1))
+    blob = session.get(StoredBlob, digest, populate_existing=True)
+    deleted = blob is not None and blob.ref_count <= 0
+    if deleted:
+        store.delete(digest)
+        session.execute(delete(StoredBlob).where(StoredBlob.hash == digest))
+    session.commit()
+    return deleted
@@ -0,0 +1,79 @@
+"""
+Ledger hash-chain verification throughput.
+
+Builds a chained ledger in a throwaway SQLite database, then times a
+full verification and an incremental one after appending more entries:
+
+    python -m benchmarks.bench_ledger_verify --entries 50000 --append 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="tfbe-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from sqlmodel import SQLModel, Session, select
+
+from app.db.models import Document, Organization, User
+from app.db.session import engine
+from app.services.documents import append_ledger_entry
+from app.services.ledger import verify_ledger
+
+
+def build_ledger(session: Session, documents: list, actor_id: int, entries: int) -> None:
+    for i in range(entries):
+        append_ledger_entry(session, documents[i % len(documents)], actor_id, "VERIFY")
+        if i % 1000 == 999:
+            session.commit()
+    session.commit()
+
+
+def timed_verify(label: str, full: bool) -> None:
+    with Session(engine) as session:
+        started = time.perf_counter()
+        result = verify_ledger(session, full=full)
+        elapsed = time.perf_counter() - started
+    rate = result["verified"] / elapsed if elapsed else 0
+    print(f"{label:<12} verified={result['verified']:>8}  {elapsed:8.3f}s  {rate:12,.0f} entries/s  ok={result['ok']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--append", type=int, default=1000)
+    parser.add_argument("--documents", type=int, default=500)
+    args = parser.parse_args()
+
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        org = Organization(name="Bench Org")
+        session.add(org)
+        session.flush()
+        user = User(name="Bench", email="bench@example.com", hashed_password="x", role="buyer", organization_id=org.id)
+        session.add(user)
+        session.flush()
+        documents = [
+            Document(doc_number=f"PO-{i}", file_url=f"PO-{i}.pdf", hash=f"{i:064x}", doc_type="PO", owner_id=user.id)
+            for i in range(args.documents)
+        ]
+        session.add_all(documents)
+        session.commit()
+
+        started = time.perf_counter()
+        build_ledger(session, documents, user.id, args.entries)
+        print(f"built {args.entries} chained entries in {time.perf_counter() - started:.2f}s")
+
+    timed_verify("full", full=True)
+
+    with Session(engine) as session:
+        documents = session.exec(select(Document)).all()
+        build_ledger(session, documents, documents[0].owner_id, args.append)
+    timed_verify("incremental", full=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Policy decision throughput.
+
+Times PolicyTable.decide over every (role, doc_type, action) combination
+and compares it with a linear scan over the same rules, which is what the
+old if/elif chain in perform_action amounted to:
+
+    python -m benchmarks.bench_policy --rounds 20000
+"""
+import argparse
+import itertools
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.services.policy import load_policy
+
+ROLES = ["buyer", "seller", "auditor", "bank", "admin"]
+DOC_TYPES = ["PO", "LOC", "BOL", "INVOICE"]
+ACTIONS = ["AMEND", "RECEIVED", "SHIPPED", "ISSUE_BOL", "ISSUE_INVOICE", "VERIFY", "PAID", "ISSUE_LOC"]
+
+
+def run(label: str, decide, queries, rounds: int) -> None:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for role, doc_type, action in queries:
+            decide(role, doc_type, action)
+    elapsed = time.perf_counter() - started
+    decisions = rounds * len(queries)
+    print(f"{label:<12} {decisions:>10} decisions  {elapsed:8.3f}s  {decisions / elapsed:14,.0f} decisions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    policy = load_policy()
+    rules = list(policy.rules().items())
+    queries = list(itertools.product(ROLES, DOC_TYPES, ACTIONS))
+
+    def linear_scan(role, doc_type, action):
+        for key, decision in rules:
+            if key == (role, doc_type, action):
+                return decision
+        return None
+
+    run("table", policy.decide, queries, args.rounds)
+    run("linear scan", linear_scan, queries, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Reproducible API benchmark suite, run in-process.
+
+Seeds a synthetic dataset into a throwaway SQLite database (organizations,
+users per role, documents with ledger histories that follow the action
+policy; seeded RNG, so the same arguments give the same data), then drives the login, list, detail, upload
+and action endpoints through the ASGI app and records p50/p95/p99 latency
+and throughput per scenario. The `mixed` scenario interleaves list and
+detail reads from sellers, for comparing pool and journal settings under
+concurrency.
+
+Results are written as JSON so runs can be compared across commits:
+
+    python -m benchmarks.suite --output results/HEAD.json
+    python -m benchmarks.suite --output results/new.json --compare results/HEAD.json
+    python -m benchmarks.suite --scenarios list,detail --documents 20000 --requests 2000
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 python -m benchmarks.suite --scenarios mixed --concurrency 32
+    SQLITE_WAL=false python -m benchmarks.suite --scenarios mixed
+
+With --compare, the exit status is 1 when any scenario's p95 regressed by
+more than --max-regression percent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_WORK_DIR = tempfile.mkdtemp(prefix="tfbe-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_WORK_DIR, 'bench.db')}")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("FILES_DIR", os.path.join(_WORK_DIR, "files"))
+os.environ.setdefault("LEDGER_ANCHOR_INTERVAL_SECONDS", "0")
+
+import httpx
+from sqlmodel import SQLModel, Session
+
+from app.core.config import settings
+from app.core.password_pool import shutdown_pool
+from app.core.security import create_access_token
+from app.db.migrations import run_migrations
+from app.db.models import Document, LedgerEntry, Organization, User
+from app.db.session import engine, async_engine
+from app.main import app
+from app.services.auth import clear_auth_cache, hash_password
+from app.services.documents import insert_chained_entries
+from app.services.policy import get_policy
+
+ROLES = ("buyer", "seller", "bank", "auditor")
+SCENARIOS = ("login", "list", "detail", "mixed", "upload", "action")
+PASSWORD = "bench-password"
+
+
+def seed(orgs: int, users_per_role: int, documents: int, history: int, rng: random.Random) -> dict:
+    """
+    Build the dataset; every document gets ISSUED plus up to `history`
+    further ledger entries. Histories are random walks through the action
+    policy, each action taken by a user of the role its rule allows (one
+    per role per document, the buyer being the owner), so doc_type and
+    last_action are always a state the API could have produced.
+
+    Returns:
+        {"users": {role: [(id, email), ...]}, "document_ids": [...], "doc_types": {id: doc_type}}
+    """
+    transitions = {}  # doc_type -> [(role, action, next_doc_type)]
+    for (role, doc_type, action), decision in get_policy().rules().items():
+        transitions.setdefault(doc_type, []).append((role, action, decision.next_doc_type))
+
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    clear_auth_cache()
+    hashed = hash_password(PASSWORD)  # one hash shared by everyone keeps seeding fast
+
+    with Session(engine) as session:
+        organizations = [Organization(name=f"Bench Org {i}") for i in range(orgs)]
+        session.add_all(organizations)
+        session.flush()
+
+        users = {role: [] for role in ROLES}
+        for org in organizations:
+            for role in ROLES:
+                for n in range(users_per_role):
+                    users[role].append(User(
+                        name=f"{role.title()} {org.id}-{n}",
+                        email=f"{role}-{org.id}-{n}@bench.example.com",
+                        hashed_password=hashed,
+                        role=role,
+                        organization_id=org.id,
+                    ))
+        session.add_all([user for group in users.values() for user in group])
+        session.flush()
+
+        start = datetime.utcnow() - timedelta(days=365)
+        docs = []
+        for i in range(documents):
+            owner = rng.choice(users["buyer"])
+            docs.append(Document(
+                doc_number=f"PO-{i:07d}",
+                file_url=f"PO-{i:07d}.pdf",
+                hash=f"{rng.getrandbits(256):064x}",
+                doc_type="PO",
+                owner_id=owner.id,
+                created_at=start + timedelta(seconds=rng.randrange(365 * 86400)),
+            ))
+        session.add_all(docs)
+        session.flush()
+
+        entries, last_entries = [], []
+        for doc in docs:
+            actors = {role: rng.choice(users[role]).id for role in ROLES if role != "buyer"}
+            actors["buyer"] = doc.owner_id
+            steps = [("ISSUED", doc.owner_id)]
+            for _ in range(rng.randint(0, history)):
+                if doc.doc_type not in transitions:
+                    break
+                role, action, doc.doc_type = rng.choice(transitions[doc.doc_type])
+                steps.append((action, actors[role]))
+            for action, actor_id in steps:
+                entries.append(LedgerEntry(doc_id=doc.id, actor_id=actor_id, action=action))
+            last_entries.append(entries[-1])
+            doc.last_action = steps[-1][0]
+            doc.entry_count = len(steps)
+        if entries:
+            stored = insert_chained_entries(session, entries)
+            for doc, entry in zip(docs, last_entries):
+                doc.last_entry_id = stored[entry.seq].id
+
+        result = {
+            "users": {role: [(user.id, user.email) for user in group] for role, group in users.items()},
+            "document_ids": [doc.id for doc in docs],
+            "doc_types": {doc.id: doc.doc_type for doc in docs},
+        }
+        session.commit()
+    return result
+
+
+def _headers(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+
+
+def build_requests(scenario: str, data: dict, rng: random.Random):
+    """Return a factory producing (method, path, request kwargs) for one request"""
+    users, doc_ids = data["users"], data["document_ids"]
+    headers = {role: [_headers(user_id) for user_id, _ in group] for role, group in users.items()}
+
+    if scenario == "login":
+        emails = [email for group in users.values() for _, email in group]
+        return lambda i: ("POST", "/auth/login", {"json": {"email": rng.choice(emails), "password": PASSWORD}})
+    if scenario == "list":
+        viewers = headers["bank"] + headers["auditor"] + headers["seller"]
+        return lambda i: ("GET", "/documents/", {"headers": rng.choice(viewers), "params": {"limit": 50}})
+    if scenario == "detail":
+        return lambda i: ("GET", f"/documents/{rng.choice(doc_ids)}", {"headers": rng.choice(headers["auditor"])})
+    if scenario == "mixed":
+        return lambda i: (
+            ("GET", "/documents/", {"headers": rng.choice(headers["seller"]), "params": {"limit": 50}})
+            if i % 2 else
+            ("GET", f"/documents/{rng.choice(doc_ids)}", {"headers": rng.choice(headers["seller"])})
+        )
+    if scenario == "upload":
+        return lambda i: ("POST", "/documents/upload", {
+            "headers": rng.choice(headers["buyer"]),
+            "data": {"doc_number": f"UP-{i:07d}", "seller_id": str(users["seller"][0][0])},
+            "files": {"file": (f"up-{i}.pdf", rng.randbytes(rng.randint(4_000, 64_000)), "application/pdf")},
+        })
+    if scenario == "action":
+        # VERIFY keeps the type, so these documents stay verifiable throughout
+        policy = get_policy()
+        verifiable = [
+            doc_id for doc_id in doc_ids if policy.decide("auditor", data["doc_types"][doc_id], "VERIFY").allowed
+        ]
+        return lambda i: ("POST", "/documents/action", {
+            "headers": rng.choice(headers["auditor"]),
+            "json": {"doc_id": rng.choice(verifiable), "action": "VERIFY"},
+        })
+    raise ValueError(f"Unknown scenario '{scenario}'")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in remaining:
+            method, path, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_suite(scenarios, data: dict, requests: dict, concurrency: int, rng: random.Random) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            make_request = build_requests(scenario, data, rng)
+            # Warm caches and pools so the first scenario is not penalised
+            method, path, kwargs = make_request(-1)
+            await client.request(method, path, **kwargs)
+            results[scenario] = await run_scenario(client, make_request, requests[scenario], concurrency)
+    # ASGITransport does not run the lifespan, so close pooled connections here
+    await async_engine.dispose()
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> bool:
+    """Print per-scenario deltas; return False if any p95 regressed too far"""
+    ok = True
+    print(f"\nvs {baseline['meta'].get('commit', '?')}:")
+    for scenario, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(scenario)
+        if not before:
+            continue
+        deltas = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            change = (result[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            deltas.append(f"{metric} {change:+6.1f}%")
+            if metric == "p95_ms" and change > max_regression:
+                ok = False
+        print(f"  {scenario:<8} " + "  ".join(deltas))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orgs", type=int, default=3)
+    parser.add_argument("--users-per-role", type=int, default=5)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=4, help="Maximum extra ledger entries per document")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=100, help="Requests for the (bcrypt-bound) login scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    data = seed(args.orgs, args.users_per_role, args.documents, args.history, rng)
+    print(f"seeded {args.documents} documents in {time.perf_counter() - started:.1f}s")
+
+    requests = {s: args.login_requests if s == "login" else args.requests for s in scenarios}
+    try:
+        results = asyncio.run(run_suite(scenarios, data, requests, args.concurrency, rng))
+    finally:
+        shutdown_pool()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {
+                "orgs": args.orgs,
+                "users_per_role": args.users_per_role,
+                "documents": args.documents,
+                "history": args.history,
+                "seed": args.seed,
+            },
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "db_pool_size": settings.DB_POOL_SIZE,
+            "db_max_overflow": settings.DB_MAX_OVERFLOW,
+            "sqlite_wal": settings.SQLITE_WAL,
+        },
+        "scenarios": results,
+    }
+
+    print(f"{'scenario':<8} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<8} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
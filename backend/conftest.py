@@ -0,0 +1,127 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway SQLite
+# database before anything under app/ is imported.
+_TEST_DIR = tempfile.mkdtemp(prefix="tfbe-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "2")
+os.environ.setdefault("LEDGER_ANCHOR_INTERVAL_SECONDS", "0")
+os.environ.setdefault("OUTBOX_DISPATCH_INTERVAL_SECONDS", "0")
+
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, select
+
+from app.db.session import engine, async_engine
+from app.db.models import User, Organization, Document
+from app.core.security import create_access_token
+from app.services.auth import clear_auth_cache
+from app.services.documents import append_ledger_entry
+from app.main import app
+
+
+@pytest.fixture
+def session():
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    # IDs restart with the fresh schema, so cached users would be stale
+    clear_auth_cache()
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(session):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(session):
+    """Factory creating a user with the given role inside a shared org."""
+    counter = {"n": 0}
+
+    def _make_user(role: str = "buyer", org_name: str = "Test Org") -> User:
+        counter["n"] += 1
+        org = session.exec(select(Organization).where(Organization.name == org_name)).first()
+        if not org:
+            org = Organization(name=org_name)
+            session.add(org)
+            session.commit()
+            session.refresh(org)
+        user = User(
+            name=f"{role.title()} {counter['n']}",
+            email=f"{role}{counter['n']}@example.com",
+            hashed_password="not-a-real-hash",
+            role=role,
+            organization_id=org.id,
+        )
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def make_document(session):
+    """Factory creating a document with an ISSUED ledger entry."""
+    counter = {"n": 0}
+
+    def _make_document(owner: User, doc_type: str = "PO", doc_number: str | None = None) -> Document:
+        counter["n"] += 1
+        document = Document(
+            doc_number=doc_number or f"PO-{counter['n']:05d}",
+            file_url=f"PO-{counter['n']:05d}_test.pdf",
+            hash=f"{counter['n']:064x}",
+            doc_type=doc_type,
+            owner_id=owner.id,
+        )
+        session.add(document)
+        session.commit()
+        session.refresh(document)
+        append_ledger_entry(session, document, owner.id, "ISSUED")
+        session.commit()
+        session.refresh(document)
+        return document
+
+    return _make_document
+
+
+@pytest.fixture
+def auth_headers():
+    def _auth_headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+
+    return _auth_headers
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting every SQL statement sent to the engine."""
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        # Requests go through the async engine, fixtures and services through
+        # the sync one; count both.
+        engines = (engine, async_engine.sync_engine)
+        for target in engines:
+            event.listen(target, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", _record)
+
+    return _count_queries
@@ -0,0 +1,124 @@
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db.models import User
+
+SIGNUP = {
+    "name": "Asha Buyer",
+    "email": "asha@example.com",
+    "password": "Test@123",
+    "org": "Asha Imports",
+    "role": "buyer",
+}
+
+
+def _signup_and_login(client, **overrides):
+    payload = dict(SIGNUP, **overrides)
+    assert client.post("/auth/signup", json=payload).status_code == 200
+    response = client.post(
+        "/auth/login", json={"email": payload["email"], "password": payload["password"]}
+    )
+    assert response.status_code == 200
+    return response
+
+
+def test_signup_login_and_fetch_user(client):
+    response = _signup_and_login(client)
+    token = response.json()["access_token"]
+
+    assert "refresh_token" in response.cookies
+    user = client.get("/auth/user", headers={"Authorization": f"Bearer {token}"}).json()
+    assert (user["email"], user["role"]) == (SIGNUP["email"], "buyer")
+
+
+def test_duplicate_signup_rejected(client):
+    _signup_and_login(client)
+
+    response = client.post("/auth/signup", json=SIGNUP)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "User already exists"
+
+
+def test_login_failures(client):
+    _signup_and_login(client)
+
+    wrong_password = client.post("/auth/login", json={"email": SIGNUP["email"], "password": "nope"})
+    unknown_user = client.post("/auth/login", json={"email": "ghost@example.com", "password": "x"})
+
+    assert (wrong_password.status_code, wrong_password.json()["detail"]) == (401, "Invalid password")
+    assert (unknown_user.status_code, unknown_user.json()["detail"]) == (401, "User not found")
+
+
+def test_protected_route_rejects_bad_token(client):
+    response = client.get("/auth/user", headers={"Authorization": "Bearer not-a-token"})
+
+    assert response.status_code == 401
+
+
+def test_login_rehashes_when_work_factor_changes(client, session, monkeypatch):
+    _signup_and_login(client)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", settings.BCRYPT_ROUNDS + 1)
+
+    response = client.post(
+        "/auth/login", json={"email": SIGNUP["email"], "password": SIGNUP["password"]}
+    )
+
+    assert response.status_code == 200
+    user = session.exec(select(User).where(User.email == SIGNUP["email"])).one()
+    assert user.hashed_password.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+
+
+def test_login_returns_503_when_hashing_pool_is_saturated(client, monkeypatch):
+    token = _signup_and_login(client).json()["access_token"]
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    response = client.post(
+        "/auth/login", json={"email": SIGNUP["email"], "password": SIGNUP["password"]}
+    )
+    stats = client.get("/auth/hashing/stats", headers={"Authorization": f"Bearer {token}"}).json()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert stats["rejected"] >= 1
+    assert stats["in_flight"] == 0
+
+
+def test_repeat_requests_skip_token_decode_and_user_lookup(client, make_user, auth_headers, count_queries):
+    headers = auth_headers(make_user("bank"))
+    assert client.get("/auth/user", headers=headers).status_code == 200
+
+    with count_queries() as statements:
+        response = client.get("/auth/user", headers=headers)
+
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_deactivated_user_is_rejected_despite_cache(client, session, make_user, auth_headers):
+    user = make_user("seller")
+    headers = auth_headers(user)
+    assert client.get("/auth/user", headers=headers).status_code == 200
+
+    user.is_active = False
+    session.add(user)
+    session.commit()
+    response = client.get("/auth/user", headers=headers)
+
+    assert (response.status_code, response.json()["detail"]) == (401, "User is inactive")
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    from app.core import cache
+
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache = cache.TTLCache(max_entries=2)
+    ttl_cache.set("a", 1, ttl=10)
+    ttl_cache.set("b", 2, ttl=10)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3, ttl=10)
+
+    assert (ttl_cache.get("a"), ttl_cache.get("b"), ttl_cache.get("c")) == (1, None, 3)
+    now[0] += 11
+    assert ttl_cache.get("a") is None
@@ -0,0 +1,103 @@
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services import documents as document_service
+from app.services.ledger import verify_ledger
+
+
+def _bulk(client, headers, actions):
+    return client.post("/documents/actions/bulk", headers=headers, json={"actions": actions})
+
+
+def test_bulk_reports_each_item(client, session, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    invoices = [make_document(buyer, doc_type="INVOICE") for _ in range(3)]
+    order = make_document(buyer, doc_type="PO")
+    actions = [{"doc_id": doc.id, "action": "PAID"} for doc in invoices]
+    actions += [{"doc_id": order.id, "action": "PAID"}, {"doc_id": 9999, "action": "PAID"}]
+
+    response = _bulk(client, auth_headers(make_user("bank")), actions)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (3, 2)
+    assert [item["status_code"] for item in body["results"]] == [200, 200, 200, 403, 404]
+    assert all(item["entry"]["action"] == "PAID" for item in body["results"][:3])
+    for doc in invoices:
+        session.refresh(doc)
+        assert (doc.last_action, doc.entry_count) == ("PAID", 2)
+    assert verify_ledger(session, full=True)["ok"]
+
+
+def test_bulk_applies_actions_on_one_document_in_order(client, session, make_user, make_document, auth_headers):
+    document = make_document(make_user("buyer"))
+    version = document.version
+
+    response = _bulk(client, auth_headers(make_user("seller")), [
+        {"doc_id": document.id, "action": "ISSUE_INVOICE"},  # not yet a BOL
+        {"doc_id": document.id, "action": "ISSUE_BOL"},
+        {"doc_id": document.id, "action": "ISSUE_INVOICE"},
+    ])
+
+    assert [item["status_code"] for item in response.json()["results"]] == [403, 200, 200]
+    session.refresh(document)
+    assert (document.doc_type, document.entry_count, document.version) == ("INVOICE", 3, version + 1)
+    assert document.last_entry_id == response.json()["results"][2]["entry"]["id"]
+
+
+def test_bulk_expected_version_fails_only_that_item(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    first, second = make_document(buyer), make_document(buyer)
+
+    response = _bulk(client, auth_headers(make_user("auditor")), [
+        {"doc_id": first.id, "action": "VERIFY", "expected_version": first.version + 5},
+        {"doc_id": second.id, "action": "VERIFY", "expected_version": second.version},
+    ])
+
+    assert [item["status_code"] for item in response.json()["results"]] == [409, 200]
+
+
+def test_bulk_query_count_is_flat(client, make_user, make_document, auth_headers, count_queries):
+    buyer = make_user("buyer")
+    headers = auth_headers(make_user("auditor"))
+    client.get("/auth/user", headers=headers)  # warm the auth cache
+
+    def queries_for(count):
+        actions = [{"doc_id": make_document(buyer).id, "action": "VERIFY"} for _ in range(count)]
+        with count_queries() as statements:
+            assert _bulk(client, headers, actions).json()["succeeded"] == count
+        return len(statements)
+
+    assert queries_for(3) == queries_for(30)
+
+
+def test_bulk_rejects_oversized_batches(client, monkeypatch, make_user, auth_headers):
+    monkeypatch.setattr(settings, "BULK_ACTION_MAX_ITEMS", 2)
+
+    response = _bulk(client, auth_headers(make_user("bank")), [{"doc_id": 1, "action": "PAID"}] * 3)
+
+    assert response.status_code == 413
+
+
+def test_bulk_retries_when_a_document_changes_mid_batch(client, session, monkeypatch, make_user, make_document, auth_headers):
+    document = make_document(make_user("buyer"))
+    original = document_service.chain_entries
+    raced = {"done": False}
+
+    def racing_chain(sync_session, entries):
+        if not raced["done"]:
+            raced["done"] = True
+            with Session(engine) as other:
+                document_service.compare_and_swap_document(other, document.id, document.version)
+                other.commit()
+        return original(sync_session, entries)
+
+    monkeypatch.setattr(document_service, "chain_entries", racing_chain)
+
+    response = _bulk(client, auth_headers(make_user("auditor")), [{"doc_id": document.id, "action": "VERIFY"}])
+
+    assert response.json()["succeeded"] == 1
+    session.refresh(document)
+    assert document.entry_count == 2
+    assert verify_ledger(session, full=True)["ok"]
@@ -0,0 +1,75 @@
+from sqlmodel import Session
+
+from app.api.routes import documents as document_routes
+from app.db.models import Document
+from app.db.session import engine
+from app.services.documents import compare_and_swap_document
+
+
+def _action(client, headers, doc_id, action, **extra):
+    return client.post("/documents/action", headers=headers, json=dict(doc_id=doc_id, action=action, **extra))
+
+
+def test_compare_and_swap_rejects_stale_version(session, make_user, make_document):
+    document = make_document(make_user("buyer"))
+    version = document.version
+
+    with Session(engine) as first, Session(engine) as second:
+        assert compare_and_swap_document(first, document.id, version, doc_type="LOC")
+        first.commit()
+        assert not compare_and_swap_document(second, document.id, version, doc_type="LOC")
+
+    session.refresh(document)
+    assert (document.doc_type, document.version) == ("LOC", version + 1)
+
+
+def test_action_bumps_version_and_honours_expected_version(client, make_user, make_document, auth_headers):
+    document = make_document(make_user("buyer"))
+    headers = auth_headers(make_user("bank"))
+
+    stale = _action(client, headers, document.id, "ISSUE_LOC", expected_version=document.version + 1)
+    applied = _action(client, headers, document.id, "ISSUE_LOC", expected_version=document.version)
+    detail = client.get(f"/documents/{document.id}", headers=headers).json()
+
+    assert stale.status_code == 409
+    assert applied.status_code == 200
+    assert (detail["doc_type"], detail["version"]) == ("LOC", document.version + 1)
+
+
+def _race_once(monkeypatch, concurrent_doc_type):
+    """Let another writer move the document on just before the first swap"""
+    original = document_routes.compare_and_swap_document
+    raced = {"done": False}
+
+    def racing_swap(sync_session, doc_id, expected_version, **values):
+        if not raced["done"]:
+            raced["done"] = True
+            with Session(engine) as other:
+                compare_and_swap_document(other, doc_id, expected_version, doc_type=concurrent_doc_type)
+                other.commit()
+        return original(sync_session, doc_id, expected_version, **values)
+
+    monkeypatch.setattr(document_routes, "compare_and_swap_document", racing_swap)
+
+
+def test_lost_swap_is_retried_against_fresh_state(client, monkeypatch, make_user, make_document, auth_headers):
+    document = make_document(make_user("buyer"))
+    version = document.version
+    _race_once(monkeypatch, concurrent_doc_type="PO")
+
+    response = _action(client, auth_headers(make_user("auditor")), document.id, "VERIFY")
+    detail = client.get(f"/documents/{document.id}", headers=auth_headers(make_user("auditor"))).json()
+
+    assert response.status_code == 200
+    assert (detail["version"], detail["entry_count"]) == (version + 2, 2)
+
+
+def test_transition_invalidated_by_concurrent_action_is_a_conflict(
+    client, monkeypatch, make_user, make_document, auth_headers
+):
+    document = make_document(make_user("buyer"))
+    _race_once(monkeypatch, concurrent_doc_type="INVOICE")
+
+    response = _action(client, auth_headers(make_user("bank")), document.id, "ISSUE_LOC")
+
+    assert response.status_code == 409
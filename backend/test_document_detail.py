@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from app.db.models import LedgerEntry
+
+
+def _add_history(session, document, actors, count, base_time):
+    for i in range(count):
+        session.add(LedgerEntry(
+            doc_id=document.id,
+            actor_id=actors[i % len(actors)].id,
+            action=f"STEP_{i}",
+            # Insert out of time order so only the database ORDER BY can fix it
+            created_at=base_time - timedelta(minutes=i),
+        ))
+    session.commit()
+
+
+def _detail_query_count(client, headers, doc_id, count_queries):
+    with count_queries() as statements:
+        response = client.get(f"/documents/{doc_id}", headers=headers)
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+
+def test_document_detail_query_count_is_flat(
+    client, session, make_user, make_document, auth_headers, count_queries
+):
+    buyer = make_user("buyer")
+    actors = [make_user(role) for role in ("seller", "bank", "auditor")]
+    headers = auth_headers(buyer)
+    client.get("/auth/user", headers=headers)  # warm the auth cache
+    short_doc = make_document(buyer)
+    long_doc = make_document(buyer)
+    _add_history(session, short_doc, actors, 2, datetime.utcnow())
+    _add_history(session, long_doc, actors, 150, datetime.utcnow())
+
+    short_body, short_queries = _detail_query_count(client, headers, short_doc.id, count_queries)
+    long_body, long_queries = _detail_query_count(client, headers, long_doc.id, count_queries)
+
+    assert len(short_body["ledger_entries"]) == 3
+    assert len(long_body["ledger_entries"]) == 151
+    assert long_queries == short_queries
+
+
+def test_document_detail_entries_ordered_with_actor_names(client, session, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    seller = make_user("seller")
+    document = make_document(buyer)
+    _add_history(session, document, [seller], 5, datetime.utcnow() + timedelta(hours=1))
+
+    response = client.get(f"/documents/{document.id}", headers=auth_headers(buyer))
+
+    entries = response.json()["ledger_entries"]
+    timestamps = [entry["created_at"] for entry in entries]
+    assert timestamps == sorted(timestamps)
+    assert entries[0]["actor_name"] == buyer.name
+    assert {entry["actor_name"] for entry in entries[1:]} == {seller.name}
+    assert response.json()["owner_name"] == buyer.name
+
+
+def test_document_detail_not_found(client, make_user, auth_headers):
+    response = client.get("/documents/999", headers=auth_headers(make_user("buyer")))
+
+    assert response.status_code == 404
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlmodel import SQLModel
+
+from app.db.migrations import run_migrations
+from app.services.documents import append_ledger_entry, get_last_ledger_state
+
+
+def test_action_updates_materialized_state(client, session, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    bank = make_user("bank")
+    document = make_document(buyer)
+
+    response = client.post(
+        "/documents/action",
+        headers=auth_headers(bank),
+        json={"doc_id": document.id, "action": "ISSUE_LOC"},
+    )
+
+    assert response.status_code == 200
+    session.refresh(document)
+    assert document.last_action == "ISSUE_LOC"
+    assert document.last_entry_id == response.json()["id"]
+    assert document.entry_count == 2
+    assert get_last_ledger_state(session, document.id) == "ISSUE_LOC"
+
+
+def test_last_state_uses_entry_order_when_timestamps_collide(session, make_user, make_document):
+    buyer = make_user("buyer")
+    document = make_document(buyer)
+    for action in ("VERIFY", "ISSUE_LOC"):
+        entry = append_ledger_entry(session, document, buyer.id, action)
+        entry.created_at = datetime(2024, 1, 1)
+    session.commit()
+
+    assert get_last_ledger_state(session, document.id) == "ISSUE_LOC"
+    session.refresh(document)
+    assert document.entry_count == 3
+
+
+def test_list_documents_filters_by_last_action(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    bank = make_user("bank")
+    issued = make_document(buyer)
+    financed = make_document(buyer)
+    client.post(
+        "/documents/action",
+        headers=auth_headers(bank),
+        json={"doc_id": financed.id, "action": "ISSUE_LOC"},
+    )
+
+    response = client.get(
+        "/documents/", headers=auth_headers(bank), params={"last_action": "ISSUED"}
+    )
+
+    assert [doc["id"] for doc in response.json()] == [issued.id]
+
+
+def test_migration_backfills_state_from_history(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(legacy)
+    with legacy.begin() as connection:
+        connection.execute(text("DROP INDEX ix_document_last_action_created_at"))
+        for column in ("last_action", "last_entry_id", "entry_count"):
+            connection.execute(text(f"ALTER TABLE document DROP COLUMN {column}"))
+        connection.execute(text(
+            "INSERT INTO document (id, doc_number, file_url, hash, doc_type, owner_id, created_at) "
+            "VALUES (1, 'PO-1', 'f', 'h', 'LOC', 1, '2024-01-01')"
+        ))
+        for entry_id, action in ((1, "ISSUED"), (2, "ISSUE_LOC")):
+            connection.execute(text(
+                "INSERT INTO ledgerentry (id, doc_id, actor_id, action, created_at) "
+                f"VALUES ({entry_id}, 1, 1, '{action}', '2024-01-01')"
+            ))
+
+    run_migrations(legacy)
+
+    with legacy.connect() as connection:
+        row = connection.execute(
+            text("SELECT last_action, last_entry_id, entry_count FROM document WHERE id = 1")
+        ).one()
+    assert tuple(row) == ("ISSUE_LOC", 2, 2)
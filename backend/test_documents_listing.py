@@ -0,0 +1,123 @@
+from app.services.documents import get_user_documents
+
+
+def _list_query_count(client, headers, count_queries):
+    with count_queries() as statements:
+        response = client.get("/documents/", headers=headers)
+    assert response.status_code == 200
+    return len(response.json()), len(statements)
+
+
+def test_list_documents_query_count_is_flat(client, make_user, make_document, auth_headers, count_queries):
+    buyer = make_user("buyer")
+    seller = make_user("seller")
+    headers = auth_headers(seller)
+    client.get("/auth/user", headers=headers)  # warm the auth cache
+
+    for _ in range(3):
+        make_document(buyer)
+    small_rows, small_queries = _list_query_count(client, headers, count_queries)
+
+    for _ in range(30):
+        make_document(buyer)
+    large_rows, large_queries = _list_query_count(client, headers, count_queries)
+
+    assert (small_rows, large_rows) == (3, 33)
+    assert large_queries == small_queries
+
+
+def test_list_documents_includes_owner_name(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    make_document(buyer)
+
+    response = client.get("/documents/", headers=auth_headers(buyer))
+
+    assert response.status_code == 200
+    assert response.json()[0]["owner_name"] == buyer.name
+
+
+def test_get_user_documents_loads_owner_eagerly(session, make_user, make_document, count_queries):
+    buyer = make_user("buyer")
+    buyer_id, buyer_name = buyer.id, buyer.name
+    for _ in range(5):
+        make_document(buyer)
+    session.expunge_all()
+
+    with count_queries() as statements:
+        documents = get_user_documents(session, buyer_id)
+        names = {doc.owner.name for doc in documents}
+
+    assert names == {buyer_name}
+    assert len(statements) == 1
+
+
+def _walk_pages(client, headers, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/documents/", headers=headers, params=query)
+        assert response.status_code == 200
+        pages.append([doc["id"] for doc in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_list_documents_keyset_pagination_covers_every_row_once(
+    client, session, make_user, make_document, auth_headers
+):
+    buyer = make_user("buyer")
+    seller = make_user("seller")
+    documents = [make_document(buyer) for _ in range(7)]
+    # Identical timestamps must still page deterministically via the id tiebreak
+    same_time = documents[0].created_at
+    for doc in documents[2:5]:
+        doc.created_at = same_time
+        session.add(doc)
+    session.commit()
+
+    pages = _walk_pages(client, auth_headers(seller), limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    seen = [doc_id for page in pages for doc_id in page]
+    assert sorted(seen) == sorted(doc.id for doc in documents)
+
+
+def test_list_documents_filters(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    other_buyer = make_user("buyer")
+    auditor = make_user("auditor")
+    make_document(buyer, doc_type="PO", doc_number="PO-100")
+    make_document(buyer, doc_type="BOL", doc_number="BOL-100")
+    make_document(other_buyer, doc_type="PO", doc_number="PO-200")
+    headers = auth_headers(auditor)
+
+    def numbers(**params):
+        response = client.get("/documents/", headers=headers, params=params)
+        assert response.status_code == 200
+        return sorted(doc["doc_number"] for doc in response.json())
+
+    assert numbers(doc_type="PO") == ["PO-100", "PO-200"]
+    assert numbers(owner_id=buyer.id) == ["BOL-100", "PO-100"]
+    assert numbers(doc_number="PO-1") == ["PO-100"]
+    assert numbers(created_to="2000-01-01T00:00:00") == []
+
+
+def test_buyer_cannot_list_other_owners(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    other_buyer = make_user("buyer")
+    make_document(other_buyer)
+
+    response = client.get(
+        "/documents/", headers=auth_headers(buyer), params={"owner_id": other_buyer.id}
+    )
+
+    assert response.json() == []
+
+
+def test_list_documents_rejects_bad_cursor(client, make_user, auth_headers):
+    response = client.get(
+        "/documents/", headers=auth_headers(make_user("bank")), params={"cursor": "not-a-cursor"}
+    )
+
+    assert response.status_code == 400
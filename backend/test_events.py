@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.services import events, storage
+from app.services.events import InProcessBroker, event_filter, sse_stream
+
+
+class RecordingBroker(InProcessBroker):
+    def __init__(self):
+        super().__init__(max_queued=10)
+        self.published = []
+
+    async def publish(self, batch):
+        batch = list(batch)
+        self.published += batch
+        await super().publish(batch)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = RecordingBroker()
+    monkeypatch.setattr(events, "_event_broker", broker)
+    return broker
+
+
+def _event(doc_id, owner_id, seq=1):
+    return {"doc_id": doc_id, "owner_id": owner_id, "seq": seq}
+
+
+def test_committed_entries_are_published(client, broker, tmp_path, monkeypatch, make_user, make_document, auth_headers):
+    monkeypatch.setattr(storage, "_blob_store", storage.LocalBlobStore(tmp_path / "store"))
+    buyer, bank = make_user("buyer"), make_user("bank")
+    uploaded = client.post(
+        "/documents/upload",
+        headers=auth_headers(buyer),
+        data={"doc_number": "PO-1", "seller_id": "7"},
+        files={"file": ("po.pdf", b"%PDF-1.4", "application/pdf")},
+    ).json()
+    order = make_document(buyer)
+
+    client.post("/documents/action", headers=auth_headers(bank), json={"doc_id": uploaded["id"], "action": "ISSUE_LOC"})
+    client.post("/documents/action", headers=auth_headers(bank), json={"doc_id": order.id, "action": "PAID"})  # denied
+    client.post(
+        "/documents/actions/bulk",
+        headers=auth_headers(bank),
+        json={"actions": [{"doc_id": order.id, "action": "ISSUE_LOC"}, {"doc_id": order.id, "action": "ISSUE_LOC"}]},
+    )
+
+    summary = [(e["doc_id"], e["action"], e["doc_type"], e["actor_role"]) for e in broker.published]
+    assert summary == [
+        (uploaded["id"], "ISSUED", "PO", "buyer"),
+        (uploaded["id"], "ISSUE_LOC", "LOC", "bank"),
+        (order.id, "ISSUE_LOC", "LOC", "bank"),
+        (order.id, "ISSUE_LOC", "LOC", "bank"),
+    ]
+    assert all(e["owner_id"] == buyer.id for e in broker.published)
+    assert [e["seq"] for e in broker.published] == sorted(e["seq"] for e in broker.published)
+
+
+def test_subscribers_only_receive_visible_events():
+    async def scenario():
+        broker = InProcessBroker(max_queued=10)
+        own = broker.subscribe(event_filter(user_id=1, role="buyer"))
+        bank = broker.subscribe(event_filter(user_id=2, role="bank"))
+        one_doc = broker.subscribe(event_filter(user_id=3, role="auditor", doc_id=20))
+
+        await broker.publish([_event(10, owner_id=1), _event(20, owner_id=5)])
+
+        async def drain(subscription):
+            received = []
+            while (event := await subscription.get(0.01)) is not None:
+                received.append(event["doc_id"])
+            return received
+
+        return await drain(own), await drain(bank), await drain(one_doc)
+
+    assert asyncio.run(scenario()) == ([10], [10, 20], [20])
+
+
+def test_slow_subscriber_is_dropped_without_blocking_publish():
+    async def scenario():
+        broker = InProcessBroker(max_queued=2)
+        slow = broker.subscribe(lambda event: True)
+        await broker.publish([_event(1, 1, seq) for seq in range(5)])
+        chunks = [chunk async for chunk in sse_stream(slow, keepalive_seconds=0.01)]
+        return len(broker), chunks
+
+    remaining, chunks = asyncio.run(scenario())
+    assert remaining == 0
+    assert chunks == [": connected\n\n", "event: overflow\ndata: {}\n\n"]
+
+
+def test_sse_stream_formats_events_and_keepalives():
+    async def scenario():
+        broker = InProcessBroker(max_queued=10)
+        subscription = broker.subscribe(lambda event: True)
+        await broker.publish([_event(4, 1, seq=17)])
+        stream = sse_stream(subscription, keepalive_seconds=0.01)
+        chunks = [await stream.__anext__() for _ in range(3)]
+        await stream.aclose()
+        return chunks
+
+    connected, entry, keepalive = asyncio.run(scenario())
+    assert connected == ": connected\n\n"
+    assert entry.startswith("id: 17\nevent: ledger_entry\ndata: {") and entry.endswith("}\n\n")
+    assert keepalive == ": keepalive\n\n"
+
+
+def test_stream_endpoint_unsubscribes_when_the_stream_ends(client, broker, make_user, auth_headers):
+    # A queue of one overflows on the second event, which ends the stream
+    broker.max_queued = 1
+    original_subscribe = broker.subscribe
+
+    def subscribe(accepts):
+        subscription = original_subscribe(accepts)
+        subscription.offer(_event(1, 1))
+        subscription.offer(_event(1, 1))
+        return subscription
+
+    broker.subscribe = subscribe
+    response = client.get("/events/ledger", headers=auth_headers(make_user("seller")))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.endswith("event: overflow\ndata: {}\n\n")
+    assert len(broker) == 0
@@ -0,0 +1,80 @@
+import hashlib
+
+import pytest
+
+from app.services import storage
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture(params=["local", "object"])
+def blob_store(request, tmp_path, monkeypatch):
+    if request.param == "local":
+        store = storage.LocalBlobStore(tmp_path / "store")
+    else:
+        store = storage.ObjectBlobStore(
+            storage.LocalObjectClient(tmp_path / "objects"), "documents", tmp_path / "tmp"
+        )
+    monkeypatch.setattr(storage, "_blob_store", store)
+    return store
+
+
+@pytest.fixture
+def uploaded(client, blob_store, make_user, auth_headers):
+    response = client.post(
+        "/documents/upload",
+        headers=auth_headers(make_user("buyer")),
+        data={"doc_number": "PO-7", "seller_id": "1"},
+        files={"file": ("scan.pdf", CONTENT, "application/pdf")},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_file_has_strong_etag_from_document_hash(client, uploaded):
+    response = client.get(f"/files/{uploaded['file_url']}")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_matching_if_none_match_returns_304(client, uploaded):
+    etag = f'"{uploaded["hash"]}"'
+
+    response = client.get(f"/files/{uploaded['file_url']}", headers={"If-None-Match": f'"other", {etag}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_range_request_returns_partial_content(client, uploaded):
+    response = client.get(f"/files/{uploaded['file_url']}", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+
+def test_suffix_range(client, uploaded):
+    response = client.get(f"/files/{uploaded['file_url']}", headers={"Range": "bytes=-10"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[-10:]
+
+
+def test_unsatisfiable_range(client, uploaded):
+    response = client.get(f"/files/{uploaded['file_url']}", headers={"Range": f"bytes={len(CONTENT)}-"})
+
+    assert response.status_code == 416
+
+
+def test_hash_url_is_immutable(client, uploaded):
+    response = client.get(f"/files/blob/{uploaded['hash']}")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert "immutable" in response.headers["cache-control"]
+    assert client.get(f"/files/blob/{'0' * 64}").status_code == 404
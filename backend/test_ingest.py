@@ -0,0 +1,90 @@
+import hashlib
+import io
+import zipfile
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db import ingest as importer
+from app.db.models import Document, StoredBlob
+from app.services import storage
+from app.services.ledger import verify_ledger
+
+
+@pytest.fixture
+def blob_store(tmp_path, monkeypatch):
+    store = storage.LocalBlobStore(tmp_path / "store")
+    monkeypatch.setattr(storage, "_blob_store", store)
+    return store
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _ingest(client, headers, files=(), archive=None):
+    upload = [("files", (name, content, "application/pdf")) for name, content in files]
+    if archive is not None:
+        upload.append(("archive", ("history.zip", archive, "application/zip")))
+    return client.post("/documents/ingest", headers=headers, data={"seller_id": "7"}, files=upload)
+
+
+def test_ingest_files_and_archive(client, session, blob_store, make_user, auth_headers):
+    buyer = make_user("buyer")
+    archive = _zip({"PO-2.pdf": b"second", "old/PO-3.pdf": b"third", "old/": b""})
+
+    response = _ingest(client, auth_headers(buyer), files=[("PO-1.pdf", b"first")], archive=archive)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ingested"] == 3
+    assert [doc["doc_number"] for doc in body["documents"]] == ["PO-1", "PO-2", "PO-3"]
+    documents = session.exec(select(Document).order_by(Document.id)).all()
+    assert [(d.last_action, d.entry_count, d.owner_id) for d in documents] == [("ISSUED", 1, buyer.id)] * 3
+    assert all(d.last_entry_id for d in documents)
+    assert documents[0].hash == hashlib.sha256(b"first").hexdigest()
+    assert blob_store.exists(documents[2].hash)
+    assert verify_ledger(session, full=True)["ok"]
+
+
+def test_ingest_commits_in_batches(client, session, blob_store, monkeypatch, make_user, auth_headers, count_queries):
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 2)
+    files = [(f"PO-{i}.pdf", b"same content") for i in range(5)]
+
+    with count_queries() as statements:
+        response = _ingest(client, auth_headers(make_user("buyer")), files=files)
+
+    assert response.json()["ingested"] == 5
+    assert sum(1 for s in statements if s.startswith("INSERT INTO ledgerentry")) == 3
+    assert session.exec(select(StoredBlob)).one().ref_count == 5
+
+
+def test_ingest_rejections(client, blob_store, monkeypatch, make_user, auth_headers):
+    buyer_headers = auth_headers(make_user("buyer"))
+    monkeypatch.setattr(settings, "INGEST_MAX_FILES", 2)
+
+    assert _ingest(client, auth_headers(make_user("seller")), files=[("PO-1.pdf", b"x")]).status_code == 403
+    assert _ingest(client, buyer_headers, archive=b"not a zip").status_code == 400
+    assert _ingest(client, buyer_headers, archive=_zip({"a": b"1", "b": b"2", "c": b"3"})).status_code == 413
+    assert _ingest(client, buyer_headers).status_code == 400
+    assert not [p for p in blob_store.staging_dir.iterdir()]
+
+
+def test_cli_importer(session, blob_store, tmp_path, make_user):
+    buyer = make_user("buyer")
+    source = tmp_path / "history"
+    source.mkdir()
+    for i in range(4):
+        (source / f"PO-{i}.pdf").write_bytes(f"po {i}".encode())
+
+    result = importer.ingest(source, buyer.email, seller_id=3, workers=2, batch_size=3)
+
+    assert result["ingested"] == 4
+    assert all((source / f"PO-{i}.pdf").exists() for i in range(4))  # sources are copied, not moved
+    with Session(session.get_bind()) as check:
+        assert sorted(d.doc_number for d in check.exec(select(Document))) == [f"PO-{i}" for i in range(4)]
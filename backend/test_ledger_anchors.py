@@ -0,0 +1,72 @@
+import hashlib
+
+import pytest
+
+from app.services.documents import append_ledger_entry
+from app.services.ledger import anchor_pending_entries
+from app.services.merkle import merkle_proof, merkle_root, verify_proof
+
+
+def _leaves(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 64])
+def test_every_leaf_proves_against_the_root(size):
+    leaves = _leaves(size)
+    root = merkle_root(leaves)
+
+    for index, leaf in enumerate(leaves):
+        proof = merkle_proof(leaves, index)
+        assert verify_proof(leaf, proof, root)
+        assert len(proof) <= max(size - 1, 0).bit_length()
+
+
+def test_proof_rejects_a_different_leaf():
+    leaves = _leaves(6)
+    proof = merkle_proof(leaves, 2)
+
+    assert not verify_proof(leaves[3], proof, merkle_root(leaves))
+
+
+def test_anchoring_batches_only_new_entries(session, make_user, make_document):
+    buyer = make_user("buyer")
+    documents = [make_document(buyer) for _ in range(5)]
+
+    first = anchor_pending_entries(session, max_leaves=2)
+    append_ledger_entry(session, documents[0], buyer.id, "PAID")
+    session.commit()
+    second = anchor_pending_entries(session, max_leaves=2)
+
+    assert [(a["start_seq"], a["end_seq"]) for a in first] == [(1, 2), (3, 4), (5, 5)]
+    assert [(a["start_seq"], a["end_seq"]) for a in second] == [(6, 6)]
+    assert anchor_pending_entries(session) == []
+
+
+def test_proof_endpoints(client, session, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    documents = [make_document(buyer) for _ in range(4)]
+    entry_id = documents[2].last_entry_id
+    headers = auth_headers(make_user("auditor"))
+
+    pending = client.get(f"/ledger/proof/entries/{entry_id}", headers=headers)
+    anchors = client.post("/ledger/anchors", headers=headers).json()
+    by_entry = client.get(f"/ledger/proof/entries/{entry_id}", headers=headers).json()
+    by_document = client.get(f"/ledger/proof/documents/{documents[2].hash}", headers=headers).json()
+
+    assert pending.status_code == 404
+    assert len(anchors) == 1
+    assert by_entry == by_document
+    assert by_entry["document_hash"] == documents[2].hash
+    assert verify_proof(by_entry["leaf_hash"], by_entry["proof"], anchors[0]["merkle_root"])
+
+
+def test_proof_endpoints_are_for_auditors(client, make_user, make_document, auth_headers):
+    document = make_document(make_user("buyer"))
+
+    response = client.get(
+        f"/ledger/proof/entries/{document.last_entry_id}", headers=auth_headers(make_user("bank"))
+    )
+
+    assert response.status_code == 403
+    assert client.get("/ledger/proof/documents/unknown", headers=auth_headers(make_user("auditor"))).status_code == 404
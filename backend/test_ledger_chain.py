@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.db.models import Document, LedgerEntry
+from app.db.session import engine
+from app.services.documents import append_ledger_entry
+from app.services.ledger import GENESIS_HASH, chain_entries, compute_entry_hash, verify_ledger
+
+
+def _build_ledger(session, make_user, make_document, documents=3, actions=4):
+    buyer = make_user("buyer")
+    docs = [make_document(buyer) for _ in range(documents)]
+    for i in range(actions):
+        for doc in docs:
+            append_ledger_entry(session, doc, buyer.id, f"STEP_{i}")
+    session.commit()
+    return docs
+
+
+def test_entries_are_linked_per_document_and_globally(session, make_user, make_document):
+    docs = _build_ledger(session, make_user, make_document, documents=2, actions=2)
+
+    session.refresh(docs[0])
+    entries = docs[0].ledger_entries
+    assert entries[0].prev_hash == GENESIS_HASH
+    assert entries[1].prev_hash == entries[0].entry_hash
+    assert all(entry.entry_hash == compute_entry_hash(entry) for entry in entries)
+    assert verify_ledger(session)["ok"]
+
+
+def test_batch_chaining_locks_the_head_before_reading_document_heads(session, make_user, make_document, count_queries):
+    buyer = make_user("buyer")
+    docs = [make_document(buyer) for _ in range(2)]
+    entries = [LedgerEntry(doc_id=doc.id, actor_id=buyer.id, action="NOTE") for doc in docs]
+
+    with count_queries() as statements:
+        chain_entries(session, entries)
+
+    # Reading heads first would let an entry committed in between go unseen
+    assert "ledgerhead" in statements[0].lower()
+    assert [entry.prev_hash for entry in entries] == [doc.ledger_entries[-1].entry_hash for doc in docs]
+
+
+def test_other_writers_wait_once_the_head_is_read(session, make_user, make_document):
+    # SQLite ignores FOR UPDATE; an action committed between the head read
+    # and the insert would make the batch reuse its seq
+    buyer = make_user("buyer")
+    docs = [make_document(buyer) for _ in range(2)]
+    chain_entries(session, [LedgerEntry(doc_id=docs[0].id, actor_id=buyer.id, action="NOTE")])
+
+    impatient = create_engine(engine.url, connect_args={"timeout": 0.1})
+    with Session(impatient) as other:
+        with pytest.raises(OperationalError, match="locked"):
+            append_ledger_entry(other, other.get(Document, docs[1].id), buyer.id, "NOTE")
+            other.commit()
+    impatient.dispose()
+    session.rollback()
+
+
+def test_verification_is_incremental(session, make_user, make_document):
+    docs = _build_ledger(session, make_user, make_document)
+    first = verify_ledger(session)
+
+    append_ledger_entry(session, docs[0], docs[0].owner_id, "PAID")
+    session.commit()
+    second = verify_ledger(session)
+
+    assert (first["ok"], first["verified"]) == (True, 15)
+    assert (second["ok"], second["verified"], second["verified_seq"]) == (True, 1, 16)
+    assert verify_ledger(session)["verified"] == 0
+
+
+def test_tampered_content_is_detected(session, make_user, make_document):
+    _build_ledger(session, make_user, make_document)
+    session.execute(text("UPDATE ledgerentry SET action = 'PAID' WHERE seq = 7"))
+    session.commit()
+
+    result = verify_ledger(session)
+
+    assert not result["ok"]
+    assert (result["error"]["seq"], result["verified_seq"]) == (7, 6)
+    assert result["error"]["reason"] == "entry content does not match its hash"
+
+
+def test_deleted_entry_is_detected(session, make_user, make_document):
+    _build_ledger(session, make_user, make_document)
+    session.execute(text("DELETE FROM ledgerentry WHERE seq = 4"))
+    session.commit()
+
+    result = verify_ledger(session)
+
+    assert result["error"]["reason"] == "missing entry (sequence gap)"
+
+
+def test_rewriting_checkpointed_history_is_detected(session, make_user, make_document):
+    _build_ledger(session, make_user, make_document)
+    assert verify_ledger(session)["ok"]
+    session.execute(text("UPDATE ledgerentry SET actor_id = 999 WHERE seq = 15"))
+    session.commit()
+
+    result = verify_ledger(session)
+
+    assert result["error"]["reason"] == "checkpointed entry was modified or removed"
+    assert verify_ledger(session, full=True)["error"]["seq"] == 15
+
+
+def test_verify_endpoint_is_for_auditors(client, make_user, make_document, auth_headers):
+    make_document(make_user("buyer"))
+
+    denied = client.post("/ledger/verify", headers=auth_headers(make_user("bank")))
+    allowed = client.post("/ledger/verify", headers=auth_headers(make_user("auditor")))
+
+    assert denied.status_code == 403
+    assert allowed.json()["ok"] is True
+
+
+def test_migration_chains_existing_history(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlmodel import SQLModel, Session
+    from app.db.migrations import run_migrations
+
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(legacy)
+    with legacy.begin() as connection:
+        for index in ("ix_ledgerentry_seq", "ix_ledgerentry_doc_id_seq"):
+            connection.execute(text(f"DROP INDEX {index}"))
+        for column in ("seq", "prev_hash", "chain_prev_hash", "entry_hash"):
+            connection.execute(text(f"ALTER TABLE ledgerentry DROP COLUMN {column}"))
+        for entry_id, doc_id in ((1, 1), (2, 2), (3, 1)):
+            connection.execute(text(
+                "INSERT INTO ledgerentry (id, doc_id, actor_id, action, created_at) "
+                f"VALUES ({entry_id}, {doc_id}, 1, 'ISSUED', '2024-01-0{entry_id} 10:00:00.000000')"
+            ))
+
+    run_migrations(legacy)
+
+    with Session(legacy) as legacy_session:
+        result = verify_ledger(legacy_session)
+    assert (result["ok"], result["verified"], result["unchained"]) == (True, 3, 0)
@@ -0,0 +1,108 @@
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import select
+
+from app.db.migrations import _0009_ledger_metadata_columns
+from app.db.models import LedgerEntry
+from app.services.documents import append_ledger_entry
+from app.services.ledger_metadata import find_ledger_entries, metadata_columns
+from test_migrations import _capture_statement, _explain
+
+
+def _entry(session, document, actor, metadata):
+    entry = append_ledger_entry(session, document, actor.id, "NOTE", json.dumps(metadata))
+    session.commit()
+    return entry
+
+
+def test_action_metadata_is_validated_and_stored_typed(client, session, make_user, make_document, auth_headers):
+    bank = make_user("bank")
+    document = make_document(make_user("buyer"))
+    metadata = {"amount": 1250.5, "currency": "USD", "counterparty": "First Bank", "note": "90 days"}
+
+    response = client.post(
+        "/documents/action",
+        headers=auth_headers(bank),
+        json={"doc_id": document.id, "action": "ISSUE_LOC", "metadata": metadata},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert json.loads(body["entry_metadata"]) == metadata
+    assert Decimal(body["amount"]) == Decimal("1250.50")
+    assert (body["currency"], body["counterparty"]) == ("USD", "First Bank")
+
+
+@pytest.mark.parametrize("metadata", [
+    '{"amount": -1}',
+    '{"currency": "usd"}',
+    '{"seller_id": "someone"}',
+    '{"amount": 1.005}',
+    "[1, 2]",
+    "not json",
+])
+def test_invalid_action_metadata_is_rejected(client, make_user, make_document, auth_headers, metadata):
+    bank = make_user("bank")
+    document = make_document(make_user("buyer"))
+
+    response = client.post(
+        "/documents/action",
+        headers=auth_headers(bank),
+        json={"doc_id": document.id, "action": "ISSUE_LOC", "metadata": metadata},
+    )
+
+    assert response.status_code == 422
+
+
+def test_find_ledger_entries_filters_in_sql(session, make_user, make_document):
+    buyer, bank = make_user("buyer"), make_user("bank")
+    document = make_document(buyer)
+    small = _entry(session, document, bank, {"amount": 100, "currency": "USD", "counterparty": "First Bank"})
+    large = _entry(session, document, bank, {"amount": 5000, "currency": "USD", "counterparty": "First Bank"})
+    _entry(session, document, bank, {"amount": 5000, "currency": "EUR", "counterparty": "Other Bank"})
+
+    found = find_ledger_entries(session, currency="USD", min_amount=Decimal("1000"))
+    assert [entry.id for entry in found] == [large.id]
+    found = find_ledger_entries(session, counterparty="First Bank")
+    assert [entry.id for entry in found] == [large.id, small.id]
+
+    statement = _capture_statement(session, lambda: find_ledger_entries(session, currency="USD", min_amount=1000))
+    plan = _explain(session, statement)
+    assert any("ix_ledgerentry_currency_amount" in step for step in plan), plan
+
+
+def test_search_endpoint_is_for_auditors(client, session, make_user, make_document, auth_headers):
+    buyer, seller, auditor = make_user("buyer"), make_user("seller"), make_user("auditor")
+    issued = _entry(session, make_document(buyer), buyer, {"seller_id": seller.id})
+    _entry(session, make_document(buyer), buyer, {"seller_id": seller.id + 100})
+
+    response = client.get("/ledger/entries", headers=auth_headers(auditor), params={"seller_id": seller.id})
+    assert response.status_code == 200
+    assert [(e["id"], e["actor_name"]) for e in response.json()] == [(issued.id, buyer.name)]
+
+    response = client.get("/ledger/entries", headers=auth_headers(buyer), params={"seller_id": seller.id})
+    assert response.status_code == 403
+
+
+def test_metadata_columns_keep_valid_keys_of_legacy_rows():
+    columns = metadata_columns('{"seller_id": 4, "amount": "lots", "currency": "GBP"}')
+    assert columns == {"seller_id": 4, "amount": None, "currency": "GBP", "counterparty": None}
+    assert set(metadata_columns("not json").values()) == {None}
+
+
+def test_migration_backfills_metadata_columns(session, make_user, make_document):
+    buyer = make_user("buyer")
+    document = make_document(buyer)
+    entry = _entry(session, document, buyer, {"seller_id": 9, "amount": "12.50", "currency": "EUR"})
+    session.execute(text("UPDATE ledgerentry SET seller_id = NULL, amount = NULL, currency = NULL"))
+    session.commit()
+
+    _0009_ledger_metadata_columns(session.connection())
+    session.commit()
+
+    entry = session.exec(select(LedgerEntry).where(LedgerEntry.id == entry.id)).one()
+    session.refresh(entry)
+    assert (entry.seller_id, entry.amount, entry.currency) == (9, Decimal("12.50"), "EUR")
@@ -0,0 +1,144 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import SQLModel, Session, select
+
+from app.db.migrations import MIGRATIONS, get_schema_version, run_migrations
+from app.db.models import Document, DocumentParticipant, LedgerEntry
+from app.db.session import engine
+from app.services.documents import get_last_ledger_state, get_user_documents, list_documents_page
+from app.services.ledger import verify_ledger
+
+# The schema before any migration, as the original models created it
+BASELINE_SCHEMA = [
+    "CREATE TABLE organization (id INTEGER NOT NULL, name VARCHAR NOT NULL, "
+    "created_at DATETIME NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_organization_name ON organization (name)",
+    'CREATE TABLE "user" (id INTEGER NOT NULL, name VARCHAR NOT NULL, email VARCHAR NOT NULL, '
+    "hashed_password VARCHAR NOT NULL, role VARCHAR NOT NULL, is_active BOOLEAN NOT NULL, "
+    "organization_id INTEGER, created_at DATETIME NOT NULL, PRIMARY KEY (id), "
+    "FOREIGN KEY(organization_id) REFERENCES organization (id))",
+    'CREATE UNIQUE INDEX ix_user_email ON "user" (email)',
+    "CREATE TABLE document (id INTEGER NOT NULL, doc_number VARCHAR NOT NULL, file_url VARCHAR NOT NULL, "
+    "hash VARCHAR NOT NULL, doc_type VARCHAR NOT NULL, owner_id INTEGER NOT NULL, "
+    'created_at DATETIME NOT NULL, PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES "user" (id))',
+    "CREATE INDEX ix_document_doc_number ON document (doc_number)",
+    "CREATE TABLE ledgerentry (id INTEGER NOT NULL, doc_id INTEGER NOT NULL, actor_id INTEGER NOT NULL, "
+    "action VARCHAR NOT NULL, entry_metadata VARCHAR, created_at DATETIME NOT NULL, PRIMARY KEY (id), "
+    'FOREIGN KEY(doc_id) REFERENCES document (id), FOREIGN KEY(actor_id) REFERENCES "user" (id))',
+]
+
+
+def _explain(session, statement):
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    rows = session.connection().execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def _assert_no_full_scan(plan, table):
+    steps = [step for step in plan if f" {table}" in f" {step}"]
+    assert steps, plan
+    for step in steps:
+        # "SCAN table" without an index is a full table scan
+        assert "INDEX" in step or "PRIMARY KEY" in step, plan
+
+
+def _capture_statement(session, call):
+    statements = []
+    original = session.exec
+
+    def _exec(statement, *args, **kwargs):
+        statements.append(statement)
+        return original(statement, *args, **kwargs)
+
+    session.exec = _exec
+    try:
+        call()
+    finally:
+        session.exec = original
+    return statements[0]
+
+
+def test_hot_queries_use_indexes(session, make_user, make_document):
+    buyer = make_user("buyer")
+    document = make_document(buyer)
+
+    hot_queries = [
+        ("document", _capture_statement(session, lambda: get_last_ledger_state(session, document.id))),
+        ("document", _capture_statement(session, lambda: get_user_documents(session, buyer.id))),
+    ]
+    for table, statement in hot_queries:
+        _assert_no_full_scan(_explain(session, statement), table)
+
+    for filters in ({}, {"owner_id": buyer.id}, {"doc_type": "PO"}, {"last_action": "ISSUED"}):
+        statement = _capture_statement(
+            session, lambda: list_documents_page(session, limit=20, **filters)
+        )
+        _assert_no_full_scan(_explain(session, statement), "document")
+
+
+def test_migrations_add_indexes_to_existing_database(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(legacy)
+    # Simulate a database created before the composite indexes were declared
+    composite = {
+        index.name
+        for table in (Document.__table__, LedgerEntry.__table__)
+        for index in table.indexes
+        if index.name.endswith(("_created_at", "_created_at_id"))
+    }
+    with legacy.begin() as connection:
+        for name in composite:
+            connection.execute(text(f"DROP INDEX {name}"))
+
+    applied = run_migrations(legacy)
+
+    assert applied == [m.version for m in MIGRATIONS]
+    assert get_schema_version(legacy) == MIGRATIONS[-1].version
+    inspector = inspect(legacy)
+    existing = {
+        index["name"]
+        for table in ("document", "ledgerentry")
+        for index in inspector.get_indexes(table)
+    }
+    assert composite and composite <= existing
+
+
+def test_migrations_are_idempotent(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    SQLModel.metadata.create_all(fresh)
+
+    assert run_migrations(fresh) == [m.version for m in MIGRATIONS]
+    assert run_migrations(fresh) == []
+
+
+def test_migrations_upgrade_a_populated_baseline_database(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with legacy.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO organization VALUES (1, 'Org', '2024-01-01 00:00:00')"))
+        connection.execute(text(
+            'INSERT INTO "user" VALUES (1, \'Buyer\', \'b@example.com\', \'x\', \'buyer\', 1, 1, \'2024-01-01 00:00:00\'), '
+            "(2, 'Seller', 's@example.com', 'x', 'seller', 1, 1, '2024-01-01 00:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO document VALUES (1, 'PO-1', '/files/a.pdf', 'abc', 'BOL', 1, '2024-01-02 00:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO ledgerentry VALUES "
+            "(1, 1, 1, 'ISSUED', '{\"seller_id\": 2, \"amount\": \"10.50\", \"currency\": \"USD\"}', "
+            "'2024-01-02 00:00:00'), "
+            "(2, 1, 2, 'ISSUE_BOL', NULL, '2024-01-03 00:00:00')"
+        ))
+
+    # As at startup: new tables first, then the migrations
+    SQLModel.metadata.create_all(legacy)
+    assert run_migrations(legacy) == [m.version for m in MIGRATIONS]
+
+    with Session(legacy) as session:
+        assert verify_ledger(session, full=True)["ok"]
+        entries = session.exec(select(LedgerEntry).order_by(LedgerEntry.id)).all()
+        assert [e.seq for e in entries] == [1, 2]
+        assert (entries[0].seller_id, entries[0].currency) == (2, "USD")
+        document = session.get(Document, 1)
+        assert (document.last_action, document.entry_count) == ("ISSUE_BOL", 2)
+        assert {p.user_id for p in session.exec(select(DocumentParticipant))} == {1, 2}
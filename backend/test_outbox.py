@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from app.db.models import OutboxEvent
+from app.services import outbox
+from app.services.documents import append_ledger_entry
+from app.services.outbox import LEDGER_ENTRY_TOPIC, dispatch_outbox, purge_outbox, register_handler
+
+
+@pytest.fixture(autouse=True)
+def handlers(monkeypatch):
+    monkeypatch.setattr(outbox, "_handlers", {})
+
+
+def _events(session):
+    session.expire_all()
+    return session.exec(select(OutboxEvent).order_by(OutboxEvent.id)).all()
+
+
+def _append(session, document, actor, action="VERIFY"):
+    entry = append_ledger_entry(session, document, actor.id, action)
+    session.commit()
+    return entry
+
+
+def test_entries_and_outbox_rows_commit_together(client, session, make_user, make_document, auth_headers):
+    buyer, bank = make_user("buyer"), make_user("bank")
+    document = make_document(buyer)  # ISSUED entry
+    client.post("/documents/action", headers=auth_headers(bank), json={"doc_id": document.id, "action": "ISSUE_LOC"})
+    append_ledger_entry(session, document, bank.id, "ISSUE_LOC")
+    session.rollback()
+
+    events = _events(session)
+    assert [json.loads(e.payload)["action"] for e in events] == ["ISSUED", "ISSUE_LOC"]
+    assert {(e.topic, e.status) for e in events} == {(LEDGER_ENTRY_TOPIC, "pending")}
+
+
+def test_dispatch_hands_batches_to_handlers(session, make_user, make_document):
+    buyer = make_user("buyer")
+    entries = [_append(session, make_document(buyer), buyer) for _ in range(2)]
+    batches = []
+    register_handler(LEDGER_ENTRY_TOPIC, lambda session, payloads: batches.append(payloads))
+
+    summary = dispatch_outbox(session, batch_size=10)
+
+    assert (summary["dispatched"], summary["retried"], summary["failed"]) == (4, 0, 0)
+    assert len(batches) == 1
+    assert [p["entry_id"] for p in batches[0] if p["action"] == "VERIFY"] == [e.id for e in entries]
+    assert {e.status for e in _events(session)} == {"done"}
+    assert dispatch_outbox(session)["claimed"] == 0
+
+
+def test_failing_event_is_retried_with_backoff_then_failed(session, make_user, make_document):
+    buyer = make_user("buyer")
+    bad = _append(session, make_document(buyer), buyer, action="BAD")
+    delivered = []
+
+    def handler(session, payloads):
+        if any(p["action"] == "BAD" for p in payloads):
+            raise RuntimeError("boom")
+        delivered.extend(p["entry_id"] for p in payloads)
+
+    register_handler(LEDGER_ENTRY_TOPIC, handler)
+
+    summary = dispatch_outbox(session, max_attempts=2, retry_base_seconds=60)
+    assert (summary["dispatched"], summary["retried"], summary["failed"]) == (1, 1, 0)
+    assert len(delivered) == 1  # the ISSUED entry
+    failing = [e for e in _events(session) if e.status == "pending"]
+    assert [json.loads(e.payload)["entry_id"] for e in failing] == [bad.id]
+    assert failing[0].attempts == 1 and failing[0].last_error == "RuntimeError: boom"
+    assert failing[0].available_at > datetime.utcnow() + timedelta(seconds=50)
+
+    assert dispatch_outbox(session, max_attempts=2)["claimed"] == 0  # not due yet
+    failing[0].available_at = datetime.utcnow()
+    session.add(failing[0])
+    session.commit()
+    summary = dispatch_outbox(session, max_attempts=2)
+    assert summary["failed"] == 1
+    assert [e.status for e in _events(session)].count("failed") == 1
+
+
+def test_handler_writes_commit_with_delivery(session, make_user, make_document):
+    buyer = make_user("buyer")
+    make_document(buyer)
+    attempts = []
+
+    def handler(session, payloads):
+        # Writes through the dispatcher's session are undone if delivery fails
+        session.add(OutboxEvent(topic="derived", payload="{}"))
+        attempts.append(len(payloads))
+        if len(attempts) == 1:
+            raise RuntimeError("first attempt fails")
+
+    register_handler(LEDGER_ENTRY_TOPIC, handler)
+    summary = dispatch_outbox(session)
+
+    assert summary["dispatched"] == 1
+    assert [e.topic for e in _events(session)].count("derived") == 1
+
+
+def test_purge_keeps_recent_and_failed_rows(session, make_user, make_document):
+    buyer = make_user("buyer")
+    make_document(buyer)
+    make_document(buyer)
+    dispatch_outbox(session)
+    old, recent = _events(session)
+    old.dispatched_at = datetime.utcnow() - timedelta(days=30)
+    session.add(old)
+    session.add(OutboxEvent(topic="x", payload="{}", status="failed"))
+    session.commit()
+
+    assert purge_outbox(session, retention_seconds=3600) == 1
+    assert [e.id for e in _events(session)][0] == recent.id
+    assert len(_events(session)) == 2
@@ -0,0 +1,85 @@
+import json
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from app.db.migrations import _0008_document_participants
+from app.db.models import DocumentParticipant
+from app.services.documents import append_ledger_entry, list_documents_page
+from test_migrations import _capture_statement, _explain
+
+
+def _issue(session, make_document, buyer, seller):
+    document = make_document(buyer)
+    append_ledger_entry(session, document, buyer.id, "AMEND", json.dumps({"seller_id": seller.id}))
+    session.commit()
+    return document
+
+
+def _mine(client, headers, **params):
+    response = client.get("/documents/", headers=headers, params=dict(params, mine="true"))
+    assert response.status_code == 200
+    return [doc["id"] for doc in response.json()]
+
+
+def test_participants_follow_uploads_and_actions(client, session, make_user, make_document, auth_headers):
+    buyer, seller, other_seller, bank = (make_user(role) for role in ("buyer", "seller", "seller", "bank"))
+    named = _issue(session, make_document, buyer, seller)
+    unrelated = make_document(buyer)
+
+    client.post("/documents/action", headers=auth_headers(bank), json={"doc_id": unrelated.id, "action": "ISSUE_LOC"})
+
+    assert _mine(client, auth_headers(seller)) == [named.id]
+    assert _mine(client, auth_headers(other_seller)) == []
+    assert _mine(client, auth_headers(bank)) == [unrelated.id]
+    all_docs = client.get("/documents/", headers=auth_headers(bank)).json()
+    assert len(all_docs) == 2
+    roles = {(p.user_id, p.role) for p in session.exec(select(DocumentParticipant))}
+    assert roles == {(buyer.id, "buyer"), (seller.id, "seller"), (bank.id, "bank")}
+
+
+def test_mine_pages_through_every_document_once(client, session, make_user, make_document, auth_headers):
+    buyer, seller = make_user("buyer"), make_user("seller")
+    expected = sorted(_issue(session, make_document, buyer, seller).id for _ in range(5))
+    make_document(buyer)  # not addressed to the seller
+    headers = auth_headers(seller)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/documents/", headers=headers, params=dict(params, mine="true"))
+        seen += [doc["id"] for doc in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert sorted(seen) == expected and len(seen) == len(expected)
+
+
+def test_mine_is_served_from_the_participant_index(session, make_user, make_document):
+    seller = make_user("seller")
+    _issue(session, make_document, make_user("buyer"), seller)
+
+    statement = _capture_statement(
+        session, lambda: list_documents_page(session, limit=20, participant_id=seller.id)
+    )
+    plan = _explain(session, statement)
+
+    assert any("ix_documentparticipant_user_id_doc_created_at" in step for step in plan), plan
+    assert not any(step.startswith("SCAN document") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_migration_backfills_participants(session, make_user, make_document):
+    buyer, seller, auditor = make_user("buyer"), make_user("seller"), make_user("auditor")
+    document = _issue(session, make_document, buyer, seller)
+    append_ledger_entry(session, document, auditor.id, "VERIFY")
+    session.commit()
+    session.execute(text("DELETE FROM documentparticipant"))
+    session.commit()
+
+    _0008_document_participants(session.connection())
+    session.commit()
+
+    participants = {p.user_id for p in session.exec(select(DocumentParticipant))}
+    assert participants == {buyer.id, seller.id, auditor.id}
@@ -0,0 +1,105 @@
+import itertools
+import json
+
+import pytest
+
+from app.services.documents import validate_action
+from app.services.policy import DENIED, PolicyTable, load_policy
+
+ROLES = ["buyer", "seller", "auditor", "bank", "admin", ""]
+DOC_TYPES = ["PO", "LOC", "BOL", "INVOICE", "OTHER"]
+ACTIONS = [
+    "ISSUED", "AMEND", "RECEIVED", "SHIPPED", "ISSUE_BOL", "ISSUE_INVOICE",
+    "VERIFY", "PAID", "ISSUE_LOC", "DELETE",
+]
+
+
+def legacy_decision(role, doc_type, action):
+    """The if/elif chain perform_action used before the policy table"""
+    allowed = (role, doc_type, action) in {
+        ("buyer", "PO", "AMEND"),
+        ("buyer", "BOL", "RECEIVED"),
+        ("seller", "BOL", "SHIPPED"),
+        ("seller", "PO", "ISSUE_BOL"),
+        ("seller", "LOC", "ISSUE_BOL"),
+        ("seller", "BOL", "ISSUE_INVOICE"),
+        ("auditor", "PO", "VERIFY"),
+        ("auditor", "LOC", "VERIFY"),
+        ("bank", "INVOICE", "PAID"),
+        ("bank", "PO", "ISSUE_LOC"),
+        ("bank", "LOC", "ISSUE_LOC"),
+    }
+    if not allowed:
+        return (False, None)
+    if action == "ISSUE_LOC" and doc_type == "PO":
+        return (True, "LOC")
+    if action == "ISSUE_BOL" and doc_type in ("PO", "LOC"):
+        return (True, "BOL")
+    if action == "ISSUE_INVOICE" and doc_type == "BOL":
+        return (True, "INVOICE")
+    return (True, doc_type)
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return load_policy()
+
+
+def test_default_policy_matches_previous_rules_exhaustively(policy):
+    for role, doc_type, action in itertools.product(ROLES, DOC_TYPES, ACTIONS):
+        decision = policy.decide(role, doc_type, action)
+        assert tuple(decision) == legacy_decision(role, doc_type, action), (role, doc_type, action)
+        assert validate_action(role, doc_type, action) == decision.allowed
+
+
+def test_every_rule_leads_to_a_known_document_type(policy):
+    for (role, doc_type, action), decision in policy.rules().items():
+        assert decision.allowed
+        assert decision.next_doc_type in DOC_TYPES
+
+
+def test_duplicate_rules_are_rejected():
+    rule = {"role": "seller", "doc_type": "BOL", "action": "SHIPPED"}
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        PolicyTable([rule, dict(rule, next_doc_type="INVOICE")])
+
+
+def test_incomplete_rules_are_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        PolicyTable([{"role": "bank", "action": "PAID"}])
+
+
+def test_policy_loads_from_file(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"rules": [
+        {"role": "bank", "doc_type": "INVOICE", "action": "REFUND", "next_doc_type": "PO"},
+    ]}))
+
+    policy = load_policy(path)
+
+    assert len(policy) == 1
+    assert policy.decide("bank", "INVOICE", "REFUND") == (True, "PO")
+    assert policy.decide("bank", "INVOICE", "PAID") == DENIED
+
+
+def test_trade_flow_follows_policy_transitions(client, make_user, make_document, auth_headers):
+    buyer = make_user("buyer")
+    document = make_document(buyer)
+    steps = [
+        ("bank", "ISSUE_LOC", "LOC"),
+        ("seller", "ISSUE_BOL", "BOL"),
+        ("seller", "ISSUE_INVOICE", "INVOICE"),
+        ("bank", "PAID", "INVOICE"),
+    ]
+
+    for role, action, expected_type in steps:
+        headers = auth_headers(make_user(role))
+        response = client.post("/documents/action", headers=headers, json={"doc_id": document.id, "action": action})
+        assert response.status_code == 200, (role, action)
+        assert client.get(f"/documents/{document.id}", headers=headers).json()["doc_type"] == expected_type
+
+    denied = client.post(
+        "/documents/action", headers=auth_headers(buyer), json={"doc_id": document.id, "action": "PAID"}
+    )
+    assert denied.status_code == 403
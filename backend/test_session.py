@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import build_engine_kwargs, engine
+
+
+def test_engine_does_not_echo_by_default():
+    assert engine.echo is False
+
+
+def test_pool_options_for_server_databases():
+    kwargs = build_engine_kwargs("postgresql://user:pw@db/tradefinance")
+
+    assert kwargs["pool_size"] == settings.DB_POOL_SIZE
+    assert kwargs["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert kwargs["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert kwargs["pool_pre_ping"] is True
+    assert "connect_args" not in kwargs
+
+
+def test_in_memory_sqlite_skips_pool_sizing():
+    kwargs = build_engine_kwargs("sqlite://")
+
+    assert "pool_size" not in kwargs
+    assert kwargs["connect_args"]["check_same_thread"] is False
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(session):
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
@@ -0,0 +1,151 @@
+import hashlib
+
+import pytest
+from sqlmodel import select
+
+from app.db.models import StoredBlob
+from app.services import storage
+
+
+@pytest.fixture
+def blob_store(tmp_path, monkeypatch):
+    store = storage.LocalBlobStore(tmp_path / "store")
+    monkeypatch.setattr(storage, "_blob_store", store)
+    return store
+
+
+def _stored_files(store):
+    return [p for p in store.root.rglob("*") if p.is_file()]
+
+
+def _upload(client, headers, content=b"%PDF-1.4 purchase order", doc_number="PO-42"):
+    return client.post(
+        "/documents/upload",
+        headers=headers,
+        data={"doc_number": doc_number, "seller_id": "7"},
+        files={"file": ("po.pdf", content, "application/pdf")},
+    )
+
+
+def test_buyer_upload_creates_document_and_issued_entry(client, blob_store, make_user, auth_headers):
+    content = b"%PDF-1.4 purchase order"
+
+    response = _upload(client, auth_headers(make_user("buyer")), content)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["hash"] == hashlib.sha256(content).hexdigest()
+    assert (body["doc_type"], body["last_action"], body["entry_count"]) == ("PO", "ISSUED", 1)
+    assert [entry["action"] for entry in body["ledger_entries"]] == ["ISSUED"]
+    assert body["ledger_entries"][0]["entry_metadata"] == '{"seller_id": 7}'
+    assert blob_store.local_path(body["hash"]).read_bytes() == content
+
+
+def test_non_buyer_cannot_upload(client, blob_store, make_user, auth_headers):
+    response = _upload(client, auth_headers(make_user("seller")))
+
+    assert response.status_code == 403
+
+
+def test_oversized_upload_rejected_without_leaving_files(client, blob_store, make_user, auth_headers, monkeypatch):
+    from app.core.config import settings
+    from app.services import documents as documents_service
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 10)
+    monkeypatch.setattr(documents_service, "UPLOAD_CHUNK_SIZE", 4)
+
+    response = _upload(client, auth_headers(make_user("buyer")), content=b"x" * 11)
+
+    assert response.status_code == 413
+    assert _stored_files(blob_store) == []
+
+
+def test_rejected_role_writes_nothing(client, blob_store, make_user, auth_headers):
+    _upload(client, auth_headers(make_user("bank")))
+
+    assert _stored_files(blob_store) == []
+
+
+def test_spool_upload_hashes_in_one_pass(tmp_path):
+    import io
+    from app.services.documents import spool_upload
+
+    content = bytes(range(256)) * 10000
+
+    path, file_hash, size = spool_upload(io.BytesIO(content), tmp_path, max_bytes=len(content))
+
+    assert (file_hash, size) == (hashlib.sha256(content).hexdigest(), len(content))
+    assert path.read_bytes() == content
+
+
+def test_identical_uploads_are_stored_once(client, session, blob_store, make_user, auth_headers):
+    headers = auth_headers(make_user("buyer"))
+    first = _upload(client, headers, content=b"same bytes", doc_number="PO-1").json()
+    second = _upload(client, headers, content=b"same bytes", doc_number="PO-2").json()
+
+    assert first["hash"] == second["hash"]
+    assert len(_stored_files(blob_store)) == 1
+    blob = session.exec(select(StoredBlob)).one()
+    assert (blob.ref_count, blob.size) == (2, len(b"same bytes"))
+
+
+def _fail_document_creation(monkeypatch):
+    from app.api.routes import documents as documents_routes
+
+    def append_ledger_entry(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(documents_routes, "append_ledger_entry", append_ledger_entry)
+
+
+def test_failed_upload_leaves_no_orphan_blob(client, session, blob_store, make_user, auth_headers, monkeypatch):
+    _fail_document_creation(monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        _upload(client, auth_headers(make_user("buyer")), content=b"never referenced")
+
+    assert _stored_files(blob_store) == []
+    assert session.exec(select(StoredBlob)).all() == []
+
+
+def test_failed_upload_keeps_content_other_documents_use(client, session, blob_store, make_user, auth_headers, monkeypatch):
+    headers = auth_headers(make_user("buyer"))
+    stored = _upload(client, headers, content=b"shared bytes", doc_number="PO-1").json()
+    _fail_document_creation(monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        _upload(client, headers, content=b"shared bytes", doc_number="PO-2")
+
+    assert blob_store.local_path(stored["hash"]).read_bytes() == b"shared bytes"
+    session.expire_all()
+    assert session.exec(select(StoredBlob)).one().ref_count == 1
+
+
+def test_same_filename_different_content_does_not_overwrite(client, blob_store, make_user, auth_headers):
+    headers = auth_headers(make_user("buyer"))
+    first = _upload(client, headers, content=b"version one").json()
+    second = _upload(client, headers, content=b"version two").json()
+
+    assert first["file_url"] == second["file_url"]
+    assert blob_store.local_path(first["hash"]).read_bytes() == b"version one"
+    # The filename resolves to the most recent document
+    response = client.get(f"/files/{first['file_url']}")
+    assert response.content == b"version two"
+    assert response.headers["content-type"] == "application/pdf"
+
+
+def test_object_store_backend_round_trip(tmp_path):
+    store = storage.ObjectBlobStore(
+        storage.LocalObjectClient(tmp_path / "objects"), "documents", tmp_path / "tmp"
+    )
+    digest = hashlib.sha256(b"bill of lading").hexdigest()
+    for _ in range(2):
+        spooled = store.staging_dir / "upload"
+        spooled.write_bytes(b"bill of lading")
+        store.put_file(digest, spooled)
+
+    assert store.exists(digest)
+    assert store.open(digest).read() == b"bill of lading"
+    assert list(store.staging_dir.iterdir()) == []
+    store.delete(digest)
+    assert not store.exists(digest)
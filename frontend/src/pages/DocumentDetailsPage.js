@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { documentsAPI } from '../services/api';
+import { documentsAPI, subscribeLedgerEvents } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 
 export default function DocumentDetailsPage() {
@@ -17,12 +17,14 @@ export default function DocumentDetailsPage() {
 
   useEffect(() => {
     fetchDocumentDetails();
+    // Refresh quietly whenever an entry is committed for this document
+    return subscribeLedgerEvents({ docId: id, onEvent: () => fetchDocumentDetails(true) });
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id]);
 
-  const fetchDocumentDetails = async () => {
+  const fetchDocumentDetails = async (quiet = false) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const response = await documentsAPI.getDocumentDetails(id);
       setDocument(response.data);
       setLedgerEntries(response.data.ledger_entries || []);
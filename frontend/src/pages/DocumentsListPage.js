@@ -1,21 +1,57 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
-import { documentsAPI } from '../services/api';
+import { documentsAPI, subscribeLedgerEvents } from '../services/api';
+
+// Refreshes requested by events within this window share one request
+const REFRESH_DEBOUNCE_MS = 1000;
 
 export default function DocumentsListPage() {
   const [documents, setDocuments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const documentsRef = useRef(documents);
+  const refreshTimer = useRef(null);
+  documentsRef.current = documents;
 
   useEffect(() => {
     fetchDocuments();
+    const unsubscribe = subscribeLedgerEvents({ onEvent: applyEvent });
+    return () => {
+      unsubscribe();
+      clearTimeout(refreshTimer.current);
+    };
   }, []);
 
-  const fetchDocuments = async () => {
+  // Events for listed documents carry everything the row shows that can
+  // change; a new document, or a dropped stream (null), needs the first page
+  const applyEvent = (event) => {
+    if (event && documentsRef.current.some((doc) => doc.id === event.doc_id)) {
+      setDocuments((current) => current.map((doc) => (
+        doc.id === event.doc_id ? { ...doc, doc_type: event.doc_type, last_action: event.action } : doc
+      )));
+      return;
+    }
+    if (refreshTimer.current) return;
+    refreshTimer.current = setTimeout(() => {
+      refreshTimer.current = null;
+      fetchDocuments(true);
+    }, REFRESH_DEBOUNCE_MS);
+  };
+
+  const fetchDocuments = async (quiet = false) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const response = await documentsAPI.getAll();
-      setDocuments(response.data);
+      if (quiet) {
+        // Keep pages loaded with "Load more"; the cursor still points past them
+        const fresh = new Set(response.data.map((doc) => doc.id));
+        setDocuments((current) => [...response.data, ...current.filter((doc) => !fresh.has(doc.id))]);
+      } else {
+        setDocuments(response.data);
+        setNextCursor(response.headers['x-next-cursor'] || null);
+      }
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch documents');
     } finally {
@@ -23,6 +59,19 @@ export default function DocumentsListPage() {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await documentsAPI.getAll({ cursor: nextCursor });
+      setDocuments((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to fetch documents');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -104,6 +153,17 @@ export default function DocumentsListPage() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="px-6 py-4 text-center border-t border-gray-200">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="bg-gray-100 hover:bg-gray-200 text-gray-800 font-bold py-2 px-4 rounded disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -31,9 +31,64 @@ export const documentsAPI = {
   upload: (formData) => api.post('/documents/upload', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   }),
-  getAll: () => api.get('/documents/'),
+  // One page, newest first; pass the X-Next-Cursor header as `cursor` for the next
+  getAll: (params = {}) => api.get('/documents/', { params }),
   getById: (id) => api.get(`/documents/${id}`),
   performAction: (data) => api.post('/documents/action', data),
 };
 
+const RECONNECT_BASE_MS = 2000;
+const RECONNECT_MAX_MS = 60000;
+
+// Follows GET /events/ledger (Server-Sent Events). fetch is used instead of
+// EventSource so the bearer token can be sent. The stream is reopened with
+// exponential backoff when it ends or fails, and given up on a 401/403.
+// onEvent(null) is called after a connected stream drops, since entries may
+// have been missed. Returns a function that closes it.
+export const subscribeLedgerEvents = ({ docId, onEvent }) => {
+  const controller = new AbortController();
+  const query = docId ? `?doc_id=${docId}` : '';
+
+  const connect = async () => {
+    let delay = RECONNECT_BASE_MS;
+    while (!controller.signal.aborted) {
+      let connected = false;
+      try {
+        const response = await fetch(`${API_URL}/events/ledger${query}`, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+          signal: controller.signal,
+        });
+        if (response.status === 401 || response.status === 403) return;
+        if (response.ok) {
+          connected = true;
+          delay = RECONNECT_BASE_MS;
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            const messages = buffer.split('\n\n');
+            buffer = messages.pop();
+            messages.forEach((message) => {
+              const data = message.split('\n').find((line) => line.startsWith('data: '));
+              if (message.includes('event: ledger_entry') && data) {
+                onEvent(JSON.parse(data.slice(6)));
+              }
+            });
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+      }
+      if (connected) onEvent(null);
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      delay = Math.min(delay * 2, RECONNECT_MAX_MS);
+    }
+  };
+
+  connect();
+  return () => controller.abort();
+};
+
 export default api;